@@ -0,0 +1,170 @@
+from collections import Mapping
+import numpy as np
+
+
+class ColumnarScore(Mapping):
+    """
+    Columnar representation of a SymbTr score. The numeric columns are
+    stored as typed numpy arrays and the string columns (note53, noteAE and
+    lyrics) as lists. The object can be accessed like the dict returned by
+    the readers, e.g. score['offset'], and it can be converted to the dict
+    of lists by calling the to_dict method
+
+    If a ScoreVocabulary is given, the string columns are stored as the
+    int32 codes of the strings in the vocabulary instead. They are decoded
+    on demand, e.g. while calling score['note53']; the codes can be
+    accessed by the get_codes method. Each access decodes the whole column,
+    so the callers reading the rows in a loop should keep the decoded
+    column locally or use the decode_at method.
+    """
+    numeric_columns = {'index': np.int32, 'code': np.int32,
+                       'comma53': np.int32, 'commaAE': np.int32,
+                       'numerator': np.int32, 'denumerator': np.int32,
+                       'duration': np.int32, 'lns': np.int32,
+                       'bas': np.int32, 'offset': np.float64}
+    string_columns = ['note53', 'noteAE', 'lyrics']
+
+    def __init__(self, columns, vocabulary=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        columns : dict
+            A dictionary of the score columns, where each key is the name of
+            a column in the score dict returned by the readers
+        vocabulary : ScoreVocabulary, optional
+            The vocabulary to encode the string columns. The vocabulary
+            might be shared by many scores (the default is None, which
+            stores the string columns as lists)
+        """
+        self.vocabulary = vocabulary
+
+        self._columns = {}
+        for key, val in columns.items():
+            if key in self.numeric_columns.keys():
+                self._columns[key] = np.asarray(
+                    val, dtype=self.numeric_columns[key])
+            elif vocabulary is None:
+                self._columns[key] = list(val)
+            else:
+                self._columns[key] = vocabulary.encode(val)
+
+        num_rows = set(len(val) for val in self._columns.values())
+        if len(num_rows) > 1:
+            raise ValueError('All the columns in the score should have the '
+                             'same length')
+
+    @classmethod
+    def from_dict(cls, score):
+        """
+        Creates a columnar score from the score dict returned by the readers
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the score, where each key is a column name and
+            each value is the list of the values in the column
+
+        Returns
+        ----------
+        ColumnarScore
+            The columnar score
+        """
+        return cls(score)
+
+    def to_dict(self):
+        """
+        Returns the dict view of the score, i.e. the score representation
+        returned by the readers by default
+
+        Returns
+        ----------
+        dict
+            A dictionary of the score, where each key is a column name and
+            each value is the list of the values in the column
+        """
+        return {key: val.tolist() if isinstance(val, np.ndarray)
+                else list(val) for key, val in self.items()}
+
+    def encode(self, vocabulary):
+        """
+        Returns a copy of the score, where the string columns are encoded
+        by the vocabulary
+
+        Parameters
+        ----------
+        vocabulary : ScoreVocabulary
+            The vocabulary to encode the string columns
+
+        Returns
+        ----------
+        ColumnarScore
+            The encoded score
+        """
+        return ColumnarScore(dict(self.items()), vocabulary=vocabulary)
+
+    def get_codes(self, key):
+        """
+        Returns the codes of an encoded string column
+
+        Parameters
+        ----------
+        key : str
+            The name of the string column, i.e. note53, noteAE or lyrics
+
+        Returns
+        ----------
+        numpy.ndarray
+            The codes of the strings in the vocabulary of the score
+
+        Raises
+        ------
+        ValueError
+            If the score is not encoded by a vocabulary
+        """
+        if self.vocabulary is None:
+            raise ValueError('The string columns of the score are not '
+                             'encoded')
+
+        return self._columns[key]
+
+    def decode_at(self, key, idx):
+        """
+        Returns the value of a string column in a row without decoding the
+        whole column
+
+        Parameters
+        ----------
+        key : str
+            The name of the string column, i.e. note53, noteAE or lyrics
+        idx : int
+            The position of the row
+
+        Returns
+        ----------
+        str
+            The value in the row
+        """
+        if self.vocabulary is None:
+            return self._columns[key][idx]
+
+        return self.vocabulary.get_token(self._columns[key][idx])
+
+    @property
+    def num_rows(self):
+        try:
+            return len(next(iter(self._columns.values())))
+        except StopIteration:  # no columns
+            return 0
+
+    def __getitem__(self, key):
+        if self.vocabulary is not None and key in self.string_columns:
+            return self.vocabulary.decode(self._columns[key])
+        return self._columns[key]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
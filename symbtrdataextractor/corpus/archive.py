@@ -0,0 +1,282 @@
+import json
+import os
+import tarfile
+import zipfile
+from contextlib import contextmanager
+
+from ..reader.mu2 import Mu2Reader
+from ..reader.musicxml import MusicXMLReader
+from ..reader.symbtr import SymbTrReader
+from ..reader.txt import TxtReader
+
+
+class ArchiveCorpus(object):
+    """
+    SymbTr corpus read directly from a release archive (zip or tar, e.g.
+    tar.gz). The archive is scanned once to build an index of the members
+    per SymbTr score and file format. The members are then streamed to the
+    readers without extracting them to the disk. The symbtr_name of each
+    score is taken from the member name.
+
+    The archive is opened lazily. The object can be pickled, e.g. to be sent
+    to worker processes, in which case the member index is kept and the
+    archive is reopened in the worker.
+    """
+    formats = ['.txt', '.mu2', '.xml', '.autoSeg']
+    _readers = {'.txt': TxtReader, '.mu2': Mu2Reader, '.xml': MusicXMLReader}
+
+    def __init__(self, archive_file):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        archive_file : str
+            The path of the zip or tar archive
+
+        Raises
+        ------
+        IOError
+            If the archive is neither a zip nor a tar archive
+        """
+        self.archive_file = archive_file
+
+        if zipfile.is_zipfile(archive_file):
+            self.archive_type = 'zip'
+        elif tarfile.is_tarfile(archive_file):
+            self.archive_type = 'tar'
+        else:
+            raise IOError(u'{0!s} is not a zip or tar archive'.format(
+                archive_file))
+
+        self._archive = None
+        self._index = self._build_index()
+
+    def _build_index(self):
+        # the zip members are opened by their names. The tar members are
+        # opened by their TarInfo, which stores the location of the member,
+        # since looking up a tar member by its name is a linear search
+        if self.archive_type == 'zip':
+            members = [(m.filename, m.filename)
+                       for m in self.archive.infolist()
+                       if not m.filename.endswith('/')]
+        else:
+            members = [(m, m.name) for m in self.archive.getmembers()
+                       if m.isfile()]
+
+        index = {}
+        for member, member_name in members:
+            symbtr_name, extension = os.path.splitext(
+                os.path.basename(member_name))
+            if (extension in self.formats and
+                    SymbTrReader.is_symbtr_name(symbtr_name)):
+                index.setdefault(symbtr_name, {})[extension] = member
+
+        return index
+
+    @property
+    def archive(self):
+        if self._archive is None:
+            if self.archive_type == 'zip':
+                self._archive = zipfile.ZipFile(self.archive_file, 'r')
+            else:
+                self._archive = tarfile.open(self.archive_file, 'r')
+
+        return self._archive
+
+    @property
+    def symbtr_names(self):
+        return sorted(self._index.keys())
+
+    def get_formats(self, symbtr_name):
+        """
+        Returns the formats (extensions) of a score available in the archive
+
+        Parameters
+        ----------
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+
+        Returns
+        ----------
+        list[str]
+            The extensions of the available files, e.g. ['.mu2', '.txt']
+        """
+        return sorted(self._index.get(symbtr_name, {}).keys())
+
+    @contextmanager
+    def open_member(self, symbtr_name, extension):
+        """
+        Opens the member of a score in the archive as a file-like object
+
+        Parameters
+        ----------
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+        extension : str
+            The extension of the member, e.g. '.txt'
+
+        Yields
+        ----------
+        file
+            The file-like object of the member
+
+        Raises
+        ------
+        KeyError
+            If the score does not have a member with the extension in the
+            archive
+        """
+        try:
+            member = self._index[symbtr_name][extension]
+        except KeyError:
+            raise KeyError(u'{0!s}{1!s} is not in {2!s}'.format(
+                symbtr_name, extension, self.archive_file))
+
+        if self.archive_type == 'zip':
+            f = self.archive.open(member)
+        else:
+            f = self.archive.extractfile(member)
+
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def read_score(self, symbtr_name, extension='.txt', **kwargs):
+        """
+        Reads a score in the archive with the reader of its format
+
+        Parameters
+        ----------
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+        extension : str, optional
+            The extension of the score format; '.txt', '.mu2' or '.xml'
+            (the default is '.txt')
+        **kwargs
+            The keyword arguments passed to the read method of the reader
+
+        Returns
+        ----------
+        dict
+            A dictionary of the read SymbTr score
+        bool
+            True if the read SymbTr score is valid, False otherwise
+        """
+        reader = self._readers[extension]
+        with self.open_member(symbtr_name, extension) as f:
+            return reader.read(f, symbtr_name=symbtr_name, **kwargs)
+
+    def read_mu2_header(self, symbtr_name):
+        """
+        Reads the metadata in the header of the SymbTr-mu2 score in the
+        archive
+
+        Parameters
+        ----------
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+
+        Returns
+        ----------
+        dict
+            A dictionary storing the metadata extracted from the header
+        list of str
+            The names of the columns in the mu2 file
+        bool
+            True if the metadata in the mu2 header is valid/consistent,
+            False otherwise
+        """
+        with self.open_member(symbtr_name, '.mu2') as f:
+            return Mu2Reader.read_header(f, symbtr_name=symbtr_name)
+
+    def read_segment_bounds(self, symbtr_name):
+        """
+        Reads the (automatic) segment boundaries of a score stored in the
+        .autoSeg member of the archive
+
+        Parameters
+        ----------
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+
+        Returns
+        ----------
+        list[int] or None
+            The note indices of the segment boundaries, None if the score
+            does not have an .autoSeg member
+        """
+        if '.autoSeg' not in self.get_formats(symbtr_name):
+            return None
+
+        with self.open_member(symbtr_name, '.autoSeg') as f:
+            return json.load(f)['boundary_noteIdx']
+
+    def extract(self, extractor, symbtr_name, extension='.txt', mbid=None,
+                use_segment_bounds=True):
+        """
+        Extracts the relevant (meta)data from a score in the archive
+
+        Parameters
+        ----------
+        extractor : DataExtractor
+            The data extractor
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+        extension : str, optional
+            The extension of the score format; '.txt', '.mu2' or '.xml'
+            (the default is '.txt')
+        mbid : str, optional
+            The MBID relevant to the SymbTr score (the default is None)
+        use_segment_bounds : bool, optional
+            True to use the segment boundaries in the .autoSeg member of
+            the score, if it exists, False otherwise. The boundaries are
+            only used for the SymbTr-txt scores, since the note indices
+            refer to the SymbTr-txt scores (the default is True)
+
+        Returns
+        ----------
+        dict
+            A dictionary storing all the relevant (meta)data
+        bool
+            True if the information bout the score is all valid/consistent,
+            False otherwise
+        """
+        segment_bounds = (self.read_segment_bounds(symbtr_name)
+                          if use_segment_bounds and extension == '.txt'
+                          else None)
+
+        with self.open_member(symbtr_name, extension) as f:
+            return extractor.extract(
+                f, symbtr_name=symbtr_name, mbid=mbid,
+                segment_note_bound_idx=segment_bounds)
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # the opened archive cannot be pickled; it is reopened lazily
+        state = self.__dict__.copy()
+        state['_archive'] = None
+        return state
+
+    def __contains__(self, symbtr_name):
+        return symbtr_name in self._index
+
+    def __len__(self):
+        return len(self._index)
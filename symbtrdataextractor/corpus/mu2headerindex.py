@@ -0,0 +1,270 @@
+import json
+import os
+from multiprocessing import Pool, cpu_count
+
+from ..diagnostics import Diagnostics
+from ..reader.mu2 import Mu2Reader
+
+
+def _read_header_entry(score_file):
+    # module-level function, so that it can be pickled to the worker
+    # processes. The issues are collected and returned to the parent
+    # process instead of being warned in the worker
+    with Diagnostics() as diagnostics:
+        try:
+            header, _, header_validity = \
+                Mu2Reader.read_header_with_validity(score_file)
+        except (IndexError, KeyError, ValueError) as err:  # broken header
+            Diagnostics.report(score_file, 'unreadable_header',
+                               u'{score!s}: The header cannot be read. '
+                               u'{error!s}', error=str(err))
+            return None, diagnostics
+
+    return Mu2HeaderIndex.header_to_entry(
+        header, Mu2Reader.get_symbtr_name_from_filepath(score_file),
+        score_file, header_validity), diagnostics
+
+
+class Mu2HeaderIndex(object):
+    """
+    Corpus-wide table of the metadata in the headers of the SymbTr-mu2
+    scores. Each entry (row) of the table stores the makam, form, usul,
+    tempo, composer and key signature of a score together with the
+    validity of its header, i.e. of the tempo unit, the makam, form and
+    usul attributes and the key signature, and of the header as a whole.
+    The headers are read in parallel and only the header rows of the scores
+    are parsed. The issues found in the headers are aggregated from the
+    worker processes into the diagnostics attribute of the index.
+    """
+    columns = ['symbtr_name', 'score_file', 'makam', 'makam_mu2_name',
+               'form', 'form_mu2_name', 'usul', 'usul_mu2_name', 'mertebe',
+               'number_of_pulses', 'tempo', 'composer', 'composer_mu2_name',
+               'key_signature', 'is_tempo_unit_valid', 'is_attribute_valid',
+               'is_key_signature_valid', 'is_header_valid']
+
+    def __init__(self, entries=None, diagnostics=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        entries : list[dict], optional
+            The entries of the index, where each entry is a dictionary with
+            the keys given in the columns attribute (the default is None,
+            which creates an empty index)
+        diagnostics : Diagnostics, optional
+            The issues found while reading the headers (the default is
+            None, which creates an empty collector)
+        """
+        self.entries = [] if entries is None else list(entries)
+        self.diagnostics = Diagnostics() if diagnostics is None \
+            else diagnostics
+
+    @classmethod
+    def from_folder(cls, score_folder, num_processes=None,
+                    print_warnings=False):
+        """
+        Builds the index from the SymbTr-mu2 scores in a folder and its
+        subfolders
+
+        Parameters
+        ----------
+        score_folder : str
+            The folder of the SymbTr-mu2 scores
+        num_processes : int, optional
+            The number of processes to read the headers. (the default is
+            None, which uses the number of the CPUs)
+        print_warnings : bool, optional
+            True to display the warnings about the inconsistencies in the
+            headers, False otherwise. The issues are always kept in the
+            diagnostics of the index, and they are also recorded to the
+            active Diagnostics collector of the caller, if any (the default
+            is False)
+
+        Returns
+        ----------
+        Mu2HeaderIndex
+            The index of the headers
+        """
+        score_files = []
+        for root, _, files in os.walk(score_folder):
+            score_files.extend(os.path.join(root, f) for f in files
+                               if os.path.splitext(f)[1] == '.mu2')
+
+        return cls.from_files(sorted(score_files),
+                              num_processes=num_processes,
+                              print_warnings=print_warnings)
+
+    @classmethod
+    def from_files(cls, score_files, num_processes=None,
+                   print_warnings=False):
+        """
+        Builds the index from the given SymbTr-mu2 scores
+
+        Parameters
+        ----------
+        score_files : list[str]
+            The paths of the SymbTr-mu2 scores. The filenames should obey
+            the SymbTr naming convention (makam--form--usul--name--composer)
+        num_processes : int, optional
+            The number of processes to read the headers. (the default is
+            None, which uses the number of the CPUs)
+        print_warnings : bool, optional
+            True to display the warnings about the inconsistencies in the
+            headers, False otherwise. The issues are always kept in the
+            diagnostics of the index, and they are also recorded to the
+            active Diagnostics collector of the caller, if any (the default
+            is False)
+
+        Returns
+        ----------
+        Mu2HeaderIndex
+            The index of the headers. The scores with unreadable headers
+            are skipped
+        """
+        score_files = list(score_files)
+
+        if num_processes == 1 or len(score_files) < 2:
+            results = [_read_header_entry(f) for f in score_files]
+        else:
+            if num_processes is None:
+                num_processes = cpu_count()
+
+            # send the files in chunks to reduce the inter-process
+            # communication
+            chunksize = max(1, len(score_files) // (4 * num_processes))
+            pool = Pool(processes=num_processes)
+            try:
+                results = pool.map(_read_header_entry, score_files,
+                                   chunksize=chunksize)
+            finally:
+                pool.close()
+                pool.join()
+
+        diagnostics = Diagnostics()
+        for _, worker_diagnostics in results:
+            diagnostics.extend(worker_diagnostics)
+        Diagnostics.replay(diagnostics, display=print_warnings)
+
+        return cls([e for e, _ in results if e is not None],
+                   diagnostics=diagnostics)
+
+    @staticmethod
+    def header_to_entry(header, symbtr_name, score_file, header_validity):
+        """
+        Converts a header read by Mu2Reader.read_header to an index entry
+
+        Parameters
+        ----------
+        header : dict
+            A dictionary storing the metadata extracted from the header
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer)
+        score_file : str
+            The path of the SymbTr score
+        header_validity : dict
+            The validity of the parts of the header, as returned by
+            Mu2Reader.read_header_with_validity
+
+        Returns
+        ----------
+        dict
+            The index entry
+        """
+        makam = header.get('makam', {})
+        form = header.get('form', {})
+        usul = header.get('usul', {})
+        composer = header.get('composer', {})
+
+        return {'symbtr_name': symbtr_name,
+                'score_file': score_file,
+                'makam': makam.get('symbtr_slug'),
+                'makam_mu2_name': makam.get('mu2_name'),
+                'form': form.get('symbtr_slug'),
+                'form_mu2_name': form.get('mu2_name'),
+                'usul': usul.get('symbtr_slug'),
+                'usul_mu2_name': usul.get('mu2_name'),
+                'mertebe': usul.get('mertebe'),
+                'number_of_pulses': usul.get('number_of_pulses'),
+                'tempo': header.get('tempo', {}).get('value'),
+                'composer': composer.get('symbtr_slug'),
+                'composer_mu2_name': composer.get('mu2_name'),
+                'key_signature': header.get('key_signature'),
+                'is_tempo_unit_valid': header_validity['tempo_unit'],
+                'is_attribute_valid': header_validity['attributes'],
+                'is_key_signature_valid': header_validity['key_signature'],
+                'is_header_valid': all(header_validity.values())}
+
+    def filter(self, **kwargs):
+        """
+        Returns the entries matching all the given column values, e.g.
+        index.filter(usul='aksak', mertebe=8)
+
+        Returns
+        ----------
+        list[dict]
+            The matching entries
+        """
+        for key in kwargs.keys():
+            if key not in self.columns:
+                raise KeyError(u'{0!s} is not a column of the '
+                               u'index'.format(key))
+
+        return [e for e in self.entries
+                if all(e[key] == val for key, val in kwargs.items())]
+
+    def get_column(self, column):
+        """
+        Returns the values of a column in the order of the entries
+
+        Parameters
+        ----------
+        column : str
+            The name of the column
+
+        Returns
+        ----------
+        list
+            The values of the column
+        """
+        return [e[column] for e in self.entries]
+
+    def save(self, index_file):
+        """
+        Saves the index to a JSON file
+
+        Parameters
+        ----------
+        index_file : str
+            The path of the JSON file
+        """
+        with open(index_file, 'w') as f:
+            json.dump({'columns': self.columns, 'entries': self.entries}, f,
+                      indent=2)
+
+    @classmethod
+    def load(cls, index_file):
+        """
+        Loads an index saved by the save method
+
+        Parameters
+        ----------
+        index_file : str
+            The path of the JSON file
+
+        Returns
+        ----------
+        Mu2HeaderIndex
+            The loaded index
+        """
+        with open(index_file, 'r') as f:
+            saved = json.load(f)
+
+        return cls(saved['entries'])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
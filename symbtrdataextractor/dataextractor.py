@@ -1,12 +1,18 @@
 import os
+from io import BytesIO
 
+from .columnarscore import ColumnarScore
 from .metadata.metadataextractor import MetadataExtractor
 from .reader.txt import TxtReader
 from .reader.musicxml import MusicXMLReader
 from .reader.mu2 import Mu2Reader
+from .reader.scorecache import ScoreCache
+from .reader.symbtr import SymbTrReader
 from .rhythmicfeature import RhythmicFeatureExtractor
+from .scoreindex import ScoreIndex
 from .section import SectionExtractor
 from .segment import SegmentExtractor
+from .validation import ValidationLevel
 from .datamerger import DataMerger
 
 
@@ -25,14 +31,16 @@ class DataExtractor(DataMerger):
         annotations and user provided segmentations, and apply semiotic labels
         * Query relevant metadata from MusicBrainz (if the MBID is supplied)
 
-    Currently only the SymbTr-txt scores are supported. MusicXML and mu2
-    support can be added, if demanded.
+    The SymbTr-txt, SymbTr-mu2 and SymbTr-MusicXML scores are supported. For
+    the SymbTr-mu2 scores, the metadata in the header is also added to the
+    output.
     """
 
     def __init__(self, lyrics_sim_thres=0.7, melody_sim_thres=0.7,
                  save_structure_sim=True, extract_all_labels=False,
                  crop_consec_bounds=True, get_recording_rels=False,
-                 print_warnings=True):
+                 print_warnings=True, score_cache_dir=None, add_times=False,
+                 validation_level=ValidationLevel.STRICT, num_processes=1):
         """
         Class constructor
 
@@ -66,7 +74,36 @@ class DataExtractor(DataMerger):
             True to display warnings, False otherwise. Note that the errors
             and the inconsistencies in the scores will be always displayed
             (the default is True)
+        score_cache_dir : str, optional
+            The folder to cache the parsed SymbTr-txt scores. If given, the
+            scores are parsed once and loaded from the cache in the
+            consecutive calls of the extract method, as long as the score
+            file does not change (the default is None, which disables
+            caching)
+        add_times : bool, optional
+            True to add the start and end times (in seconds, computed from
+            the note durations) to the sections, segments, phrase
+            annotations and the rhythmic structure, False otherwise (the
+            default is False)
+        validation_level : str, optional
+            "off" to skip the validation of the scores and the extracted
+            sections and structure labels, e.g. for the already validated
+            corpus releases, "fast" to run the checks as array operations or
+            "strict" to run the exhaustive row-by-row checks (the default
+            is "strict")
+        num_processes : int, optional
+            The number of processes to compute the distances between the
+            sections and the segments, which dominate the extraction time of
+            the scores with many (automatic) segments. The process pools are
+            reused across the scores until close() is called (the default
+            is 1. None uses the number of the CPUs)
         """
+        self.add_times = add_times
+        self._validation_level = ValidationLevel.check(validation_level)
+
+        self._score_cache = (None if score_cache_dir is None
+                             else ScoreCache(score_cache_dir))
+
         self._metadata_extractor = MetadataExtractor(
             get_recording_rels=get_recording_rels)
 
@@ -75,23 +112,35 @@ class DataExtractor(DataMerger):
             melody_sim_thres=melody_sim_thres,
             save_structure_sim=save_structure_sim,
             extract_all_labels=extract_all_labels,
-            print_warnings=print_warnings)
+            print_warnings=print_warnings,
+            validation_level=validation_level, num_processes=num_processes)
 
         self._segment_extractor = SegmentExtractor(
             lyrics_sim_thres=lyrics_sim_thres,
             melody_sim_thres=melody_sim_thres,
             save_structure_sim=save_structure_sim,
-            crop_consecutive_bounds=crop_consec_bounds)
+            crop_consecutive_bounds=crop_consec_bounds,
+            validation_level=validation_level, num_processes=num_processes)
+
+    def close(self):
+        """
+        Closes the process pools used to compute the distance matrices
+        """
+        self._section_extractor.sectionLabeler.close()
+        self._segment_extractor.segmentLabeler.close()
 
     def extract(self, score_file, symbtr_name=None, mbid=None,
-                segment_note_bound_idx=None):
+                segment_note_bound_idx=None, score_format=None):
         """
         Extracts the relevant (meta)data from the SymbTr score.
 
         Parameters
         ----------
-        score_file : str
-            The path of the SymbTr score
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from, e.g. a member of an archive. The format of the
+            score is determined from the extension of the path (or the name
+            attribute of the file-like object)
         symbtr_name : str, optional
             The name of the score in SymbTr naming convention
             (makam--form--usul--name--composer). Needed if the filename does
@@ -118,6 +167,11 @@ class DataExtractor(DataMerger):
             scores, you can use the `makam-symbolic-phrase-segmentation
             <https://github.com/MTG/makam-symbolic-phrase-segmentation>`_
             package. (the default is None)
+        score_format : str, optional
+            The format of the score; "txt", "mu2" or "xml". Needed if the
+            format cannot be determined from the extension, e.g. for the
+            file-like objects without a name (the default is None, which
+            implies the format will be recovered from score_file)
 
         Returns
         ----------
@@ -134,56 +188,169 @@ class DataExtractor(DataMerger):
             outside [0,1]
         """
         if symbtr_name is None:
-            symbtr_name = os.path.splitext(os.path.basename(score_file))[0]
-
-        # get the metadata
-        data, is_metadata_valid = self._metadata_extractor.get_metadata(
-            symbtr_name, mbid=mbid)
+            symbtr_name = SymbTrReader.get_symbtr_name_from_filepath(
+                score_file)
 
         # get the extension to determine the SymbTr-score format
-        extension = os.path.splitext(score_file)[1]
+        if score_format is None:
+            extension = os.path.splitext(getattr(score_file, 'name',
+                                                 score_file))[1]
+        else:
+            extension = '.' + score_format.lstrip('.')
 
         # read the score
-        score, is_score_content_valid = self._read_score(
-            extension, score_file, symbtr_name)
+        score, is_score_content_valid, mu2_header = self._read_score(
+            extension, score_file, symbtr_name, score_cache=self._score_cache,
+            validation_level=self.validation_level)
+
+        return self.extract_from_score(
+            score, symbtr_name, mbid=mbid,
+            segment_note_bound_idx=segment_note_bound_idx,
+            is_score_valid=is_score_content_valid, mu2_header=mu2_header)
+
+    def extract_from_bytes(self, content, score_format, symbtr_name,
+                           mbid=None, segment_note_bound_idx=None):
+        """
+        Extracts the relevant (meta)data from the content of a SymbTr score,
+        e.g. a score stored in a database, without writing it to a file.
+
+        Parameters
+        ----------
+        content : str
+            The content of the SymbTr score file
+        score_format : str
+            The format of the score; "txt", "mu2" or "xml"
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer).
+        mbid : str, optional
+            The MBID relevant to the SymbTr score. See the extract method
+            for details (the default is None)
+        segment_note_bound_idx : list[ind], optional
+            Boundary indices obtained from user provided (automatic)
+            segmentation. See the extract method for details (the default
+            is None)
+
+        Returns
+        ----------
+        dict
+            A dictionary storing all the relevant (meta)data
+        bool
+            True if the information bout the score is all valid/consistent,
+            False otherwise
+        """
+        return self.extract(BytesIO(content), symbtr_name=symbtr_name,
+                            mbid=mbid,
+                            segment_note_bound_idx=segment_note_bound_idx,
+                            score_format=score_format)
+
+    def extract_from_score(self, score, symbtr_name, mbid=None,
+                           segment_note_bound_idx=None, is_score_valid=True,
+                           mu2_header=None):
+        """
+        Extracts the relevant (meta)data from an already parsed SymbTr
+        score, i.e. runs the metadata, section, segment and rhythmic
+        structure extraction on the score.
+
+        Parameters
+        ----------
+        score : dict or ColumnarScore
+            The score as returned by the readers
+        symbtr_name : str
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer).
+        mbid : str, optional
+            The MBID relevant to the SymbTr score. See the extract method
+            for details (the default is None)
+        segment_note_bound_idx : list[ind], optional
+            Boundary indices obtained from user provided (automatic)
+            segmentation. See the extract method for details (the default
+            is None)
+        is_score_valid : bool, optional
+            The validity of the score returned by the reader (the default
+            is True)
+        mu2_header : dict, optional
+            The metadata in the header of the SymbTr-mu2 score, as returned
+            by Mu2Reader.read_header, to be merged to the output (the
+            default is None)
+
+        Returns
+        ----------
+        dict
+            A dictionary storing all the relevant (meta)data
+        bool
+            True if the information bout the score is all valid/consistent,
+            False otherwise
+        """
+        if isinstance(score, ColumnarScore):
+            score = score.to_dict()
+
+        # get the metadata
+        data, is_metadata_valid = self._metadata_extractor.get_metadata(
+            symbtr_name, mbid=mbid)
 
         data['duration'] = {'value': sum(score['duration']) * 0.001,
                             'unit': 'second'}
         data['number_of_notes'] = len(score['duration'])
 
+        # the facts about the score shared by all the extractors
+        score_index = ScoreIndex(score)
+
         data['sections'], is_section_data_valid = self._section_extractor. \
-            from_txt_score(score, symbtr_name)
+            from_txt_score(score, symbtr_name, score_index=score_index)
 
         anno_phrases = self._segment_extractor.extract_phrases(
-            score, sections=data['sections'])
+            score, sections=data['sections'], score_index=score_index)
         segments = self._segment_extractor.extract_segments(
-            score, segment_note_bound_idx, sections=data['sections'])
+            score, segment_note_bound_idx, sections=data['sections'],
+            score_index=score_index)
 
         data['rhythmic_structure'] = \
-            RhythmicFeatureExtractor.extract_rhythmic_structure(score)
+            RhythmicFeatureExtractor.extract_rhythmic_structure(
+                score, score_index=score_index, symbtr_name=symbtr_name)
 
         data['segments'] = segments
         data['phrase_annotations'] = anno_phrases
 
+        if self.add_times:
+            time_index = score_index.time_index
+            for structures in [data['sections'], data['segments'],
+                               data['phrase_annotations']]:
+                time_index.add_times(structures)
+            time_index.add_times(
+                data['rhythmic_structure'], start_key='startNote',
+                end_key='endNote', start_time_key='startTime',
+                end_time_key='endTime')
+
+        if mu2_header is not None:  # the header is read in the same pass
+            data = self.merge(data, mu2_header,
+                              verbose=self.print_warnings)
+
         is_data_valid = all([is_metadata_valid, is_section_data_valid,
-                             is_score_content_valid])
+                             is_score_valid])
 
         return data, is_data_valid
 
     @staticmethod
-    def _read_score(extension, score_file, symbtr_name):
+    def _read_score(extension, score_file, symbtr_name, score_cache=None,
+                    validation_level=ValidationLevel.STRICT):
+        mu2_header = None
         if extension == ".txt":
             score, is_score_content_valid = TxtReader.read(
-                score_file, symbtr_name=symbtr_name)
+                score_file, symbtr_name=symbtr_name, score_cache=score_cache,
+                validation_level=validation_level)
         elif extension == ".xml":
             score, is_score_content_valid = MusicXMLReader.read(
-                score_file, symbtr_name=symbtr_name)
+                score_file, symbtr_name=symbtr_name,
+                validation_level=validation_level)
         elif extension == ".mu2":
-            score, is_score_content_valid = Mu2Reader.read(
-                score_file, symbtr_name=symbtr_name)
+            score, mu2_header, is_score_content_valid = \
+                Mu2Reader.read_with_header(score_file,
+                                           symbtr_name=symbtr_name,
+                                           validation_level=validation_level)
         else:
             raise IOError("Unknown format")
-        return score, is_score_content_valid
+        return score, is_score_content_valid, mu2_header
 
     # getter and setters
     @property
@@ -260,6 +427,21 @@ class DataExtractor(DataMerger):
         self._chk_bool(value)
         self._segment_extractor.crop_consecutive_bounds = value
 
+    @property
+    def validation_level(self):
+        return self._validation_level
+
+    @validation_level.setter
+    def validation_level(self, value):
+        self._validation_level = ValidationLevel.check(value)
+        for extractor, labeler in [
+                (self._section_extractor,
+                 self._section_extractor.sectionLabeler),
+                (self._segment_extractor,
+                 self._segment_extractor.segmentLabeler)]:
+            extractor.validation_level = value
+            labeler.validation_level = value
+
     @staticmethod
     def _chk_bool(value):
         if not isinstance(value, type(True)):
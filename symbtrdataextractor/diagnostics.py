@@ -0,0 +1,242 @@
+import threading
+import warnings
+
+
+class Issue(object):
+    """
+    A problem found in a score, e.g. an invalid row or an inconsistency in
+    the metadata. The message is formatted from the template and the values
+    only when it is asked for.
+    """
+
+    def __init__(self, score, category, template, row=None, is_info=False,
+                 **values):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        score : str
+            The name of the score in SymbTr naming convention
+        category : str
+            The category of the issue, e.g. "index_jump", "invalid_rest"
+        template : str
+            The template of the message. The score, the row and the values
+            are given to the template as keyword arguments
+        row : int, optional
+            The row of the score the issue is about (the default is None)
+        is_info : bool, optional
+            True if the issue is only an indication to the user, which is
+            printed instead of warned, False otherwise (the default is
+            False)
+        **values
+            The values relevant to the issue
+        """
+        self.score = score
+        self.category = category
+        self.template = template
+        self.row = row
+        self.is_info = is_info
+        self.values = values
+
+    @property
+    def message(self):
+        return self.template.format(score=self.score, row=self.row,
+                                    **self.values)
+
+    def to_dict(self):
+        return {'score': self.score, 'category': self.category,
+                'row': self.row, 'is_info': self.is_info,
+                'values': self.values, 'message': self.message}
+
+    def __repr__(self):
+        return 'Issue({0!r}, {1!r}, row={2!r})'.format(
+            self.score, self.category, self.row)
+
+
+class Diagnostics(object):
+    """
+    Collector of the issues found while reading the scores and extracting
+    the data. When a collector is active (i.e. inside a "with Diagnostics()
+    as diagnostics:" block), the issues reported in the same thread are
+    recorded in the collector instead of being warned or printed. Otherwise
+    the issues are displayed through the warnings module (or printed, if
+    they are only indications).
+
+    The collectors are picklable, hence they can be returned from the worker
+    processes and aggregated with the extend method.
+    """
+    _active = threading.local()
+
+    def __init__(self, issues=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        issues : list[Issue], optional
+            The initial issues (the default is None)
+        """
+        self.issues = [] if issues is None else list(issues)
+
+    @classmethod
+    def get_active(cls):
+        """
+        Returns the active collector of the current thread
+
+        Returns
+        ----------
+        Diagnostics or None
+            The innermost active collector, None if there is no active
+            collector
+        """
+        stack = getattr(cls._active, 'stack', None)
+        return stack[-1] if stack else None
+
+    @classmethod
+    def report(cls, score, category, template, row=None, is_info=False,
+               display=True, **values):
+        """
+        Reports an issue to the active collector or, if there is no active
+        collector, displays it
+
+        Parameters
+        ----------
+        score : str
+            The name of the score in SymbTr naming convention
+        category : str
+            The category of the issue, e.g. "index_jump", "invalid_rest"
+        template : str
+            The template of the message. The score, the row and the values
+            are given to the template as keyword arguments
+        row : int, optional
+            The row of the score the issue is about (the default is None)
+        is_info : bool, optional
+            True if the issue is only an indication to the user, which is
+            printed instead of warned, False otherwise (the default is
+            False)
+        display : bool, optional
+            False to skip displaying the issue, if there is no active
+            collector, e.g. when the warnings are turned off. The issue is
+            recorded to the active collector regardless (the default is
+            True)
+        **values
+            The values relevant to the issue
+        """
+        collector = cls.get_active()
+        if collector is not None:
+            collector.issues.append(Issue(score, category, template, row=row,
+                                          is_info=is_info, **values))
+        elif display:
+            message = Issue(score, category, template, row=row,
+                            **values).message
+            if is_info:
+                print(message)
+            else:
+                # encode to avoid the errors while writing the non-ascii
+                # characters to stderr
+                warnings.warn(message.encode('utf-8'), stacklevel=3)
+
+    @classmethod
+    def replay(cls, issues, display=True):
+        """
+        Reports the issues collected elsewhere, e.g. in the worker
+        processes, to the active collector of the current thread or, if
+        there is no active collector, displays them
+
+        Parameters
+        ----------
+        issues : Diagnostics or list[Issue]
+            The collector or the issues
+        display : bool, optional
+            False to skip displaying the issues, if there is no active
+            collector (the default is True)
+        """
+        for i in issues:
+            cls.report(i.score, i.category, i.template, row=i.row,
+                       is_info=i.is_info, display=display, **i.values)
+
+    def extend(self, other):
+        """
+        Adds the issues in another collector, e.g. returned from a worker
+        process
+
+        Parameters
+        ----------
+        other : Diagnostics or list[Issue]
+            The other collector or the issues
+        """
+        self.issues.extend(other)
+
+    def filter(self, score=None, category=None):
+        """
+        Returns the issues of a score and/or a category
+
+        Parameters
+        ----------
+        score : str, optional
+            The name of the score (the default is None, which returns the
+            issues of all the scores)
+        category : str, optional
+            The category of the issues (the default is None, which returns
+            the issues of all the categories)
+
+        Returns
+        ----------
+        list[Issue]
+            The issues
+        """
+        return [i for i in self.issues
+                if (score is None or i.score == score) and
+                (category is None or i.category == category)]
+
+    def count_by_category(self):
+        """
+        Returns the number of the issues per category
+
+        Returns
+        ----------
+        dict
+            The number of the issues, where each key is a category
+        """
+        counts = {}
+        for i in self.issues:
+            counts[i.category] = counts.get(i.category, 0) + 1
+        return counts
+
+    def format(self):
+        """
+        Returns the messages of the issues
+
+        Returns
+        ----------
+        list[str]
+            The messages
+        """
+        return [i.message for i in self.issues]
+
+    def to_dicts(self):
+        """
+        Returns the issues as dictionaries, e.g. to be saved as JSON
+
+        Returns
+        ----------
+        list[dict]
+            The issues
+        """
+        return [i.to_dict() for i in self.issues]
+
+    def __enter__(self):
+        if getattr(self._active, 'stack', None) is None:
+            self._active.stack = []
+        self._active.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._active.stack.remove(self)
+
+    def __iter__(self):
+        return iter(self.issues)
+
+    def __len__(self):
+        return len(self.issues)
@@ -1,10 +1,37 @@
 import Levenshtein
 import networkx as nx
-from numpy import matrix
+import numpy as np
+from fractions import gcd
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+
+
+def _get_dist_rows(args):
+    # module-level function, so that it can be pickled to the worker
+    # processes. Computes the distances of stream2[i] to stream1 for the
+    # given rows. For the self distance (symmetric) case, only the distances
+    # in the upper triangle (i.e. to stream1[i + 1:]) are computed
+    metric, stream1, stream2, rows, is_symmetric, max_dist, hists = args
+    dist_metric = getattr(GraphOperations, metric)
+
+    dist_rows = []
+    for i in rows:
+        start = i + 1 if is_symmetric else 0
+        if max_dist is None:
+            row = [dist_metric(a, stream2[i]) for a in stream1[start:]]
+        else:
+            # skip the pairs, which are proven to be further than max_dist
+            lower_bounds = GraphOperations.get_dist_lower_bounds(
+                hists[0][start:], hists[1][i])
+            row = [dist_metric(a, stream2[i]) if lb <= max_dist else 1.0
+                   for a, lb in zip(stream1[start:], lower_bounds)]
+        dist_rows.append((i, row))
+
+    return dist_rows
 
 
 class GraphOperations(object):
-    _metrics = ['norm_levenshtein']
+    _metrics = ['norm_levenshtein', 'norm_levenshtein_rle']
     """
 
     """
@@ -18,35 +45,331 @@ class GraphOperations(object):
             return 0
 
     @classmethod
-    def get_dist_matrix(cls, stream1, stream2=None, metric='norm_levenshtein'):
+    def norm_levenshtein_rle(cls, runs1, runs2):
+        """
+        Computes the normalized Levenshtein distance between two run-length
+        encoded sequences, which is equal to the distance between the
+        expanded sequences. Repeating each symbol of two sequences the same
+        number of times scales their edit distance and lengths by the same
+        factor, so the runs are shrunk by the greatest common divisor of
+        their lengths before expanding. The symbols can be any hashable
+        values, e.g. the integer (comma53) pitches of a melody
+
+        Parameters
+        ----------
+        runs1 : tuple[tuple]
+            The (symbol, length) runs of the first sequence
+        runs2 : tuple[tuple]
+            The (symbol, length) runs of the second sequence
+
+        Returns
+        ----------
+        float
+            The normalized distance
+        """
+        unit = reduce(gcd, (l for _, l in runs1 + runs2), 0)
+        if not unit:  # both sequences are empty
+            return 0
+
+        # encode the symbols as unicode characters for the Levenshtein
+        # distance. The distance only depends on the equality of the
+        # symbols, so the codes are only needed to be unique in the pair
+        codes = {}
+        for s, _ in runs1 + runs2:
+            if s not in codes:
+                codes[s] = unichr(len(codes))
+
+        return cls.norm_levenshtein(
+            u''.join(codes[s] * (l // unit) for s, l in runs1),
+            u''.join(codes[s] * (l // unit) for s, l in runs2))
+
+    @staticmethod
+    def get_char_histograms(stream, alphabet):
+        """
+        Counts the characters of each string in a stream
+
+        Parameters
+        ----------
+        stream : list[str]
+            The strings
+        alphabet : list[str]
+            The characters to count
+
+        Returns
+        ----------
+        numpy.ndarray
+            The counts, where the element (i, j) is the number of the
+            occurrences of alphabet[j] in stream[i]
+        """
+        return np.array([[s.count(c) for c in alphabet] for s in stream],
+                        dtype=np.int64).reshape(len(stream), len(alphabet))
+
+    @staticmethod
+    def get_run_histograms(stream, alphabet):
+        """
+        Counts the symbols of each run-length encoded sequence in a stream
+
+        Parameters
+        ----------
+        stream : list[tuple[tuple]]
+            The (symbol, length) runs of the sequences
+        alphabet : list
+            The symbols to count
+
+        Returns
+        ----------
+        numpy.ndarray
+            The counts, where the element (i, j) is the number of the
+            occurrences of alphabet[j] in the expanded stream[i]
+        """
+        char_idx = dict((c, j) for j, c in enumerate(alphabet))
+        hists = np.zeros((len(stream), len(alphabet)), dtype=np.int64)
+        for i, runs in enumerate(stream):
+            for c, l in runs:
+                hists[i, char_idx[c]] += l
+
+        return hists
+
+    @staticmethod
+    def get_dist_lower_bounds(hists, hist):
+        """
+        Computes lower bounds of the normalized Levenshtein distances of a
+        string to other strings from their character histograms. Each
+        deletion or insertion changes a single character count, and each
+        substitution decreases one and increases another, hence the edit
+        distance is at least the larger of the total surplus and the total
+        deficit of the counts. The bound is never smaller than the length
+        difference of the strings.
+
+        Parameters
+        ----------
+        hists : numpy.ndarray
+            The character histograms of the other strings (one per row)
+        hist : numpy.ndarray
+            The character histogram of the string
+
+        Returns
+        ----------
+        numpy.ndarray
+            The lower bounds of the normalized distances
+        """
+        diff = hists - hist
+        bounds = np.maximum(np.clip(diff, 0, None).sum(axis=1),
+                            np.clip(-diff, 0, None).sum(axis=1))
+
+        # the lengths of two empty strings are 0; their bound is also 0
+        max_lens = np.maximum(hists.sum(axis=1), hist.sum())
+        return bounds / np.maximum(max_lens, 1).astype(float)
+
+    @classmethod
+    def get_dist_matrix(cls, stream1, stream2=None, metric='norm_levenshtein',
+                        num_processes=1, use_threads=False, max_dist=None,
+                        pool=None):
+        """
+        Computes the distances between the elements of two streams. If
+        only a single stream is given, the self distance matrix is computed
+        from its upper triangle, since the distance metrics are symmetric
+
+        Parameters
+        ----------
+        stream1 : list[str] or list[tuple[tuple]]
+            The first stream; the strings, or the (symbol, length) runs
+            of the sequences for the "norm_levenshtein_rle" metric
+        stream2 : list[str] or list[tuple[tuple]], optional
+            The second stream (the default is None, which computes the self
+            distance matrix of stream1)
+        metric : str, optional
+            The distance metric; "norm_levenshtein" or
+            "norm_levenshtein_rle" (the default is "norm_levenshtein")
+        num_processes : int, optional
+            The number of processes (or threads) to compute the rows of the
+            matrix in parallel (the default is 1, which computes the matrix
+            in the current process. None uses the number of the CPUs)
+        use_threads : bool, optional
+            True to compute the rows in a thread pool instead of a process
+            pool. Ignored if the pool is given (the default is False)
+        max_dist : float, optional
+            The largest distance of interest, e.g. the distance threshold of
+            the cliques. If given, the distances of the pairs, which are
+            proven to be larger than max_dist by the lower bounds computed
+            from their character histograms, are not computed and set to 1
+            instead. The distances up to max_dist are exact (the default is
+            None, which computes all the distances exactly)
+        pool : multiprocessing.Pool or ThreadPool, optional
+            The pool to compute the rows in, e.g. to reuse the same pool in
+            consecutive calls. The rows are split into num_processes blocks
+            and the pool is not closed (the default is None, which creates
+            a pool for the call, if num_processes is not 1)
+
+        Returns
+        ----------
+        numpy.ndarray
+            The distance matrix, where the element (i, j) is the distance
+            between stream1[j] and stream2[i]
+        """
         if metric not in cls._metrics:
             raise ValueError("The distance metric can be: {0!s}".
                              format(', '.join(cls._metrics)))
-        dist_metric = getattr(GraphOperations, metric)
 
-        if stream2 is None:  # return self distance matrix
+        is_symmetric = stream2 is None
+        if is_symmetric:  # return self distance matrix
             stream2 = stream1
 
-        return matrix([[dist_metric(a, b) for a in stream1] for b in stream2])
+        stream1, stream2 = list(stream1), list(stream2)
+        if not stream2:
+            return np.zeros((0, len(stream1)))
+
+        # the repeated sections and segments produce identical strings. The
+        # distances are computed between the unique strings and expanded
+        # back at the end
+        stream1, inverse1 = cls.get_unique(stream1)
+        if is_symmetric:
+            stream2, inverse2 = stream1, inverse1
+        else:
+            stream2, inverse2 = cls.get_unique(stream2)
+
+        if num_processes is None:
+            num_processes = cpu_count()
+        num_processes = max(1, min(num_processes, len(stream2)))
+
+        hists = None
+        if max_dist is not None:
+            if metric == 'norm_levenshtein_rle':
+                alphabet = sorted(set(c for runs in stream1 + stream2
+                                      for c, _ in runs))
+                get_histograms = cls.get_run_histograms
+            else:
+                alphabet = sorted(set(u''.join(stream1 + stream2)))
+                get_histograms = cls.get_char_histograms
+
+            hist1 = get_histograms(stream1, alphabet)
+            hists = (hist1, hist1 if is_symmetric else
+                     get_histograms(stream2, alphabet))
+
+        # interleave the rows in the blocks, so the blocks have similar costs
+        # in the upper triangle
+        blocks = [(metric, stream1, stream2, range(b, len(stream2),
+                                                   num_processes),
+                   is_symmetric, max_dist, hists)
+                  for b in range(num_processes)]
+        if num_processes == 1:
+            dist_rows = [_get_dist_rows(blocks[0])]
+        elif pool is not None:
+            dist_rows = pool.map(_get_dist_rows, blocks)
+        else:
+            pool = (ThreadPool(processes=num_processes) if use_threads
+                    else Pool(processes=num_processes))
+            try:
+                dist_rows = pool.map(_get_dist_rows, blocks)
+            finally:
+                pool.close()
+                pool.join()
+
+        dists = np.zeros((len(stream2), len(stream1)))
+        for block in dist_rows:
+            for i, row in block:
+                if is_symmetric:
+                    dists[i, i + 1:] = row
+                else:
+                    dists[i, :] = row
+
+        if is_symmetric:  # mirror the upper triangle; the diagonal is 0
+            dists += dists.T
+
+        return dists[np.ix_(inverse2, inverse1)]
+
+    @staticmethod
+    def get_unique(stream):
+        """
+        Finds the unique elements of a stream in the order of their first
+        occurrences
+
+        Parameters
+        ----------
+        stream : list[str]
+            The stream
+
+        Returns
+        ----------
+        list[str]
+            The unique elements
+        numpy.ndarray
+            The positions of the elements of the stream in the unique
+            elements, i.e. stream[i] == unique[inverse[i]]
+        """
+        positions = {}
+        unique = []
+        inverse = np.empty(len(stream), dtype=np.int64)
+        for i, s in enumerate(stream):
+            try:
+                inverse[i] = positions[s]
+            except KeyError:
+                inverse[i] = positions[s] = len(unique)
+                unique.append(s)
+
+        return unique, inverse
 
     @classmethod
-    def get_cliques(cls, dists, sim_thres):
+    def get_cliques(cls, dists, sim_thres, inverse=None):
+        """
+        Finds the cliques of the similar and the (almost) exact nodes
+
+        Parameters
+        ----------
+        dists : numpy.ndarray
+            The self distance matrix of the unique elements of a stream
+        sim_thres : float[0, 1]
+            The similarity threshold of the similar nodes
+        inverse : numpy.ndarray, optional
+            The positions of the elements of the stream in the unique
+            elements, as returned by get_unique (the default is None, which
+            takes each row of the distance matrix as a separate element)
+
+        Returns
+        ----------
+        dict
+            The "exact" and the "similar" cliques as lists of the sets of
+            the positions in the stream
+        """
+        # the equal elements have the same distances to all the others, so
+        # they belong to the same maximal cliques. The cliques are found
+        # between the unique elements and expanded by the equality groups
+        if inverse is None:
+            inverse = np.arange(dists.shape[0])
+        groups = [[] for _ in range(dists.shape[0])]
+        for i, u in enumerate(inverse):
+            groups[u].append(i)
+
         # convert the similarity threshold to distance threshold
         dist_thres = 1 - sim_thres
 
         # cliques of similar nodes
-        g_similar = nx.from_numpy_matrix(dists <= dist_thres)
-        c_similar = nx.find_cliques(g_similar)
+        c_similar = cls._find_cliques(dists <= dist_thres, groups, inverse)
 
         # cliques of exact nodes
-        g_exact = nx.from_numpy_matrix(dists <= 0.001)  # inexact matching
-        c_exact = nx.find_cliques(g_exact)
+        c_exact = cls._find_cliques(dists <= 0.001,  # inexact matching
+                                    groups, inverse)
+
+        return {'exact': c_exact, 'similar': c_similar}
 
+    @classmethod
+    def _find_cliques(cls, adjacency, groups, inverse):
         # convert the cliques to list of sets
-        c_similar = cls._sort_cliques([set(s) for s in list(c_similar)])
-        c_exact = cls._sort_cliques([set(s) for s in list(c_exact)])
+        cliques = [set(i for u in c for i in groups[u])
+                   for c in nx.find_cliques(nx.from_numpy_matrix(adjacency))]
 
-        return {'exact': c_exact, 'similar': c_similar}
+        # the cliques are sorted by their minimum indices. The labels of the
+        # cliques with the same minimum depend on the order they are found
+        # in the graph, so they are kept in the order of the full graph
+        min_idx = [min(c) for c in cliques]
+        if len(inverse) > len(groups) and len(set(min_idx)) < len(min_idx):
+            full_graph = nx.from_numpy_matrix(
+                adjacency[np.ix_(inverse, inverse)])
+            full_order = dict((frozenset(c), k) for k, c in
+                              enumerate(nx.find_cliques(full_graph)))
+            cliques.sort(key=lambda c: full_order[frozenset(c)])
+
+        return cls._sort_cliques(cliques)
 
     @staticmethod
     def _sort_cliques(cliques):
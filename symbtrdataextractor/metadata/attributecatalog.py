@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+
+
+class AttributeCatalog(object):
+    """
+    The makam, form or usul data in makam_data, which is loaded once and
+    lazily. The attributes are indexed by their symbtr_slug, mu2_name
+    (including the mu2 names of the usul variants), dunya_name and mb_tag
+    so that they are looked up in constant time instead of scanning the
+    whole data.
+
+    The catalogs are shared through the get method. The attributes returned
+    by the catalog are not copies; they should not be modified.
+    """
+    attribute_types = ['makam', 'form', 'usul']
+    indexed_fields = ['symbtr_slug', 'mu2_name', 'dunya_name', 'mb_tag']
+
+    _catalogs = {}
+    _lock = threading.Lock()
+
+    def __init__(self, attr_type, attr_file=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        attr_type : str
+            The type of the attribute; 'makam', 'form' or 'usul'
+        attr_file : str, optional
+            The path of the JSON file storing the attributes (the default
+            is None, which reads the relevant file in makam_data)
+        """
+        if attr_file is None:
+            attr_file = os.path.join(os.path.dirname(os.path.abspath(
+                __file__)), '..', 'makam_data', attr_type + '.json')
+
+        self.attr_type = attr_type
+        self.attr_file = attr_file
+
+        self._data = None
+        self._indices = None
+        self._usul_variants = None
+
+    @classmethod
+    def get(cls, attr_type):
+        """
+        Returns the shared catalog of an attribute type
+
+        Parameters
+        ----------
+        attr_type : str
+            The type of the attribute; 'makam', 'form' or 'usul'
+
+        Returns
+        ----------
+        AttributeCatalog
+            The catalog
+        """
+        try:
+            return cls._catalogs[attr_type]
+        except KeyError:
+            with cls._lock:
+                return cls._catalogs.setdefault(attr_type, cls(attr_type))
+
+    @classmethod
+    def reload(cls, attr_type=None):
+        """
+        Drops the shared catalogs so that makam_data is read again on the
+        next access, e.g. after the JSON files are updated
+
+        Parameters
+        ----------
+        attr_type : str, optional
+            The type of the attribute to reload (the default is None, which
+            reloads all the attribute types)
+        """
+        with cls._lock:
+            if attr_type is None:
+                cls._catalogs.clear()
+            else:
+                cls._catalogs.pop(attr_type, None)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._load()
+        return self._data
+
+    def _load(self):
+        with open(self.attr_file, 'r') as f:
+            data = json.load(f)
+
+        # the first attribute with a value is kept, which is the attribute
+        # a linear scan over the data would return
+        indices = dict((field, {}) for field in self.indexed_fields)
+        usul_variants = {}
+        for attr_key, attr in data.iteritems():
+            for field in self.indexed_fields:
+                for val in self._get_field_values(attr, field):
+                    indices[field].setdefault(val, attr_key)
+
+            for var in attr.get('variants', []):
+                usul_variants.setdefault(var['mu2_name'], var)
+
+        self._indices = indices
+        self._usul_variants = usul_variants
+        self._data = data
+
+    @staticmethod
+    def _get_field_values(attr, field):
+        if field == 'mu2_name':
+            vals = [var['mu2_name'] for var in attr.get('variants', [])]
+            if 'mu2_name' in attr.keys():
+                vals.insert(0, attr['mu2_name'])
+            return vals
+
+        val = attr.get(field)
+        if val is None:
+            return []
+        elif isinstance(val, list):  # e.g. multiple mb_tags
+            return val
+        return [val]
+
+    def get_attribute(self, attr_key):
+        """
+        Returns an attribute by its key
+
+        Parameters
+        ----------
+        attr_key : str
+            The key of the attribute in makam_data
+
+        Returns
+        ----------
+        dict
+            The attribute
+
+        Raises
+        ------
+        KeyError
+            If the attribute does not exist
+        """
+        return self.data[attr_key]
+
+    def get_key(self, value, field='symbtr_slug'):
+        """
+        Returns the key of the attribute with the given field value
+
+        Parameters
+        ----------
+        value : str
+            The value of the field
+        field : str, optional
+            The field to search; 'symbtr_slug', 'mu2_name', 'dunya_name' or
+            'mb_tag' (the default is 'symbtr_slug')
+
+        Returns
+        ----------
+        str or None
+            The key of the attribute, None if there is no match
+        """
+        if self._indices is None:
+            self._load()
+
+        try:
+            return self._indices[field].get(value)
+        except KeyError:
+            raise KeyError(u'{0!s} is not indexed'.format(field))
+
+    def get_attribute_by(self, value, field='symbtr_slug'):
+        """
+        Returns the attribute with the given field value
+
+        Parameters
+        ----------
+        value : str
+            The value of the field
+        field : str, optional
+            The field to search; 'symbtr_slug', 'mu2_name', 'dunya_name' or
+            'mb_tag' (the default is 'symbtr_slug')
+
+        Returns
+        ----------
+        dict or None
+            The attribute, None if there is no match
+        """
+        attr_key = self.get_key(value, field=field)
+        return None if attr_key is None else self.data[attr_key]
+
+    def get_usul_variant(self, mu2_name):
+        """
+        Returns the usul variant with the given mu2 name
+
+        Parameters
+        ----------
+        mu2_name : str
+            The name of the usul variant in the SymbTr-mu2 scores
+
+        Returns
+        ----------
+        dict or None
+            The variant, None if there is no match
+        """
+        if self._usul_variants is None:
+            self._load()
+
+        return self._usul_variants.get(mu2_name)
+
+    def __contains__(self, attr_key):
+        return attr_key in self.data
+
+    def __len__(self):
+        return len(self.data)
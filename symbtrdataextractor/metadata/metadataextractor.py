@@ -1,6 +1,6 @@
-import os
-import json
-import warnings
+import copy
+from .attributecatalog import AttributeCatalog
+from ..diagnostics import Diagnostics
 from .mu2 import Mu2Metadata
 from .musicbrainz import MusicBrainzMetadata
 
@@ -73,10 +73,7 @@ class MetadataExtractor(object):
 
     @staticmethod
     def _get_attribute_key(attr_str, attr_type):
-        attr_dict = MetadataExtractor.get_attribute_dict(attr_type)
-        for attr_key, attr_val in attr_dict.iteritems():
-            if attr_val['symbtr_slug'] == attr_str:
-                return attr_key
+        return AttributeCatalog.get(attr_type).get_key(attr_str)
 
     @classmethod
     def _validate_attributes(cls, data, scorename, attrib_name):
@@ -104,24 +101,22 @@ class MetadataExtractor(object):
         has_slug = 'symbtr_slug' in score_attr.keys()
         if has_slug and not score_attr['symbtr_slug'] ==\
                 attrib_dict['symbtr_slug']:
-            warnings.warn(u'{0!s}, {1!s}: The slug does not match.'.
-                          format(scorename, score_attr['symbtr_slug']),
-                          stacklevel=2)
+            Diagnostics.report(scorename, 'slug_mismatch',
+                               u'{score!s}, {slug!s}: The slug does not '
+                               u'match.', slug=score_attr['symbtr_slug'])
             return False
 
         return True
 
     @staticmethod
     def get_attribute_dict(attrstr):
-        attrfile = os.path.join(os.path.dirname(
-            os.path.abspath(__file__)), '..', 'makam_data', attrstr + '.json')
-
-        return json.load(open(attrfile, 'r'))
+        # a copy, since the callers may modify the returned dictionary
+        return copy.deepcopy(AttributeCatalog.get(attrstr).data)
 
     @classmethod
     def validate_key_signature(cls, key_signature, makam_slug, symbtr_name):
-        attr_dict = MetadataExtractor.get_attribute_dict('makam')
-        key_sig_makam = attr_dict[makam_slug]['key_signature']
+        key_sig_makam = AttributeCatalog.get('makam').get_attribute(
+            makam_slug)['key_signature']
 
         # the number of accidentals should be the same
         is_key_sig_valid = len(key_signature) == len(key_sig_makam)
@@ -133,9 +128,11 @@ class MetadataExtractor(object):
                                 cls._compare_accidentals(k1, k2))
 
         if not is_key_sig_valid:
-            warnings.warn(u'{0!s}: Key signature is different! {1!s} -> {2!s}'.
-                          format(symbtr_name, ' '.join(key_signature),
-                                 ' '.join(key_sig_makam)), stacklevel=2)
+            Diagnostics.report(symbtr_name, 'key_signature_mismatch',
+                               u'{score!s}: Key signature is different! '
+                               u'{key_signature!s} -> {makam_key_signature!s}',
+                               key_signature=' '.join(key_signature),
+                               makam_key_signature=' '.join(key_sig_makam))
 
         return is_key_sig_valid
 
@@ -156,11 +153,6 @@ class MetadataExtractor(object):
 
     @staticmethod
     def _get_attr(slug, attr_name):
-        attr_dict = MetadataExtractor.get_attribute_dict(attr_name)
-
-        for attr in attr_dict.values():
-            if attr['symbtr_slug'] == slug:
-                return attr
+        attr = AttributeCatalog.get(attr_name).get_attribute_by(slug)
 
-        # no match
-        return {}
+        return {} if attr is None else attr  # empty if there is no match
@@ -1,4 +1,4 @@
-import warnings
+from ..diagnostics import Diagnostics
 
 
 class Mu2Metadata(object):
@@ -13,10 +13,7 @@ class Mu2Metadata(object):
 
                 if not mu2_name:  # no matching variant
                     is_attr_valid = False
-                    warn_str = u'{0!s}, {1!s}: The Mu2 attribute does not ' \
-                               u'match.'.format(scorename,
-                                                score_attrib['mu2_name'])
-                    warnings.warn(warn_str.encode('utf-8'), stacklevel=2)
+                    cls._report_mismatch(scorename, score_attrib['mu2_name'])
 
             except KeyError:  # makam, form
                 is_attr_valid = cls._validate_mu2_makam_form(
@@ -24,18 +21,21 @@ class Mu2Metadata(object):
 
         return is_attr_valid
 
-    @staticmethod
-    def _validate_mu2_makam_form(score_attrib, attrib_dict, scorename):
+    @classmethod
+    def _validate_mu2_makam_form(cls, score_attrib, attrib_dict, scorename):
         mu2_name = attrib_dict['mu2_name']
         if not score_attrib['mu2_name'] == mu2_name:
-            warn_str = u'{0!s}, {1!s}: The Mu2 attribute does not match.'.\
-                format(scorename, score_attrib['mu2_name'])
-
-            warnings.warn(warn_str.encode('utf-8'), stacklevel=2)
+            cls._report_mismatch(scorename, score_attrib['mu2_name'])
             return False
 
         return True
 
+    @staticmethod
+    def _report_mismatch(scorename, mu2_name):
+        Diagnostics.report(scorename, 'mu2_attribute_mismatch',
+                           u'{score!s}, {mu2_name!s}: The Mu2 attribute does '
+                           u'not match.', mu2_name=mu2_name)
+
     @staticmethod
     def _validate_mu2_usul(score_attrib, attrib_dict, scorename):
         mu2_name = ''
@@ -47,11 +47,11 @@ class Mu2Metadata(object):
                     # found variant
                     if not uv[v_key] == score_attrib[v_key]:
                         is_usul_valid = False
-                        warn_str = u'{0:s}, {1:s}: The {2:s} of the usul in ' \
-                                   u'the score does not ' \
-                                   u'match.'.format(scorename,
-                                                    uv['mu2_name'], v_key)
-                        warnings.warn(warn_str.encode('utf-8'), stacklevel=2)
+                        Diagnostics.report(
+                            scorename, 'usul_variant_mismatch',
+                            u'{score:s}, {mu2_name:s}: The {key:s} of the '
+                            u'usul in the score does not match.',
+                            mu2_name=uv['mu2_name'], key=v_key)
 
                     return is_usul_valid, mu2_name
 
@@ -3,6 +3,7 @@ import musicbrainzngs
 from urlparse import urlparse
 from makammusicbrainz.audiometadata import AudioMetadata
 from makammusicbrainz.workmetadata import WorkMetadata
+from ..diagnostics import Diagnostics
 
 
 class MusicBrainzMetadata(object):
@@ -76,8 +77,9 @@ class MusicBrainzMetadata(object):
             skip_makam_slug = ['12212212', '22222221', '223', '232223', '262',
                                '3223323', '3334', '14_4']
             if score_attrib['symbtr_slug'] in skip_makam_slug:
-                warnings.warn(u'{0:s}: The usul attribute is not stored in '
-                              u'MusicBrainz.'.format(scorename), stacklevel=2)
+                Diagnostics.report(scorename, 'mb_attribute_missing',
+                                   u'{score:s}: The usul attribute is not '
+                                   u'stored in MusicBrainz.')
             else:
                 if not score_attrib['mb_attribute'] == \
                         attrib_dict['dunya_name']:
@@ -85,16 +87,16 @@ class MusicBrainzMetadata(object):
                     # musicbrainz attributes
                     is_attribute_valid = False
                     if score_attrib['mb_attribute']:
-                        warn_str = u'{0:s}, {1:s}: The MusicBrainz ' \
-                                   u'attribute does not match.' \
-                                   u''.format(scorename,
-                                              score_attrib['mb_attribute'])
-
-                        warnings.warn(warn_str.encode('utf-8'), stacklevel=2)
+                        Diagnostics.report(
+                            scorename, 'mb_attribute_mismatch',
+                            u'{score:s}, {mb_attribute:s}: The MusicBrainz '
+                            u'attribute does not match.',
+                            mb_attribute=score_attrib['mb_attribute'])
                     else:
-                        warnings.warn(u'{0:s}: The MusicBrainz attribute does'
-                                      u' not exist.'.format(scorename),
-                                      stacklevel=2)
+                        Diagnostics.report(
+                            scorename, 'mb_attribute_missing',
+                            u'{score:s}: The MusicBrainz attribute does not '
+                            u'exist.')
         return is_attribute_valid
 
     @staticmethod
@@ -104,8 +106,8 @@ class MusicBrainzMetadata(object):
         if has_mb_tag and score_attrib['mb_tag'] not in attrib_dict['mb_tag']:
             is_attribute_valid = False
 
-            warn_str = u'{0!s}, {1!s}: The MusicBrainz tag does not match.'.\
-                format(scorename, score_attrib['mb_tag'])
-
-            warnings.warn(warn_str.encode('utf-8'), stacklevel=2)
+            Diagnostics.report(scorename, 'mb_tag_mismatch',
+                               u'{score!s}, {mb_tag!s}: The MusicBrainz tag '
+                               u'does not match.',
+                               mb_tag=score_attrib['mb_tag'])
         return is_attribute_valid
@@ -1,4 +1,6 @@
-import warnings
+from fractions import Fraction, gcd
+import numpy as np
+from .diagnostics import Diagnostics
 
 
 class OffsetProcessor(object):
@@ -8,34 +10,125 @@ class OffsetProcessor(object):
     def __init__(self, print_warnings=True):
         self.print_warnings = print_warnings
 
-    def find_measure_start_idx(self, offsets):
-        measure_start_idx = []
+    @staticmethod
+    def get_offset_ticks(score):
+        """
+        Computes the exact offsets of the notes in integer ticks from the
+        note values (the numerator and denumerator columns) and the usul
+        rows (code 51). The offsets are shifted as in the "offset" column,
+        i.e. each row stores the offset of its start. A measure has
+        "resolution" ticks, which is the least common multiple of the
+        denominators of the note values relative to the measure length, so
+        a note starts a measure if and only if its tick is divisible by the
+        resolution.
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a column
+
+        Returns
+        ----------
+        numpy.ndarray
+            The offsets of the rows in ticks
+        int
+            The number of ticks in a measure
+        """
+        measure_len = None
+        steps = []
+        for code, num, denum in zip(score['code'], score['numerator'],
+                                    score['denumerator']):
+            if code == 51:  # usul (change); the measure length changes
+                measure_len = (Fraction(int(num), int(denum))
+                               if num and denum else None)
+                steps.append(Fraction(0))
+            elif measure_len and denum:
+                steps.append(Fraction(int(num), int(denum)) / measure_len)
+            else:  # e.g. the grace notes or the non-metered (serbest) usul
+                steps.append(Fraction(0))
+
+        resolution = 1
+        for step in steps:
+            resolution = (resolution * step.denominator //
+                          gcd(resolution, step.denominator))
+
+        offset_ticks = np.zeros(len(steps), dtype=np.int64)
+        if len(steps) > 1:
+            offset_ticks[1:] = np.cumsum(
+                [int(step * resolution) for step in steps[:-1]])
+
+        return offset_ticks, resolution
+
+    def find_measure_start_idx(self, offsets, offset_ticks=None,
+                               resolution=None):
+        """
+        Finds the indices of the first notes in each measure
+
+        Parameters
+        ----------
+        offsets : list[float]
+            The (shifted) offsets of the score rows in measures
+        offset_ticks : numpy.ndarray, optional
+            The offsets of the score rows in ticks, as returned by
+            get_offset_ticks. If given, the measure starts are located
+            exactly; otherwise the float offsets are matched with a
+            tolerance of 0.001 (the default is None)
+        resolution : int, optional
+            The number of ticks in a measure. Required, if offset_ticks is
+            given (the default is None)
+
+        Returns
+        ----------
+        list[int]
+            The index of the first row in each measure
+        bool
+            True if all the measures start on the measure boundaries, False
+            otherwise
+        """
         is_measure_start_valid = True
 
-        tol = 0.001
-        for int_offset in range(0, int(max(offsets)) + 1):
-            idx = min(i for i, o in enumerate(offsets) if o > int_offset - tol)
-            measure_start_idx.append(idx)
+        if offset_ticks is None:
+            tol = 0.001
+            measure_offsets = np.arange(0, int(max(offsets)) + 1) - tol
+            if np.all(np.diff(offsets) >= 0):
+                # a single sorted search for all the measures
+                measure_start_idx = np.searchsorted(
+                    offsets, measure_offsets, side='right').tolist()
+            else:  # unsorted offsets, e.g. in a faulty score
+                measure_start_idx = [min(i for i, o in enumerate(offsets)
+                                         if o > mo) for mo in measure_offsets]
+        else:
+            measure_start_idx = np.searchsorted(
+                offset_ticks, np.arange(0, int(max(offset_ticks)) + 1,
+                                        resolution), side='left').tolist()
 
         is_measure_start_valid = self._validate_measure_start(
-            is_measure_start_valid, measure_start_idx, offsets)
+            is_measure_start_valid, measure_start_idx, offsets,
+            offset_ticks=offset_ticks, resolution=resolution)
 
         return measure_start_idx, is_measure_start_valid
 
     def _validate_measure_start(self, is_measure_start_valid,
-                                measure_start_idx, offsets):
+                                measure_start_idx, offsets,
+                                offset_ticks=None, resolution=None):
         # find the measures starts which does not coincide to an integer offset
-        noninteger_measure_starts = self._find_non_integer_measure_starts(
-            measure_start_idx, offsets)
+        if offset_ticks is None:
+            noninteger_measure_starts = self._find_non_integer_measure_starts(
+                measure_start_idx, offsets)
+        else:
+            noninteger_measure_starts = [
+                offsets[i] for i in measure_start_idx
+                if not self.is_measure_start_tick(offset_ticks[i],
+                                                  resolution)]
 
         # all measures should start on integer offsets
         if noninteger_measure_starts:
             is_measure_start_valid = False
-            if self.print_warnings:
-                warn_str = ', '.join(str(e) for e in noninteger_measure_starts)
-
-                warnings.warn(u"Some measures are skipped by the offsets: "
-                              u"{0!s}".format(warn_str), stacklevel=2)
+            Diagnostics.report(None, 'skipped_measures',
+                               u'Some measures are skipped by the offsets: '
+                               u'{offsets!s}', display=self.print_warnings,
+                               offsets=', '.join(
+                                   str(e) for e in noninteger_measure_starts))
 
         return is_measure_start_valid
 
@@ -56,8 +149,161 @@ class OffsetProcessor(object):
         return abs(offset - round(offset)) * 1000.0 < 1.0
 
     @staticmethod
-    def get_measure_offset_id(measure_offset, offsets, measure_start_idx):
-        measure_start_offsets = [offsets[m] for m in measure_start_idx]
-        # do inexact integer matching
-        dist = [abs(o - measure_offset) for o in measure_start_offsets]
-        return measure_start_idx[dist.index(min(dist))]
+    def is_measure_start_tick(offset_tick, resolution):
+        # exact counterpart of is_integer_offset for the offsets in ticks
+        return offset_tick % resolution == 0
+
+
+class MeasureIndex(object):
+    """
+    Index of the measures and the beats (pulses of the usul) of a SymbTr
+    score, built from the exact offsets in ticks. The measure and the beat
+    of each note and the first note of each measure and beat are computed
+    once with a sorted search, so that they can be looked up in constant
+    time.
+    """
+
+    def __init__(self, score):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a column
+        """
+        self.offset_ticks, self.resolution = \
+            OffsetProcessor.get_offset_ticks(score)
+        num_rows = len(self.offset_ticks)
+        res = self.resolution
+
+        # the number of pulses of the usul active in each row; 0 for the
+        # non-metered (serbest) usul
+        codes = np.asarray(score['code'])
+        usul_idx = np.flatnonzero(codes == 51)
+        usul_pulses = np.asarray(score['numerator'], dtype=np.int64)[usul_idx]
+        active_usul = np.searchsorted(usul_idx, np.arange(num_rows),
+                                      side='right') - 1
+        self._pulses = np.where(active_usul >= 0,
+                                usul_pulses[np.maximum(active_usul, 0)], 0)
+
+        # note -> measure & beat
+        self.note_measure = self.offset_ticks // res
+        self.note_beat = (self.offset_ticks % res) * self._pulses // res
+
+        # measure -> first note
+        self.num_measures = (int(self.offset_ticks.max()) // res + 1
+                             if num_rows else 0)
+        measure_ticks = np.arange(self.num_measures, dtype=np.int64) * res
+        self.measure_start_idx = np.searchsorted(
+            self.offset_ticks, measure_ticks, side='left')
+
+        # (measure, beat) -> first note. The beats of all the measures are
+        # flattened; beat_ptr[m] is the position of the first beat of the
+        # measure m
+        measure_pulses = np.maximum(self._pulses[np.minimum(
+            self.measure_start_idx, num_rows - 1)], 1) if num_rows else \
+            np.zeros(0, dtype=np.int64)
+        self._measure_pulses = measure_pulses
+        self._beat_ptr = np.concatenate(([0], np.cumsum(measure_pulses)))
+        beat_measure = np.repeat(np.arange(self.num_measures),
+                                 measure_pulses)
+        beat_in_measure = (np.arange(self._beat_ptr[-1]) -
+                           self._beat_ptr[beat_measure])
+        # the tick of the beat start, rounded up to the next tick
+        beat_ticks = (beat_measure * res -
+                      (-beat_in_measure * res) // measure_pulses[beat_measure])
+        self._beat_start_idx = np.searchsorted(self.offset_ticks, beat_ticks,
+                                               side='left')
+
+    def get_measure(self, note_idx):
+        """
+        Returns the measure of a note
+
+        Parameters
+        ----------
+        note_idx : int
+            The (python) index of the note
+
+        Returns
+        ----------
+        int
+            The measure of the note, starting from 0
+        """
+        return int(self.note_measure[note_idx])
+
+    def get_beat(self, note_idx):
+        """
+        Returns the beat of a note in its measure
+
+        Parameters
+        ----------
+        note_idx : int
+            The (python) index of the note
+
+        Returns
+        ----------
+        int
+            The beat of the note in its measure, starting from 0
+        """
+        return int(self.note_beat[note_idx])
+
+    def get_measure_start_idx(self, measure):
+        """
+        Returns the first note starting in or after the start of a measure
+
+        Parameters
+        ----------
+        measure : int
+            The measure, starting from 0
+
+        Returns
+        ----------
+        int
+            The (python) index of the note
+        """
+        return int(self.measure_start_idx[measure])
+
+    def get_beat_start_idx(self, measure, beat):
+        """
+        Returns the first note starting in or after the start of a beat
+
+        Parameters
+        ----------
+        measure : int
+            The measure, starting from 0
+        beat : int
+            The beat in the measure, starting from 0
+
+        Returns
+        ----------
+        int
+            The (python) index of the note
+
+        Raises
+        ------
+        IndexError
+            If the measure does not have the beat
+        """
+        if not 0 <= beat < self._measure_pulses[measure]:
+            raise IndexError(u'The measure {0:d} does not have the beat '
+                             u'{1:d}'.format(measure, beat))
+
+        return int(self._beat_start_idx[self._beat_ptr[measure] + beat])
+
+    def is_measure_start(self, note_idx):
+        """
+        Checks whether the note starts on a measure boundary
+
+        Parameters
+        ----------
+        note_idx : int
+            The (python) index of the note
+
+        Returns
+        ----------
+        bool
+            True if the note starts on a measure boundary, False otherwise
+        """
+        return OffsetProcessor.is_measure_start_tick(
+            self.offset_ticks[note_idx], self.resolution)
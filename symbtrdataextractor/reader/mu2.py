@@ -1,8 +1,14 @@
 import csv
-import warnings
+from fractions import Fraction
+from itertools import chain
 
 from symbtr import SymbTrReader
+from pitch import SymbTrPitch
+from symbtrdataextractor.diagnostics import Diagnostics
+from symbtrdataextractor.metadata.attributecatalog import AttributeCatalog
 from symbtrdataextractor.metadata.metadataextractor import MetadataExtractor
+from symbtrdataextractor.symbtrlabelregistry import SymbTrLabelRegistry
+from symbtrdataextractor.validation import ValidationLevel
 
 
 class Mu2Reader(SymbTrReader):
@@ -12,27 +18,106 @@ class Mu2Reader(SymbTrReader):
         """
         pass
 
+    # the columns of the note rows in the SymbTr-mu2 scores. Note that the
+    # first cells of the header row store the usul, not the column names
+    _code_col = 0
+    _note_col = 1
+    _numerator_col = 2
+    _denumerator_col = 3
+    _lns_col = 4
+    _bas_col = 5
+    _lyrics_col = 7
+    _offset_col = 9
+
+    # the rows with these codes do not exist in the SymbTr-txt scores
+    _skipped_codes = [14, 21]
+
     @classmethod
-    def read(cls, score_file, symbtr_name=None):
+    def read(cls, score_file, symbtr_name=None,
+             validation_level=ValidationLevel.STRICT):
         """
-        Reader method for the SymbTr-mu2 scores. This method is not
-        implemented yet.
+        Reader method for the SymbTr-mu2 scores
 
         Parameters
         ----------
-        score_file : str
-            The path of the SymbTr score
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
         symbtr_name : str, optional
             The name of the score in SymbTr naming convention
             (makam--form--usul--name--composer).
+        validation_level : str, optional
+            "off" to skip the validation of the score, "fast" to validate
+            the columns as arrays or "strict" to validate the score row by
+            row (the default is "strict")
         Returns
         ----------
-        NotImplemented
+        dict
+            A dictionary of the read SymbTr-mu2 score with the same keys as
+            the score read from the SymbTr-txt scores
+        bool
+            True if the read SymbTr-mu2 score and its header are valid,
+            False otherwise
+        """
+        score, header, is_score_valid = cls.read_with_header(
+            score_file, symbtr_name=symbtr_name,
+            validation_level=validation_level)
+
+        return score, is_score_valid
+
+    @classmethod
+    def read_with_header(cls, score_file, symbtr_name=None,
+                         validation_level=ValidationLevel.STRICT):
+        """
+        Reads the note rows and the metadata in the header of the SymbTr-mu2
+        scores in a single pass.
+
+        The SymbTr-mu2 scores do not store the pitch in commas, the note
+        names in AEU theory and the note durations in milliseconds. These
+        are computed from the note names and the tempo, respectively.
+        Note that the repetitions in the SymbTr-mu2 scores are not expanded.
+
+        Parameters
+        ----------
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
+        symbtr_name : str, optional
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer).
+        validation_level : str, optional
+            "off" to skip the validation of the score, "fast" to validate
+            the columns as arrays or "strict" to validate the score row by
+            row (the default is "strict")
+        Returns
+        ----------
+        dict
+            A dictionary of the read SymbTr-mu2 score with the same keys as
+            the score read from the SymbTr-txt scores
+        dict
+            A dictionary storing the metadata extracted from the header
+        bool
+            True if the read SymbTr-mu2 score and its header are valid,
+            False otherwise
         """
         if symbtr_name is None:
             symbtr_name = Mu2Reader.get_symbtr_name_from_filepath(score_file)
 
-        return NotImplemented
+        with cls._open_score(score_file) as f:
+            reader = csv.reader(f, delimiter='\t')
+
+            header, header_row, header_validity, tempo, first_row = \
+                cls._read_header_rows(reader, symbtr_name)
+
+            note_rows = [] if first_row is None else chain([first_row],
+                                                           reader)
+            score = cls._read_note_rows(note_rows, header, tempo)
+
+        is_score_valid = cls._validate(score, symbtr_name,
+                                       validation_level=validation_level)
+
+        return score, header, all(header_validity.values()) and \
+            is_score_valid
 
     @classmethod
     def read_header(cls, score_file, symbtr_name=None):
@@ -41,8 +126,9 @@ class Mu2Reader(SymbTrReader):
 
         Parameters
         ----------
-        score_file : str
-            The path of the SymbTr score
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
         symbtr_name : str, optional
             The name of the score in SymbTr naming convention
             (makam--form--usul--name--composer).
@@ -56,54 +142,96 @@ class Mu2Reader(SymbTrReader):
             True if the metadata in the mu2 header is valid/consistent,
             False otherwise
         """
+        header, header_row, header_validity = cls.read_header_with_validity(
+            score_file, symbtr_name=symbtr_name)
+
+        return header, header_row, all(header_validity.values())
+
+    @classmethod
+    def read_header_with_validity(cls, score_file, symbtr_name=None):
+        """
+        Reads the metadata in the header of the SymbTr-mu2 scores together
+        with the validity of each part of the header
+
+        Parameters
+        ----------
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
+        symbtr_name : str, optional
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer).
+        Returns
+        ----------
+        dict
+            A dictionary storing the metadata extracted from the header
+        list of str
+            The names of the columns in the mu2 file
+        dict
+            The validity of the tempo unit ("tempo_unit"), the makam, form
+            and usul attributes ("attributes") and the key signature
+            ("key_signature") in the header
+        """
         if symbtr_name is None:
             symbtr_name = Mu2Reader.get_symbtr_name_from_filepath(score_file)
 
+        with cls._open_score(score_file) as f:
+            reader = csv.reader(f, delimiter='\t')
+
+            header, header_row, header_validity, _, _ = \
+                cls._read_header_rows(reader, symbtr_name)
+
+        return header, header_row, header_validity
+
+    @classmethod
+    def _read_header_rows(cls, reader, symbtr_name):
         makam_slug = symbtr_name.split('--')[0]
 
-        with open(score_file, "rb") as f:
-            reader = csv.reader(f, delimiter='\t')
+        header_row = [unicode(cell, 'utf-8') for cell in next(reader,
+                                                              None)]
 
-            header_row = [unicode(cell, 'utf-8') for cell in next(reader,
-                                                                  None)]
-
-            header = dict()
-            is_tempo_unit_valid = True
-            is_key_sig_valid = True
-            for row_temp in reader:
-                row = [unicode(cell, 'utf-8') for cell in row_temp]
-                code = int(row[0])
-                if code == 50:
-                    is_key_sig_valid = Mu2Reader.read_makam_key_signature_row(
-                        header, is_key_sig_valid, makam_slug, row, symbtr_name)
-                elif code == 51:
-                    header['usul'] = {'mu2_name': row[7],
-                                      'mertebe': int(row[3]),
-                                      'number_of_pulses': int(row[2])}
-                elif code == 52:
-                    is_tempo_unit_valid = cls._read_tempo_row(
-                        row, symbtr_name, header, is_tempo_unit_valid)
-                elif code == 56:
-                    header['usul']['subdivision'] = {'mertebe': int(row[3]),
-                                                     'number_of_pulses':
-                                                         int(row[2])}
-                elif code == 57:
-                    header['form'] = {'mu2_name': row[7]}
-                elif code == 58:
-                    header['composer'] = {'mu2_name': row[7]}
-                elif code == 59:
-                    header['lyricist'] = {'mu2_name': row[7]}
-                elif code == 60:
-                    header['title'] = {'mu2_title': row[7]}
-                elif code == 62:
-                    header['genre'] = 'folk' if row[7] == 'E' else 'classical'
-                elif code == 63:
-                    header['notation'] = row[7]
-                elif code in range(50, 64):
-                    warnings.warn(u'Unparsed code: {0!s}'.
-                                  format(' '.join(row)), stacklevel=2)
-                else:  # end of header
-                    break
+        header = dict()
+        is_tempo_unit_valid = True
+        is_key_sig_valid = True
+        tempo = None
+        first_note_row = None
+        for row_temp in reader:
+            row = [unicode(cell, 'utf-8') for cell in row_temp]
+            code = int(row[0])
+            if code == 50:
+                is_key_sig_valid = Mu2Reader.read_makam_key_signature_row(
+                    header, is_key_sig_valid, makam_slug, row, symbtr_name)
+            elif code == 51:
+                header['usul'] = {'mu2_name': row[7],
+                                  'mertebe': int(row[3]),
+                                  'number_of_pulses': int(row[2])}
+            elif code == 52:
+                is_tempo_unit_valid = cls._read_tempo_row(
+                    row, symbtr_name, header, is_tempo_unit_valid)
+                tempo = cls._get_tempo(row)
+            elif code == 56:
+                header['usul']['subdivision'] = {'mertebe': int(row[3]),
+                                                 'number_of_pulses':
+                                                     int(row[2])}
+            elif code == 57:
+                header['form'] = {'mu2_name': row[7]}
+            elif code == 58:
+                header['composer'] = {'mu2_name': row[7]}
+            elif code == 59:
+                header['lyricist'] = {'mu2_name': row[7]}
+            elif code == 60:
+                header['title'] = {'mu2_title': row[7]}
+            elif code == 62:
+                header['genre'] = 'folk' if row[7] == 'E' else 'classical'
+            elif code == 63:
+                header['notation'] = row[7]
+            elif code in range(50, 64):
+                Diagnostics.report(symbtr_name, 'unparsed_code',
+                                   u'Unparsed code: {row_str!s}',
+                                   row_str=' '.join(row))
+            else:  # end of header
+                first_note_row = row_temp
+                break
 
         # get the metadata
         slugs = MetadataExtractor.get_slugs(symbtr_name)
@@ -117,10 +245,136 @@ class Mu2Reader(SymbTrReader):
         is_attr_meta_valid = MetadataExtractor.validate_makam_form_usul(
             header, symbtr_name)
 
-        is_header_valid = (is_tempo_unit_valid and is_attr_meta_valid and
-                           is_key_sig_valid)
+        header_validity = {'tempo_unit': is_tempo_unit_valid,
+                           'attributes': is_attr_meta_valid,
+                           'key_signature': is_key_sig_valid}
+
+        return header, header_row, header_validity, tempo, first_note_row
+
+    @classmethod
+    def _read_note_rows(cls, rows, header, tempo):
+        score = {'index': [], 'code': [], 'note53': [], 'noteAE': [],
+                 'comma53': [], 'commaAE': [], 'numerator': [],
+                 'denumerator': [], 'duration': [], 'lyrics': [],
+                 'offset': [], 'lns': [], 'bas': []}
+        usul_ids = cls._get_usul_internal_ids()
+        symbtr_labels = SymbTrLabelRegistry.get().all_labels
+
+        # the first row is the usul as in the SymbTr-txt scores
+        if 'usul' in header.keys():
+            cls._append_usul_row(score, header['usul']['mu2_name'],
+                                 header['usul']['number_of_pulses'],
+                                 header['usul']['mertebe'], 0., usul_ids)
+
+        for row in rows:
+            code = int(row[cls._code_col])
+            offset = cls._parse_offset(row, score)
+            if code == 51:  # usul change
+                cls._append_usul_row(
+                    score, row[cls._lyrics_col].decode('utf-8'),
+                    cls._parse_int(row[cls._numerator_col]),
+                    cls._parse_int(row[cls._denumerator_col]), offset,
+                    usul_ids)
+            elif code == 52:  # tempo change
+                tempo = cls._get_tempo(row)
+            elif code in range(50, 64) or code in cls._skipped_codes:
+                pass
+            else:
+                cls._append_note_row(score, row, code, offset, tempo,
+                                     symbtr_labels)
+
+        score['index'] = range(1, len(score['code']) + 1)
 
-        return header, header_row, is_header_valid
+        # shift offset such that the first note of each measure has an
+        # integer offset
+        score['offset'].insert(0, 0)
+        score['offset'] = score['offset'][:-1]
+
+        return score
+
+    @classmethod
+    def _append_note_row(cls, score, row, code, offset, tempo,
+                         symbtr_labels):
+        numerator = cls._parse_int(row[cls._numerator_col])
+        denumerator = cls._parse_int(row[cls._denumerator_col])
+
+        note = row[cls._note_col]
+        if note:
+            note53, note_ae, comma53, comma_ae = SymbTrPitch.from_note53(
+                note)
+        elif numerator > 0:  # rest
+            note53, note_ae, comma53, comma_ae = SymbTrPitch.rest
+        elif code == 9:  # the repetition markers are skipped, as the
+            # repetitions are not expanded (and they are not notes)
+            return
+        else:  # other control rows
+            note53, note_ae, comma53, comma_ae = '', '', 0, 0
+
+        score['code'].append(code)
+        score['note53'].append(note53)
+        score['noteAE'].append(note_ae)
+        score['comma53'].append(comma53)
+        score['commaAE'].append(comma_ae)
+        score['numerator'].append(numerator)
+        score['denumerator'].append(denumerator)
+        score['duration'].append(cls._compute_duration(
+            numerator, denumerator, tempo))
+        score['lns'].append(cls._parse_int(row[cls._lns_col]))
+        score['bas'].append(cls._parse_int(row[cls._bas_col]))
+        score['lyrics'].append(cls._parse_lyrics(row[cls._lyrics_col],
+                                                 symbtr_labels))
+        score['offset'].append(offset)
+
+    @staticmethod
+    def _parse_lyrics(cell, symbtr_labels):
+        lyrics = cell.decode('utf-8')
+
+        # the structure labels are followed by a space in the SymbTr-mu2
+        # scores, unlike the SymbTr-txt scores
+        if lyrics.rstrip(u' ') in symbtr_labels:
+            return lyrics.rstrip(u' ')
+        return lyrics
+
+    @staticmethod
+    def _append_usul_row(score, mu2_name, num_pulses, mertebe, offset,
+                         usul_ids):
+        score['code'].append(51)
+        score['note53'].append('')
+        score['noteAE'].append('')
+        score['comma53'].append(0)
+        score['commaAE'].append(0)
+        score['numerator'].append(num_pulses)
+        score['denumerator'].append(mertebe)
+        score['duration'].append(0)
+        score['lns'].append(usul_ids.get(mu2_name, 0))
+        score['bas'].append(0)
+        score['lyrics'].append(mu2_name)
+        score['offset'].append(offset)
+
+    @staticmethod
+    def _get_usul_internal_ids():
+        # the SymbTr-txt scores store the internal id of the usul in the
+        # LNS column of the usul rows
+        usul_dict = AttributeCatalog.get('usul').data
+        return dict((var['mu2_name'], var['symbtr_internal_id'])
+                    for usul in usul_dict.values()
+                    for var in usul['variants'])
+
+    @classmethod
+    def _parse_offset(cls, row, score):
+        try:
+            return float(row[cls._offset_col])
+        except (IndexError, ValueError):  # empty, e.g. in usul changes
+            return score['offset'][-1] if score['offset'] else 0.
+
+    @staticmethod
+    def _parse_int(cell):
+        return int(cell) if cell else 0
+
+    @staticmethod
+    def _get_tempo(row):
+        # bpm and the note value of a beat
+        return Fraction(row[4]), Fraction(int(row[2]), int(row[3]))
 
     @staticmethod
     def read_makam_key_signature_row(header, is_key_sig_valid, makam_slug, row,
@@ -148,8 +402,9 @@ class Mu2Reader(SymbTrReader):
 
         if not (int(row[3]) == header['usul']['mertebe'] or
                 header['usul']['mu2_name'] == '[Serbest]'):
-            warnings.warn(u'{0!s}: Mertebe and tempo unit are different!'.
-                          format(symbtr_name), stacklevel=2)
+            Diagnostics.report(symbtr_name, 'tempo_unit_mismatch',
+                               u'{score!s}: Mertebe and tempo unit are '
+                               u'different!')
             is_tempo_unit_valid = False
 
         return is_tempo_unit_valid
@@ -1,7 +1,22 @@
+from fractions import Fraction
+from xml.etree.cElementTree import iterparse
+
 from symbtr import SymbTrReader
+from pitch import SymbTrPitch
+from symbtrdataextractor.metadata.attributecatalog import AttributeCatalog
+from symbtrdataextractor.metadata.metadataextractor import MetadataExtractor
+from symbtrdataextractor.symbtrlabelregistry import SymbTrLabelRegistry
+from symbtrdataextractor.validation import ValidationLevel
 
 
 class MusicXMLReader(SymbTrReader):
+    # the accidentals of the Arel-Ezgi-Uzdilek theory in the SymbTr-MusicXML
+    # scores and their values in commas
+    _accidental_commas = {'quarter-flat': -1, 'slash-flat': -4, 'flat': -5,
+                          'double-slash-flat': -8, 'quarter-sharp': 1,
+                          'sharp': 4, 'slash-quarter-sharp': 5,
+                          'slash-sharp': 8, 'natural': 0}
+
     def __init__(self):
         """
         Class constructor
@@ -9,24 +24,257 @@ class MusicXMLReader(SymbTrReader):
         pass
 
     @classmethod
-    def read(cls, score_file, symbtr_name=None):
+    def read(cls, score_file, symbtr_name=None,
+             validation_level=ValidationLevel.STRICT):
         """
-        Reader method for the SymbTr-MusicXML scores. This method is not
-        implemented yet.
+        Reader method for the SymbTr-MusicXML scores. The score is parsed
+        incrementally and the processed elements are cleared, so the whole
+        document is never kept in the memory.
+
+        The SymbTr-MusicXML scores do not store the LNS and Bas columns of
+        the SymbTr-txt scores; these are set to 0. The durations in
+        milliseconds are computed from the tempo.
 
         Parameters
         ----------
-        score_file : str
-            The path of the SymbTr score
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
         symbtr_name : str, optional
             The name of the score in SymbTr naming convention
             (makam--form--usul--name--composer).
+        validation_level : str, optional
+            "off" to skip the validation of the score, "fast" to validate
+            the columns as arrays or "strict" to validate the score row by
+            row (the default is "strict")
         Returns
         ----------
-        NotImplemented
+        dict
+            A dictionary of the read SymbTr-MusicXML score with the same
+            keys as the score read from the SymbTr-txt scores
+        bool
+            True if the read SymbTr-MusicXML score is valid, False otherwise
         """
         if symbtr_name is None:
             symbtr_name = MusicXMLReader.get_symbtr_name_from_filepath(
                 score_file)
 
-        return NotImplemented
+        score = {'index': [], 'code': [], 'note53': [], 'noteAE': [],
+                 'comma53': [], 'commaAE': [], 'numerator': [],
+                 'denumerator': [], 'duration': [], 'lyrics': [],
+                 'offset': [], 'lns': [], 'bas': []}
+        state = {'divisions': 1, 'tempo': None, 'key_commas': {},
+                 'measure_commas': {}, 'measure_length': None,
+                 'offset': Fraction(0), 'num_parts': 0,
+                 'usul_variants': cls._get_usul_variants(symbtr_name),
+                 'symbtr_labels': SymbTrLabelRegistry.get().all_labels}
+
+        open_elems = []  # the elements from the root to the current element
+        for event, elem in iterparse(score_file, events=('start', 'end')):
+            if event == 'start':
+                open_elems.append(elem)
+            else:
+                open_elems.pop()
+
+            if event == 'start':
+                if elem.tag == 'part':
+                    state['num_parts'] += 1
+                elif elem.tag == 'measure':  # accidentals reset
+                    state['measure_commas'] = {}
+            elif state['num_parts'] > 1:  # SymbTr scores are monophonic
+                elem.clear()
+            elif elem.tag == 'attributes':
+                cls._read_attributes(elem, score, state)
+                elem.clear()
+            elif elem.tag == 'sound' and 'tempo' in elem.attrib.keys():
+                # the tempo is given in quarter notes per minute
+                state['tempo'] = (Fraction(elem.attrib['tempo']),
+                                  Fraction(1, 4))
+            elif elem.tag == 'note':
+                cls._read_note(elem, score, state)
+                elem.clear()
+            elif elem.tag == 'measure':
+                elem.clear()
+
+            # detach the processed measures and parts from their parents;
+            # clearing alone keeps the empty elements in the tree, which
+            # grows with the score length
+            if event == 'end' and elem.tag in ['measure', 'part'] and \
+                    open_elems:
+                open_elems[-1].remove(elem)
+
+        # the usul row should be in the start, even if the score does not
+        # have a time signature, e.g. in the non-metered scores
+        if not score['code'] or score['code'][0] != 51:
+            cls._insert_usul_row(score, 0, 0, state['usul_variants'], 0.0,
+                                 idx=0)
+
+        score['index'] = range(1, len(score['code']) + 1)
+
+        is_score_valid = cls._validate(score, symbtr_name,
+                                       validation_level=validation_level)
+
+        return score, is_score_valid
+
+    @classmethod
+    def _read_attributes(cls, elem, score, state):
+        divisions = elem.find('divisions')
+        if divisions is not None:
+            state['divisions'] = int(divisions.text)
+
+        key = elem.find('key')
+        if key is not None:
+            state['key_commas'] = cls._read_key(key)
+
+        time = elem.find('time')
+        if time is not None and time.find('beats') is not None:
+            num_pulses = int(time.find('beats').text)
+            mertebe = int(time.find('beat-type').text)
+            state['measure_length'] = Fraction(num_pulses, mertebe)
+
+            # time signature changes are usul changes
+            cls._insert_usul_row(score, num_pulses, mertebe,
+                                 state['usul_variants'],
+                                 float(state['offset']))
+
+    @classmethod
+    def _read_key(cls, key):
+        # the key signatures of the makams are given by the
+        # key-step, key-alter and key-accidental elements
+        key_commas = {}
+        step = None
+        for child in key:
+            if child.tag == 'key-step':
+                step = child.text
+            elif child.tag == 'key-alter' and step is not None:
+                key_commas.setdefault(step, cls._alter_to_commas(
+                    float(child.text)))
+            elif child.tag == 'key-accidental' and step is not None:
+                key_commas[step] = cls._accidental_commas.get(
+                    child.text, key_commas.get(step, 0))
+
+        return key_commas
+
+    @classmethod
+    def _read_note(cls, elem, score, state):
+        if elem.find('chord') is not None or elem.find('cue') is not None:
+            return  # SymbTr scores are monophonic
+
+        is_grace = elem.find('grace') is not None
+        if is_grace:  # grace notes do not have a duration
+            numerator, denumerator = 0, 0
+            code = 8
+        else:
+            note_value = Fraction(int(elem.find('duration').text),
+                                  4 * state['divisions'])
+            numerator = note_value.numerator
+            denumerator = note_value.denominator
+            code = 9
+
+        if elem.find('rest') is not None:
+            note53, note_ae, comma53, comma_ae = SymbTrPitch.rest
+        else:
+            note53, note_ae, comma53, comma_ae = cls._read_pitch(elem, state)
+
+        score['code'].append(code)
+        score['note53'].append(note53)
+        score['noteAE'].append(note_ae)
+        score['comma53'].append(comma53)
+        score['commaAE'].append(comma_ae)
+        score['numerator'].append(numerator)
+        score['denumerator'].append(denumerator)
+        score['duration'].append(cls._compute_duration(
+            numerator, denumerator, state['tempo']))
+        score['lns'].append(0)
+        score['bas'].append(0)
+        score['lyrics'].append(cls._read_lyrics(elem, state['symbtr_labels']))
+
+        # the offset of the note start in measures, i.e. the shifted offset
+        # in the SymbTr-txt scores
+        score['offset'].append(float(state['offset']))
+        if state['measure_length'] and numerator:
+            state['offset'] += (Fraction(numerator, denumerator) /
+                                state['measure_length'])
+
+    @classmethod
+    def _read_pitch(cls, elem, state):
+        pitch = elem.find('pitch')
+        step = pitch.find('step').text
+        octave = int(pitch.find('octave').text)
+        alter = float(pitch.findtext('alter', '0'))
+
+        accidental = elem.findtext('accidental')
+        if not alter:
+            commas = 0
+        elif accidental in cls._accidental_commas.keys():
+            commas = cls._accidental_commas[accidental]
+        elif (step, octave) in state['measure_commas'].keys():
+            commas = state['measure_commas'][(step, octave)]
+        elif step in state['key_commas'].keys():
+            commas = state['key_commas'][step]
+        else:
+            commas = cls._alter_to_commas(alter)
+
+        # the accidentals are valid until the end of the measure
+        if accidental is not None:
+            state['measure_commas'][(step, octave)] = commas
+
+        return SymbTrPitch.from_natural(step, octave, commas)
+
+    @staticmethod
+    def _alter_to_commas(alter):
+        # alter is given in semitones; a semitone is 53 / 12 commas
+        return int(round(alter * 53 / 12.0))
+
+    @staticmethod
+    def _read_lyrics(elem, symbtr_labels):
+        lyric = elem.find('lyric')
+        if lyric is None:
+            return u''
+
+        text = lyric.findtext('text', u'')
+        if not isinstance(text, unicode):
+            text = text.decode('utf-8')
+
+        # the structure labels are not followed by a space
+        if text.strip(u' ') in symbtr_labels:
+            return text.strip(u' ')
+
+        # the words end with a space and the lines with two spaces in the
+        # SymbTr-txt scores
+        if (lyric.findtext('syllabic') in ['single', 'end'] and
+                not text.endswith(u' ')):
+            text += u' '
+        if lyric.find('end-line') is not None and not text.endswith(u'  '):
+            text += u' '
+
+        return text
+
+    @staticmethod
+    def _get_usul_variants(symbtr_name):
+        try:
+            usul_slug = MetadataExtractor.get_slugs(symbtr_name)['usul']
+        except IndexError:  # the name does not obey the SymbTr convention
+            return []
+
+        usul = AttributeCatalog.get('usul').get_attribute_by(usul_slug)
+        return [] if usul is None else usul['variants']
+
+    @staticmethod
+    def _insert_usul_row(score, num_pulses, mertebe, usul_variants, offset,
+                         idx=None):
+        # find the usul variant with the same time signature
+        mu2_name, internal_id = u'', 0
+        for var in usul_variants:
+            if (var['num_pulses'], var['mertebe']) == (num_pulses, mertebe):
+                mu2_name = var['mu2_name']
+                internal_id = var['symbtr_internal_id']
+                break
+
+        idx = len(score['code']) if idx is None else idx
+        row = {'code': 51, 'note53': '', 'noteAE': '', 'comma53': 0,
+               'commaAE': 0, 'numerator': num_pulses,
+               'denumerator': mertebe, 'duration': 0, 'lns': internal_id,
+               'bas': 0, 'lyrics': mu2_name, 'offset': offset}
+        for key, val in row.items():
+            score[key].insert(idx, val)
@@ -0,0 +1,104 @@
+import re
+
+
+class SymbTrPitch(object):
+    """
+    Conversions between the pitch representations in the SymbTr scores, i.e.
+    the note names in 53-TET (e.g. Si4b5) and in Arel-Ezgi-Uzdilek (AEU)
+    theory (e.g. B4b5) and the pitch in 53-TET commas (e.g. 309)
+    """
+    # distance of the natural notes to the "Do" in the same octave in
+    # commas
+    _natural_commas = {'Do': 0, 'Re': 9, 'Mi': 18, 'Fa': 22, 'Sol': 31,
+                       'La': 40, 'Si': 49}
+    _solfege_to_letter = {'Do': 'C', 'Re': 'D', 'Mi': 'E', 'Fa': 'F',
+                          'Sol': 'G', 'La': 'A', 'Si': 'B'}
+    _letter_to_solfege = dict((v, k) for k, v in _solfege_to_letter.items())
+
+    # the accidentals allowed in AEU theory in commas
+    _aeu_accidentals = [0, 1, 4, 5, 8]
+
+    _note53_regex = re.compile(r'^(Do|Re|Mi|Fa|Sol|La|Si)(\d)(([#b])(\d+))?$')
+
+    # the rests are marked as "Es" in the SymbTr scores
+    rest = ('Es', 'Es', -1, -1)
+
+    @classmethod
+    def from_note53(cls, note53):
+        """
+        Computes the pitch representations from the 53-TET note name
+
+        Parameters
+        ----------
+        note53 : str
+            The note name in 53-TET, e.g. Mi5b2
+
+        Returns
+        ----------
+        tuple
+            The note name in 53-TET, the note name in AEU, the pitch in
+            53-TET commas and the pitch of the AEU note in 53-TET commas
+
+        Raises
+        ------
+        ValueError
+            If the note name is not a valid 53-TET note name
+        """
+        match = cls._note53_regex.match(note53)
+        if match is None:
+            raise ValueError(u'{0!s} is not a valid note name'.format(note53))
+
+        solfege, octave, _, acc_sign, acc_commas = match.groups()
+        commas = int(acc_commas) if acc_commas else 0
+        if acc_sign == 'b':
+            commas = -commas
+
+        return cls.from_natural(solfege, int(octave), commas)
+
+    @classmethod
+    def from_natural(cls, solfege, octave, commas):
+        """
+        Computes the pitch representations from the natural note, its
+        octave and the accidental in commas
+
+        Parameters
+        ----------
+        solfege : str
+            The solfege name of the natural note, e.g. Mi, or its letter,
+            e.g. E
+        octave : int
+            The octave of the note
+        commas : int
+            The accidental in commas; negative for flats and positive for
+            sharps
+
+        Returns
+        ----------
+        tuple
+            The note name in 53-TET, the note name in AEU, the pitch in
+            53-TET commas and the pitch of the AEU note in 53-TET commas
+        """
+        solfege = cls._letter_to_solfege.get(solfege, solfege)
+
+        natural_comma53 = 53 * (octave + 1) + cls._natural_commas[solfege]
+
+        # AEU theory only allows a subset of accidentals; take the closest
+        aeu_commas = min(cls._aeu_accidentals,
+                         key=lambda acc: abs(acc - abs(commas)))
+        if commas < 0:
+            aeu_commas = -aeu_commas
+
+        note53 = solfege + str(octave) + cls._accidental_str(commas)
+        note_ae = (cls._solfege_to_letter[solfege] + str(octave) +
+                   cls._accidental_str(aeu_commas))
+
+        return (note53, note_ae, natural_comma53 + commas,
+                natural_comma53 + aeu_commas)
+
+    @staticmethod
+    def _accidental_str(commas):
+        if commas > 0:
+            return '#' + str(commas)
+        elif commas < 0:
+            return 'b' + str(-commas)
+        return ''
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from ..columnarscore import ColumnarScore
+
+
+class ScoreCache(object):
+    """
+    On-disk cache of the parsed SymbTr scores. Each entry is stored as a
+    folder of raw numpy arrays (.npy), one per score column, which are
+    memory-mapped while loading. The entries are keyed by the hash of the
+    score file content and the version of the reader, so an entry is never
+    used, if the score file or the reader changes.
+    """
+    _meta_file = 'meta.json'
+
+    def __init__(self, cache_dir, mmap=True):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        cache_dir : str
+            The folder to store the cache entries
+        mmap : bool, optional
+            True to memory-map the numeric columns while loading, False to
+            read them to the memory (the default is True)
+        """
+        self.cache_dir = cache_dir
+        self.mmap = mmap
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    @staticmethod
+    def get_key(content, reader_name, reader_version):
+        """
+        Computes the cache key of a score
+
+        Parameters
+        ----------
+        content : str
+            The content of the score file
+        reader_name : str
+            The name of the reader class parsing the score
+        reader_version : int
+            The version of the reader. It should be incremented whenever
+            the parsed score would change
+
+        Returns
+        ----------
+        str
+            The cache key
+        """
+        return u'{0:s}-{1:s}-v{2:d}'.format(
+            hashlib.sha1(content).hexdigest(), reader_name, reader_version)
+
+    def load(self, key):
+        """
+        Loads a parsed score from the cache
+
+        Parameters
+        ----------
+        key : str
+            The cache key of the score
+
+        Returns
+        ----------
+        ColumnarScore or None
+            The parsed score, None if the key is not in the cache
+        bool or None
+            True if the parsed score is valid, False otherwise; None if the
+            key is not in the cache
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry_dir):
+            return None, None
+
+        try:
+            with open(os.path.join(entry_dir, self._meta_file), 'r') as f:
+                meta = json.load(f)
+
+            mmap_mode = 'r' if self.mmap else None
+            columns = {}
+            for col in meta['columns']:
+                col_file = os.path.join(entry_dir, col + '.npy')
+                if col in ColumnarScore.string_columns:
+                    columns[col] = np.load(col_file).tolist()
+                else:
+                    columns[col] = np.load(col_file, mmap_mode=mmap_mode)
+        except (IOError, ValueError, KeyError):  # broken entry
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None, None
+
+        return ColumnarScore(columns), meta['is_valid']
+
+    def save(self, key, score, is_valid):
+        """
+        Saves a parsed score to the cache
+
+        Parameters
+        ----------
+        key : str
+            The cache key of the score
+        score : ColumnarScore or dict
+            The parsed score
+        is_valid : bool
+            True if the parsed score is valid, False otherwise
+        """
+        # write to a temporary folder first and then move, so that the
+        # parallel processes never read a half-written entry
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            for col, val in score.items():
+                np.save(os.path.join(tmp_dir, col + '.npy'), np.array(val))
+
+            with open(os.path.join(tmp_dir, self._meta_file), 'w') as f:
+                json.dump({'columns': list(score.keys()),
+                           'is_valid': is_valid}, f)
+
+            os.rename(tmp_dir, os.path.join(self.cache_dir, key))
+        except (IOError, OSError):  # e.g. the entry is already saved by
+            # another process; the cache is best effort, skip saving
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def clear(self):
+        """
+        Removes all the entries in the cache
+        """
+        for entry in os.listdir(self.cache_dir):
+            shutil.rmtree(os.path.join(self.cache_dir, entry),
+                          ignore_errors=True)
@@ -1,11 +1,223 @@
 import os
+from contextlib import contextmanager
+from fractions import Fraction
+
+import numpy as np
+
+from ..diagnostics import Diagnostics
+from ..validation import ValidationLevel
 
 
 class SymbTrReader(object):
     @staticmethod
     def get_symbtr_name_from_filepath(score_file):
+        # the file-like objects, e.g. the archive members, store their path
+        # in the name attribute
+        score_file = getattr(score_file, 'name', score_file)
+        if not isinstance(score_file, basestring):
+            raise ValueError('The symbtr_name should be given, if the score '
+                             'is read from a file-like object without a '
+                             'name')
+
         return os.path.splitext(os.path.basename(score_file))[0]
 
     @staticmethod
     def is_symbtr_name(in_str):
-        return len('--'.split(in_str)) == 5
+        return len(in_str.split('--')) == 5
+
+    @staticmethod
+    @contextmanager
+    def _open_score(score_file):
+        # the score might be given as a path or as an opened file-like
+        # object, e.g. a member of an archive. The file-like objects are not
+        # closed, as they are owned by the caller
+        if hasattr(score_file, 'read'):
+            yield score_file
+        else:
+            with open(score_file, 'rb') as f:
+                yield f
+
+    @staticmethod
+    def _compute_duration(numerator, denumerator, tempo):
+        # tempo is the tuple of the bpm and the note value of a beat
+        if tempo is None or not denumerator:
+            return 0
+
+        bpm, beat_value = tempo
+        duration = (Fraction(60000) / bpm *
+                    Fraction(numerator, denumerator) / beat_value)
+
+        # round half to even as in the SymbTr-txt scores
+        rounded = duration.numerator // duration.denominator
+        remainder = duration - rounded
+        if remainder > Fraction(1, 2) or (remainder == Fraction(1, 2) and
+                                          rounded % 2 == 1):
+            rounded += 1
+
+        return int(rounded)
+
+    @classmethod
+    def _validate(cls, score, score_name,
+                  validation_level=ValidationLevel.STRICT):
+        """
+        Validation method for the SymbTr scores
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a row
+        score_name : str, optional
+            The name of the score in SymbTr naming convention
+            (makam--form--usul--name--composer).
+        validation_level : str, optional
+            "off" to skip the validation, "fast" to validate the columns
+            as arrays or "strict" to validate the score row by row (the
+            default is "strict")
+        Returns
+        ----------
+        bool
+            True if the read SymbTr score is valid, False otherwise
+        """
+        if ValidationLevel.check(validation_level) == ValidationLevel.OFF:
+            return True
+        elif validation_level == ValidationLevel.FAST:
+            return cls._validate_columns(score, score_name)
+
+        keys = ['index', 'code', 'note53', 'noteAE', 'comma53', 'commaAE',
+                'duration']
+        rows = (dict((k, score[k][ii]) for k in keys)
+                for ii in range(0, len(score['index'])))
+
+        return cls._validate_rows(rows, score_name)
+
+    @classmethod
+    def _validate_columns(cls, score, score_name):
+        # the checks in _validate_rows computed on the whole columns
+        start_usul_row = cls._starts_with_usul_row(
+            {'code': score['code'][0] if len(score['code']) else None},
+            score_name)
+
+        # note index
+        index = np.asarray(score['index'], dtype=np.int64)
+        prev_index = np.concatenate(([0], index[:-1]))
+        jump_idx = np.flatnonzero(index - prev_index != 1)
+        for ii in jump_idx:
+            cls._validate_index_jump(index[ii], prev_index[ii], True,
+                                     score_name)
+
+        # rests; the commaAE is numeric, so it is never equal to "Es" in
+        # _is_rest
+        code = np.asarray(score['code'])
+        comma53 = np.asarray(score['comma53'])
+        comma_ae = np.asarray(score['commaAE'])
+        note53 = np.asarray(score['note53'], dtype=object)
+        note_ae = np.asarray(score['noteAE'], dtype=object)
+
+        is_rest = (np.asarray(score['duration']) > 0) & (
+            (comma53 == -2) | (note53 == 'Es'))
+        is_invalid_rest = is_rest & (
+            (code != 9) | (comma53 != -1) | (comma_ae != -1) |
+            (note53 != 'Es') | (note_ae != 'Es'))
+        rest_idx = np.flatnonzero(is_invalid_rest)
+        for ii in rest_idx:
+            cls._report_invalid_rest(score_name, int(index[ii]))
+
+        return all([start_usul_row, not rest_idx.size, not jump_idx.size])
+
+    @classmethod
+    def _validate_rows(cls, rows, score_name, stop_at_first_error=False):
+        start_usul_row = None
+        is_rest_valid = True
+        is_duration_valid = True
+        is_index_valid = True
+        jump_ii = 0
+        for row in rows:
+            if start_usul_row is None:  # first row
+                start_usul_row = cls._starts_with_usul_row(row, score_name)
+
+            # note index
+            is_index_valid, jump_ii = cls._validate_index_jump(
+                row['index'], jump_ii, is_index_valid, score_name)
+
+            if row['duration'] > 0:  # note or rest
+                if cls._is_rest(row):  # check rest
+                    is_rest_valid = cls._validate_rest(
+                        row, is_rest_valid, score_name)
+
+            if stop_at_first_error and not all(
+                    [start_usul_row, is_rest_valid, is_index_valid]):
+                return False
+
+        if start_usul_row is None:  # empty score
+            start_usul_row = cls._starts_with_usul_row({'code': None},
+                                                       score_name)
+
+        # !! BELOW IS COMMENTED FOR CHECKING NOTE DURATIONS IN   !!
+        #         !! MS AGAINST THE SYMBOLIC NOTE DURATION, WHICH IS NOT !!
+        #         !! IMPLEMENTED YET !!
+        #         # note duration
+        #         dursym = (str(score['numerator'][ii]) + '_' +
+        #                   str(score['denumerator'][ii]))
+        #         if dursym in dur_dict.keys():
+        #             dur_dict[dursym] = list(set([score['duration'][ii]] +
+        #                                         dur_dict[dursym]))
+        #         else:
+        #             dur_dict[dursym] = [score['duration'][ii]]
+        #
+        # for key, val in dur_dict.items():
+        #    if not len(val)==1:
+        #        print("    " + scorename + ": " + key +
+        #              " note has multiple duration values; " +
+        #              ', '.join([str(v) for v in val]))
+        #        # USUL/TEMPO CHANGES ARE NOT HANDLED, DON'T ASSIGN FALSE YET
+        #        is_duration_valid = True
+
+        return all([start_usul_row, is_rest_valid, is_duration_valid,
+                    is_index_valid])
+
+    @staticmethod
+    def _validate_index_jump(score_idx, jump_ii, is_index_valid, score_name):
+        if score_idx - jump_ii != 1:
+            Diagnostics.report(score_name, 'index_jump',
+                               u'{score!s}: {row!s}, note index jump.',
+                               row=score_idx)
+            is_index_valid = False
+
+        jump_ii = score_idx  # we assign to the score_idx so the we can warn
+        # where the jumps are happening
+
+        return is_index_valid, jump_ii
+
+    @staticmethod
+    def _starts_with_usul_row(first_row, score_name):
+        # check usul row in the start
+        if not first_row['code'] == 51:
+            Diagnostics.report(score_name, 'missing_usul_row',
+                               u'{score!s} Missing the usul row in the start')
+            start_usul_row = False
+        else:
+            start_usul_row = True
+        return start_usul_row
+
+    @staticmethod
+    def _is_rest(row):
+        val_list = [row['comma53'], row['commaAE'], row['note53'],
+                    row['noteAE']]
+
+        return any(v1 == v2 for v1, v2 in zip(val_list, [-1. - 1, 'Es', 'Es']))
+
+    @classmethod
+    def _validate_rest(cls, row, is_rest_valid, score_name):
+        val_list = [row['code'], row['comma53'], row['commaAE'],
+                    row['note53'], row['noteAE']]
+
+        if any(v1 != v2 for v1, v2 in zip(val_list, [9, -1, -1, 'Es', 'Es'])):
+            is_rest_valid = False
+            cls._report_invalid_rest(score_name, row['index'])
+
+        return is_rest_valid
+
+    @staticmethod
+    def _report_invalid_rest(score_name, score_idx):
+        Diagnostics.report(score_name, 'invalid_rest',
+                           u'{score!s} {row!s}: Invalid Rest', row=score_idx)
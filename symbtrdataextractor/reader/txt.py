@@ -1,6 +1,10 @@
 import csv
-import warnings
+from io import BytesIO
+from itertools import islice
+import numpy as np
 from symbtr import SymbTrReader
+from ..columnarscore import ColumnarScore
+from ..validation import ValidationLevel
 
 
 class TxtReader(SymbTrReader):
@@ -10,21 +14,54 @@ class TxtReader(SymbTrReader):
         """
         pass
 
+    # the version of the parsed score saved in the ScoreCache; increment it
+    # whenever the parsing changes
+    cache_version = 1
+
+    # column names in the SymbTr-txt scores mapped to the score dict keys
+    _columns = [('Sira', 'index'), ('Kod', 'code'), ('Nota53', 'note53'),
+                ('NotaAE', 'noteAE'), ('Koma53', 'comma53'),
+                ('KomaAE', 'commaAE'), ('Pay', 'numerator'),
+                ('Payda', 'denumerator'), ('Ms', 'duration'), ('LNS', 'lns'),
+                ('Bas', 'bas'), ('Soz1', 'lyrics'), ('Offset', 'offset')]
+
     @classmethod
-    def read(cls, score_file, symbtr_name=None):
+    def read(cls, score_file, symbtr_name=None, columnar=False,
+             score_cache=None, vocabulary=None,
+             validation_level=ValidationLevel.STRICT):
         """
         Reader method for the SymbTr-txt scores
 
         Parameters
         ----------
-        score_file : str
-            The path of the SymbTr score
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
         symbtr_name : str, optional
             The name of the score in SymbTr naming convention
             (makam--form--usul--name--composer).
+        columnar : bool, optional
+            True to return the score as a ColumnarScore, where the numeric
+            columns are stored as typed numpy arrays, False to return a
+            dictionary of lists. (the default is False)
+        score_cache : ScoreCache, optional
+            The on-disk cache of the parsed scores. If given, the score is
+            loaded from the cache, if its content was parsed before;
+            otherwise the parsed score is saved to the cache. Note that the
+            validation warnings are not repeated for the cached scores.
+            (the default is None)
+        vocabulary : ScoreVocabulary, optional
+            The vocabulary to encode the string columns (note53, noteAE and
+            lyrics) of the ColumnarScore as integer codes. Only used, if
+            columnar is True. The same vocabulary can be shared by all the
+            scores in a corpus (the default is None)
+        validation_level : str, optional
+            "off" to skip the validation of the score, "fast" to validate
+            the columns as arrays or "strict" to validate the score row by
+            row (the default is "strict")
         Returns
         ----------
-        dict
+        dict or ColumnarScore
             A dictionary of the read SymbTr-txt score, where each key is the
             name of a column in the SymbTr-txt
         bool
@@ -33,149 +70,192 @@ class TxtReader(SymbTrReader):
         if symbtr_name is None:
             symbtr_name = TxtReader.get_symbtr_name_from_filepath(score_file)
 
-        with open(score_file, "rb") as f:
-            reader = csv.reader(f, delimiter='\t')
+        if score_cache is None:
+            with cls._open_score(score_file) as f:
+                score = cls._read_columns(f, columnar=columnar)
 
-            header = next(reader, None)
-
-            index_col = header.index('Sira')
-            code_col = header.index('Kod')
-            note53_col = header.index('Nota53')
-            noteae_col = header.index('NotaAE')
-            comma53_col = header.index('Koma53')
-            commaae_col = header.index('KomaAE')
-            numerator_col = header.index('Pay')
-            denumerator_col = header.index('Payda')
-            duration_col = header.index('Ms')
-            lns_col = header.index('LNS')
-            bas_col = header.index('Bas')
-            lyrics_col = header.index('Soz1')
-            offset_col = header.index('Offset')
-
-            score = {'index': [], 'code': [], 'note53': [], 'noteAE': [],
-                     'comma53': [], 'commaAE': [], 'numerator': [],
-                     'denumerator': [], 'duration': [], 'lyrics': [],
-                     'offset': [], 'lns': [], 'bas': []}
-            for row in reader:
-                score['index'].append(int(row[index_col]))
-                score['code'].append(int(row[code_col]))
-                score['note53'].append(row[note53_col])
-                score['noteAE'].append(row[noteae_col])
-                score['comma53'].append(int(row[comma53_col]))
-                score['commaAE'].append(int(row[commaae_col]))
-                score['numerator'].append(int(row[numerator_col]))
-                score['denumerator'].append(int(row[denumerator_col]))
-                score['duration'].append(int(row[duration_col]))
-                score['lns'].append(int(row[lns_col]))
-                score['bas'].append(int(row[bas_col]))
-                score['lyrics'].append(row[lyrics_col].decode('utf-8'))
-                score['offset'].append(float(row[offset_col]))
+            # validate
+            is_score_valid = cls._validate(score, symbtr_name,
+                                           validation_level=validation_level)
+        else:
+            score, is_score_valid = cls._read_cached(
+                score_file, symbtr_name, score_cache, validation_level)
 
-        # shift offset such that the first note of each measure has an
-        # integer offset
-        score['offset'].insert(0, 0)
-        score['offset'] = score['offset'][:-1]
+        if not columnar and isinstance(score, ColumnarScore):  # cached
+            score = score.to_dict()
+        elif columnar and vocabulary is not None:
+            score = score.encode(vocabulary)
+
+        return score, is_score_valid
+
+    @classmethod
+    def _read_cached(cls, score_file, symbtr_name, score_cache,
+                     validation_level):
+        with cls._open_score(score_file) as f:
+            content = f.read()
 
-        # validate
-        is_score_valid = cls._validate(score, symbtr_name)
+        cache_key = score_cache.get_key(content, cls.__name__,
+                                        cls.cache_version)
+        score, is_score_valid = score_cache.load(cache_key)
+        if score is None:  # not cached yet
+            score = cls._read_columns(BytesIO(content))
+
+            # the validity is cached, hence the score is validated even if
+            # the validation is turned off
+            is_score_valid = cls._validate(
+                score, symbtr_name, validation_level=(
+                    ValidationLevel.FAST
+                    if validation_level == ValidationLevel.OFF
+                    else validation_level))
+
+            score_cache.save(cache_key, score, is_score_valid)
+
+        if validation_level == ValidationLevel.OFF:
+            is_score_valid = True
 
         return score, is_score_valid
 
     @classmethod
-    def _validate(cls, score, score_name):
+    def iter_rows(cls, score_file, chunk_size=None):
         """
-        Validation method for the SymbTr-txt score
+        Generator reading the SymbTr-txt score row by row, i.e. without
+        loading the whole score into the memory
 
         Parameters
         ----------
-        score : dict
-            A dictionary of the read SymbTr-txt score, where each key is a row
-        score_name : str, optional
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
+        chunk_size : int, optional
+            The number of rows to yield at once. If given, the rows are
+            yielded in chunks as ColumnarScore objects with (at most)
+            chunk_size rows. (the default is None, which yields a dict per
+            row)
+        Yields
+        ----------
+        dict or ColumnarScore
+            A dictionary of the row, where the keys are the same with the
+            score dict returned by the read method, or a ColumnarScore with
+            the next chunk of rows. The offsets are shifted as in the read
+            method
+        """
+        with cls._open_score(score_file) as f:
+            reader = csv.reader(f, delimiter='\t')
+            col_idx = cls._get_column_indices(next(reader, None))
+            rows = (row for row in reader if row)
+
+            prev_offset = 0.
+            if chunk_size is None:
+                for row in rows:
+                    parsed_row = cls._parse_row(row, col_idx)
+                    prev_offset, parsed_row['offset'] = (
+                        parsed_row['offset'], prev_offset)
+                    yield parsed_row
+            else:
+                for chunk in iter(lambda: list(islice(rows, chunk_size)),
+                                  []):
+                    columns = cls._rows_to_columns(chunk, col_idx)
+                    prev_offset, columns['offset'] = (
+                        columns['offset'][-1],
+                        cls._shift_offset(columns['offset'], prev_offset))
+                    yield ColumnarScore(columns)
+
+    @classmethod
+    def validate_file(cls, score_file, symbtr_name=None,
+                      stop_at_first_error=False):
+        """
+        Validates the SymbTr-txt score while streaming its rows, without
+        loading the whole score into the memory
+
+        Parameters
+        ----------
+        score_file : str or file
+            The path of the SymbTr score or the file-like object to read
+            the score from
+        symbtr_name : str, optional
             The name of the score in SymbTr naming convention
             (makam--form--usul--name--composer).
+        stop_at_first_error : bool, optional
+            True to stop reading the score at the first invalid row, False
+            to validate (and warn about) all of the rows. (the default is
+            False)
         Returns
         ----------
         bool
-            True if the read SymbTr-txt score is valid, False otherwise
+            True if the SymbTr-txt score is valid, False otherwise
         """
-        start_usul_row = cls._starts_with_usul_row(score, score_name)
-
-        is_rest_valid = True
-        is_duration_valid = True
-        is_index_valid = True
-        jump_ii = 0
-        for ii in range(0, len(score['index'])):
-            # note index
-            is_index_valid, jump_ii = cls._validate_index_jump(
-                score['index'][ii], jump_ii, is_index_valid, score_name)
-
-            if score['duration'][ii] > 0:  # note or rest
-                if cls._is_rest(score, ii):  # check rest
-                    is_rest_valid = cls._validate_rest(
-                        score, ii, is_rest_valid, score_name)
-
-        # !! BELOW IS COMMENTED FOR CHECKING NOTE DURATIONS IN   !!
-        #         !! MS AGAINST THE SYMBOLIC NOTE DURATION, WHICH IS NOT !!
-        #         !! IMPLEMENTED YET !!
-        #         # note duration
-        #         dursym = (str(score['numerator'][ii]) + '_' +
-        #                   str(score['denumerator'][ii]))
-        #         if dursym in dur_dict.keys():
-        #             dur_dict[dursym] = list(set([score['duration'][ii]] +
-        #                                         dur_dict[dursym]))
-        #         else:
-        #             dur_dict[dursym] = [score['duration'][ii]]
-        #
-        # for key, val in dur_dict.items():
-        #    if not len(val)==1:
-        #        print("    " + scorename + ": " + key +
-        #              " note has multiple duration values; " +
-        #              ', '.join([str(v) for v in val]))
-        #        # USUL/TEMPO CHANGES ARE NOT HANDLED, DON'T ASSIGN FALSE YET
-        #        is_duration_valid = True
-
-        return all([start_usul_row, is_rest_valid, is_duration_valid,
-                    is_index_valid])
+        if symbtr_name is None:
+            symbtr_name = TxtReader.get_symbtr_name_from_filepath(score_file)
 
-    @staticmethod
-    def _validate_index_jump(score_idx, jump_ii, is_index_valid, score_name):
-        if score_idx - jump_ii != 1:
-            warnings.warn(u"{0!s}: {1!s}, note index jump.".format(
-                score_name, str(score_idx)), stacklevel=2)
-            is_index_valid = False
+        rows = cls.iter_rows(score_file)
+        try:
+            return cls._validate_rows(
+                rows, symbtr_name, stop_at_first_error=stop_at_first_error)
+        finally:
+            rows.close()  # close the file, if the validation stopped early
 
-        jump_ii = score_idx  # we assign to the score_idx so the we can warn
-        # where the jumps are happening
+    @classmethod
+    def _read_columns(cls, f, columnar=True):
+        reader = csv.reader(f, delimiter='\t')
 
-        return is_index_valid, jump_ii
+        col_idx = cls._get_column_indices(next(reader, None))
+        columns = cls._rows_to_columns([row for row in reader if row],
+                                       col_idx, columnar=columnar)
 
-    @staticmethod
-    def _starts_with_usul_row(score, score_name):
-        # check usul row in the start
-        if not score['code'][0] == 51:
-            warnings.warn(u'{0!s} Missing the usul row in the start'.format(
-                score_name), stacklevel=2)
-            start_usul_row = False
-        else:
-            start_usul_row = True
-        return start_usul_row
+        # shift offset such that the first note of each measure has an
+        # integer offset
+        columns['offset'] = cls._shift_offset(columns['offset'])
+
+        if columnar:
+            return ColumnarScore(columns)
+        return columns
+
+    @classmethod
+    def _get_column_indices(cls, header):
+        return dict((key, header.index(col_name))
+                    for col_name, key in cls._columns)
 
     @staticmethod
-    def _is_rest(score, ii):
-        val_list = [score['comma53'][ii], score['commaAE'][ii],
-                    score['note53'][ii], score['noteAE'][ii]]
+    def _rows_to_columns(rows, col_idx, columnar=True):
+        # transpose the rows to columns and convert each column at once. The
+        # numeric columns are converted to numpy arrays for the columnar
+        # scores and to lists for the score dicts
+        cells = zip(*rows) if rows else [()] * (max(col_idx.values()) + 1)
+        columns = {}
+        for key, idx in col_idx.items():
+            if key == 'lyrics':
+                columns[key] = [cell.decode('utf-8') for cell in cells[idx]]
+            elif key in ColumnarScore.string_columns:
+                columns[key] = list(cells[idx])
+            elif columnar:
+                columns[key] = np.array(cells[idx], dtype=str).astype(
+                    ColumnarScore.numeric_columns[key])
+            elif key == 'offset':
+                columns[key] = [float(cell) for cell in cells[idx]]
+            else:
+                columns[key] = [int(cell) for cell in cells[idx]]
 
-        return any(v1 == v2 for v1, v2 in zip(val_list, [-1. - 1, 'Es', 'Es']))
+        return columns
 
     @staticmethod
-    def _validate_rest(score, ii, is_rest_valid, score_name):
-        val_list = [score['code'][ii], score['comma53'][ii],
-                    score['commaAE'][ii], score['note53'][ii],
-                    score['noteAE'][ii]]
+    def _parse_row(row, col_idx):
+        parsed_row = {}
+        for key, idx in col_idx.items():
+            if key == 'lyrics':
+                parsed_row[key] = row[idx].decode('utf-8')
+            elif key in ColumnarScore.string_columns:
+                parsed_row[key] = row[idx]
+            elif key == 'offset':
+                parsed_row[key] = float(row[idx])
+            else:
+                parsed_row[key] = int(row[idx])
 
-        if any(v1 != v2 for v1, v2 in zip(val_list, [9, -1, -1, 'Es', 'Es'])):
-            is_rest_valid = False
-            warnings.warn(u'{0!s} {1!s}: Invalid Rest'.format(
-                score_name, str(score['index'][ii])), stacklevel=2)
+        return parsed_row
 
-        return is_rest_valid
+    @staticmethod
+    def _shift_offset(offset, first_offset=0):
+        # shift offset such that the first note of each measure has an
+        # integer offset
+        if isinstance(offset, list):
+            return [first_offset] + offset[:-1]
+        return np.concatenate(([first_offset], offset[:-1]))
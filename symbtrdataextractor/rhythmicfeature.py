@@ -1,5 +1,6 @@
-from .metadata.metadataextractor import MetadataExtractor
-import warnings
+from .metadata.attributecatalog import AttributeCatalog
+from .diagnostics import Diagnostics
+from .scoreindex import ScoreIndex
 
 
 class RhythmicFeatureExtractor(object):
@@ -7,10 +8,12 @@ class RhythmicFeatureExtractor(object):
 
     """
     @classmethod
-    def extract_rhythmic_structure(cls, score):
-        usul_bounds = [ii for ii, code in enumerate(score['code'])
-                       if code == 51]
-        usul_dict = MetadataExtractor.get_attribute_dict('usul')
+    def extract_rhythmic_structure(cls, score, score_index=None,
+                                   symbtr_name=None):
+        if score_index is None:
+            score_index = ScoreIndex(score)
+
+        usul_bounds = score_index.get_code_idx(51)
 
         rhythmic_structure = []
         for ii, ub in enumerate(usul_bounds):
@@ -21,7 +24,7 @@ class RhythmicFeatureExtractor(object):
                 end = score['index'][len(score['code']) - 1]
 
             usul_key = RhythmicFeatureExtractor.get_usul_symbtr_slug(
-                score, ub, usul_dict)
+                score, ub, symbtr_name=symbtr_name)
 
             usul = {'attribute_key': usul_key, 'mu2_name': score['lyrics'][ub],
                     'mertebe': score['denumerator'][ub],
@@ -38,18 +41,26 @@ class RhythmicFeatureExtractor(object):
         return rhythmic_structure
 
     @staticmethod
-    def get_usul_symbtr_slug(score, usul_bound, usul_dict):
+    def get_usul_symbtr_slug(score, usul_bound, usul_dict=None,
+                             symbtr_name=None):
         # search the usul slug
-        for usul_key, usul in usul_dict.iteritems():
-            for var in usul['variants']:
-                if score['lyrics'][usul_bound] == var['mu2_name']:
-                    return usul_key
+        if usul_dict is None:
+            usul_key = AttributeCatalog.get('usul').get_key(
+                score['lyrics'][usul_bound], field='mu2_name')
+            if usul_key is not None:
+                return usul_key
+        else:
+            for usul_key, usul in usul_dict.iteritems():
+                for var in usul['variants']:
+                    if score['lyrics'][usul_bound] == var['mu2_name']:
+                        return usul_key
 
         # Keep it as a warning, not assertion, so we can also process faulty
         # scores
-        warnstr = u'{0:s} in location {1:d} is missing in usul_dict'.format(
-            score['lyrics'][usul_bound], usul_bound + 1)
-        warnings.warn(warnstr.encode('utf-8'), stacklevel=2)
+        Diagnostics.report(symbtr_name, 'unknown_usul',
+                           u'{usul:s} in location {row:d} is missing in '
+                           u'usul_dict', row=usul_bound + 1,
+                           usul=score['lyrics'][usul_bound])
         return None
 
     @classmethod
@@ -0,0 +1,107 @@
+from bisect import bisect_left, bisect_right
+from .symbtrlabelregistry import SymbTrLabelRegistry
+
+
+class ScoreFragment(object):
+    """
+    View of the rows of a structure (section, segment etc.) in a SymbTr
+    score. The fragment only stores the index range and the rows with a
+    non-zero duration (i.e. the notes and the rests, which exclude the
+    annotation/control rows and the embellishments), hence the melody and
+    the lyrics of the fragment are read from the score columns without
+    copying the score.
+    """
+    _columns = {'durs': 'duration', 'nums': 'numerator',
+                'denums': 'denumerator', 'notes': 'comma53',
+                'lyrics': 'lyrics'}
+
+    def __init__(self, score, start_note, end_note, sounding_idx=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a column
+        start_note : int
+            The (python) index of the first row of the fragment
+        end_note : int
+            The (python) index of the last row of the fragment (inclusive)
+        sounding_idx : list[int], optional
+            The sorted (python) indices of the rows with a non-zero duration
+            in the score; see get_sounding_idx (the default is None, which
+            computes the indices from the score)
+        """
+        if sounding_idx is None:
+            sounding_idx = self.get_sounding_idx(score)
+
+        self.score = score
+        self.start_note = start_note
+        self.end_note = end_note
+
+        self.sounding_idx = sounding_idx[
+            bisect_left(sounding_idx, start_note):
+            bisect_right(sounding_idx, end_note)]
+
+    @staticmethod
+    def get_sounding_idx(score):
+        """
+        Returns the rows with a non-zero duration in a score, to be shared by
+        the fragments of the score
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a column
+
+        Returns
+        ----------
+        list[int]
+            The sorted (python) indices of the rows
+        """
+        return [i for i, d in enumerate(score['duration']) if d != 0]
+
+    def __getitem__(self, key):
+        # the fragment columns; 'durs', 'nums', 'denums', 'notes' and
+        # 'lyrics'
+        return self.score[self._columns[key]][self.start_note:
+                                              self.end_note + 1]
+
+    def get_sounding(self, key):
+        """
+        Returns the values of a fragment column in the rows with a non-zero
+        duration
+
+        Parameters
+        ----------
+        key : str
+            The fragment column; 'durs', 'nums', 'denums', 'notes' or
+            'lyrics'
+
+        Returns
+        ----------
+        list
+            The values
+        """
+        column = self.score[self._columns[key]]
+        return [column[i] for i in self.sounding_idx]
+
+    def get_true_lyrics(self):
+        """
+        Returns the lyrics of the fragment stripped of the labels and the
+        spaces
+
+        Returns
+        ----------
+        str
+            The concatenated syllables
+        """
+        lyrics = self.score['lyrics']
+        syllable = SymbTrLabelRegistry.SYLLABLE
+        classify = SymbTrLabelRegistry.get().classify
+        return u''.join([lyrics[i].replace(u' ', u'')
+                         for i in self.sounding_idx
+                         if classify(lyrics[i]) == syllable])
+
+    def __len__(self):
+        return self.end_note - self.start_note + 1
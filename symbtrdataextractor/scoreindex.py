@@ -0,0 +1,144 @@
+from bisect import bisect_left, bisect_right
+from numbers import Integral
+import numpy as np
+from .offset import MeasureIndex
+from .scoreprocessor import ScoreProcessor
+from .timeindex import TimeIndex
+
+
+class ScoreIndex(object):
+    """
+    Facts about a SymbTr score, which are computed once and shared by the
+    section, segment and rhythmic feature extractors, i.e. the index of the
+    first note, the positions of the real lyrics (syllables), the positions
+    of each code and the prefix sums of the note durations. The measure
+    and time indices are built on the first access.
+    """
+
+    def __init__(self, score):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a column
+        """
+        self._score = score
+        self._lyrics = score['lyrics']
+        self._measure_index = None
+        self._time_index = None
+        self.num_rows = len(score['code'])
+
+        self.first_note_idx = ScoreProcessor.get_first_note_index(score)
+
+        # the sorted positions of the lyrics which are not labels or
+        # embellishments
+        self.real_lyrics_idx = ScoreProcessor.get_true_lyrics_idx(
+            score['lyrics'], score['duration'])
+
+        # the sorted positions of the rows with each code
+        self._code_idx = {}
+        for i, code in enumerate(score['code']):
+            self._code_idx.setdefault(code, []).append(i)
+
+        # duration_cumsum[i] is the total duration of the first i rows in ms
+        self.duration_cumsum = np.concatenate(
+            ([0], np.cumsum(score['duration'], dtype=np.int64)))
+
+    @property
+    def measure_index(self):
+        if self._measure_index is None:
+            self._measure_index = MeasureIndex(self._score)
+        return self._measure_index
+
+    @property
+    def time_index(self):
+        if self._time_index is None:
+            self._time_index = TimeIndex(
+                self._score, duration_cumsum=self.duration_cumsum)
+        return self._time_index
+
+    def get_code_idx(self, codes):
+        """
+        Returns the positions of the rows with the given codes
+
+        Parameters
+        ----------
+        codes : int or list[int]
+            The code(s)
+
+        Returns
+        ----------
+        list[int]
+            The sorted (python) indices of the rows
+        """
+        if isinstance(codes, Integral):
+            return list(self._code_idx.get(codes, []))
+
+        return sorted(i for code in set(codes)
+                      for i in self._code_idx.get(code, []))
+
+    def get_code_idx_between(self, code, start_note, end_note):
+        """
+        Returns the positions of the rows with the given code in a range of
+        rows
+
+        Parameters
+        ----------
+        code : int
+            The code
+        start_note : int
+            The (python) index of the first row
+        end_note : int
+            The (python) index of the last row (inclusive)
+
+        Returns
+        ----------
+        list[int]
+            The sorted (python) indices of the rows in the range
+        """
+        code_idx = self._code_idx.get(code, [])
+        return code_idx[bisect_left(code_idx, start_note):
+                        bisect_right(code_idx, end_note)]
+
+    def get_real_lyrics_idx_between(self, start_note, end_note):
+        """
+        Returns the positions of the real lyrics in a range of rows
+
+        Parameters
+        ----------
+        start_note : int
+            The (python) index of the first row
+        end_note : int
+            The (python) index of the last row (inclusive)
+
+        Returns
+        ----------
+        list[int]
+            The sorted (python) indices of the real lyrics in the range
+        """
+        return self.real_lyrics_idx[
+            bisect_left(self.real_lyrics_idx, start_note):
+            bisect_right(self.real_lyrics_idx, end_note)]
+
+    def get_lyrics_between(self, start_note, end_note):
+        """
+        Returns the lyrics in a range of rows; the equivalent of
+        ScoreProcessor.get_lyrics_between without scanning the whole score
+
+        Parameters
+        ----------
+        start_note : int
+            The (python) index of the first row
+        end_note : int
+            The (python) index of the last row (inclusive)
+
+        Returns
+        ----------
+        str
+            The concatenated syllables in the range
+        """
+        return ''.join([self._lyrics[li] for li in
+                        self.get_real_lyrics_idx_between(start_note,
+                                                         end_note)])
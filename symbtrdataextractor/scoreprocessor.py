@@ -1,7 +1,4 @@
-import string
-import os
-import json
-from copy import deepcopy
+from .symbtrlabelregistry import SymbTrLabelRegistry
 
 
 class ScoreProcessor(object):
@@ -10,29 +7,22 @@ class ScoreProcessor(object):
     """
     @staticmethod
     def get_true_lyrics(score_fragments):
-        copy_fragments = deepcopy(score_fragments)
-
-        for sf in copy_fragments:
+        true_lyrics = []
+        for sf in score_fragments:
+            lyrics = sf['lyrics']
             real_lyrics_idx = ScoreProcessor.get_true_lyrics_idx(
-                sf['lyrics'], sf['durs'])
-            sf['lyrics'] = u''.join([sf['lyrics'][i].replace(u' ', u'')
-                                     for i in real_lyrics_idx])
+                lyrics, sf['durs'])
+            true_lyrics.append(u''.join([lyrics[i].replace(u' ', u'')
+                                         for i in real_lyrics_idx]))
 
-        return [sf['lyrics'] for sf in copy_fragments]
+        return true_lyrics
 
     @staticmethod
     def get_true_lyrics_idx(lyrics, dur):
-        all_labels = ScoreProcessor.get_all_symbtr_labels()
-
         # separate the actual lyrics from other information in the lyrics
-        # column
-        real_lyrics_idx = []
-        for i, l in enumerate(lyrics):
-            # annotation/control rows, embellishments (rows w dur = 0) are
-            # ignored
-            if not (l in all_labels or l in ['.', '', ' '] or dur[i] == 0):
-                real_lyrics_idx.append(i)
-        return real_lyrics_idx
+        # column. annotation/control rows, embellishments (rows w dur = 0)
+        # are ignored
+        return SymbTrLabelRegistry.get().get_real_lyrics_idx(lyrics, dur)
 
     @staticmethod
     def get_lyrics_between(score, start_note, end_note):
@@ -46,11 +36,9 @@ class ScoreProcessor(object):
 
     @staticmethod
     def get_all_symbtr_labels():
-        all_labels = [l for sub_list in
-                      ScoreProcessor.get_grouped_symbtr_labels().values()
-                      for l in sub_list]
-
-        return all_labels
+        return [l for sub_list in
+                ScoreProcessor.get_grouped_symbtr_labels().values()
+                for l in sub_list]
 
     @staticmethod
     def get_first_note_index(score):
@@ -60,26 +48,36 @@ class ScoreProcessor(object):
 
     @staticmethod
     def get_grouped_symbtr_labels():
-        symbtr_label_file = os.path.join(os.path.dirname(
-            os.path.abspath(__file__)), 'makam_data', 'symbTrLabels.json')
-        symbtr_label = json.load(open(symbtr_label_file, 'r'))
-
-        return symbtr_label
+        return SymbTrLabelRegistry.get().get_grouped_labels()
 
     @staticmethod
-    def synth_melody(score, max_denum):
-        melody = []
+    def get_melody_runs(score, max_denum):
+        """
+        Synthesizes the melody by sampling each note by the shortest note
+        as the unit and run-length encodes it, i.e. the consecutive samples
+        with the same note are merged into a single run. The notes shorter
+        than a sample are skipped
+
+        Parameters
+        ----------
+        score : dict
+            The (score fragment) dictionary with the notes, nums and denums
+            of the sounding events
+        max_denum : int
+            The denumerator of the sampling unit
+
+        Returns
+        ----------
+        tuple[tuple]
+            The (note, number of samples) runs of the melody
+        """
+        runs = []
         for i, note in enumerate(score['notes']):
-            num_samp = score['nums'][i] * max_denum / score['denums'][i]
-            melody += num_samp * [note]
-        return melody
-
-    @staticmethod
-    def mel2str(melody, unique_notes):
-        # map each element in the melody to a unique ascii letter and
-        # concatanate to a single string. This step converts the melody into
-        # the format required by Levenhstein distance
-
-        # define the ascii letters, use capital first
-        ascii_letters = string.ascii_uppercase + string.ascii_lowercase
-        return ''.join([ascii_letters[unique_notes.index(m)] for m in melody])
+            num_samp = int(score['nums'][i] * max_denum / score['denums'][i])
+            if num_samp < 1:
+                continue
+            elif runs and runs[-1][0] == note:
+                runs[-1][1] += num_samp
+            else:
+                runs.append([note, num_samp])
+        return tuple((note, num_samp) for note, num_samp in runs)
@@ -0,0 +1,142 @@
+import json
+import numpy as np
+
+
+class ScoreVocabulary(object):
+    """
+    Vocabulary of the strings in the SymbTr scores, i.e. the note names,
+    the SymbTr labels and the syllables in the lyrics. Each distinct string
+    is assigned an integer code, so that the string columns of the scores
+    can be stored as integer arrays. The vocabulary is meant to be shared
+    across the scores of a corpus: the codes are only appended, hence the
+    codes of the scores encoded earlier stay valid.
+    """
+
+    def __init__(self, tokens=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        tokens : list[str], optional
+            The initial tokens of the vocabulary, where the code of each
+            token is its position in the list (the default is None, which
+            creates an empty vocabulary)
+        """
+        self._tokens = []
+        self._codes = {}
+        for token in [] if tokens is None else tokens:
+            self.get_code(token)
+
+    @property
+    def tokens(self):
+        return list(self._tokens)
+
+    def get_code(self, token):
+        """
+        Returns the code of a token. The token is added to the vocabulary,
+        if it does not exist
+
+        Parameters
+        ----------
+        token : str
+            The token
+
+        Returns
+        ----------
+        int
+            The code of the token
+        """
+        try:
+            return self._codes[token]
+        except KeyError:
+            code = self._codes[token] = len(self._tokens)
+            self._tokens.append(token)
+            return code
+
+    def get_token(self, code):
+        """
+        Returns the token of a code
+
+        Parameters
+        ----------
+        code : int
+            The code
+
+        Returns
+        ----------
+        str
+            The token
+        """
+        return self._tokens[code]
+
+    def encode(self, tokens):
+        """
+        Encodes a sequence of tokens. The new tokens are added to the
+        vocabulary
+
+        Parameters
+        ----------
+        tokens : list[str]
+            The tokens
+
+        Returns
+        ----------
+        numpy.ndarray
+            The codes of the tokens as an int32 array
+        """
+        return np.fromiter((self.get_code(t) for t in tokens),
+                           dtype=np.int32, count=len(tokens))
+
+    def decode(self, codes):
+        """
+        Decodes a sequence of codes
+
+        Parameters
+        ----------
+        codes : numpy.ndarray or list[int]
+            The codes
+
+        Returns
+        ----------
+        list[str]
+            The tokens
+        """
+        tokens = self._tokens
+        return [tokens[c] for c in codes]
+
+    def save(self, vocabulary_file):
+        """
+        Saves the vocabulary to a JSON file
+
+        Parameters
+        ----------
+        vocabulary_file : str
+            The path of the JSON file
+        """
+        with open(vocabulary_file, 'w') as f:
+            json.dump(self._tokens, f)
+
+    @classmethod
+    def load(cls, vocabulary_file):
+        """
+        Loads a vocabulary saved by the save method
+
+        Parameters
+        ----------
+        vocabulary_file : str
+            The path of the JSON file
+
+        Returns
+        ----------
+        ScoreVocabulary
+            The loaded vocabulary
+        """
+        with open(vocabulary_file, 'r') as f:
+            return cls(json.load(f))
+
+    def __contains__(self, token):
+        return token in self._codes
+
+    def __len__(self):
+        return len(self._tokens)
@@ -1,10 +1,13 @@
-from math import floor
+from bisect import bisect_left, bisect_right, insort
 from fileoperations.slugify_tr import slugify_tr
-from . scoreprocessor import ScoreProcessor
+from . symbtrlabelregistry import SymbTrLabelRegistry
 from . structurelabeler import StructureLabeler
 from . offset import OffsetProcessor
+from . scoreindex import ScoreIndex
 from . graph import GraphOperations
-import warnings
+from . diagnostics import Diagnostics
+from . validation import ValidationLevel
+import numpy as np
 
 
 class SectionExtractor(object):
@@ -13,7 +16,8 @@ class SectionExtractor(object):
     """
     def __init__(self, lyrics_sim_thres=0.7, melody_sim_thres=0.7,
                  save_structure_sim=True, extract_all_labels=False,
-                 print_warnings=True):
+                 print_warnings=True, validation_level=ValidationLevel.STRICT,
+                 num_processes=1):
         """
         Class constructor
 
@@ -36,25 +40,44 @@ class SectionExtractor(object):
             True to display warnings, False otherwise. Note that the errors
             and the inconsistencies in the scores will be always displayed
             (the default is True)
+        validation_level : str, optional
+            "off" to skip the validation of the sections, "fast" to run the
+            checks as array operations or "strict" to run the exhaustive
+            checks (the default is "strict")
+        num_processes : int, optional
+            The number of processes to compute the distances between the
+            sections (the default is 1. None uses the number of the CPUs)
         """
         self.extract_all_labels = extract_all_labels
         self.lyrics_sim_thres = lyrics_sim_thres
         self.melody_sim_thres = melody_sim_thres
         self.print_warnings = print_warnings
         self.save_structure_sim = save_structure_sim
+        self.validation_level = ValidationLevel.check(validation_level)
+        self.num_processes = num_processes
 
         self.offsetProcessor = OffsetProcessor(
             print_warnings=self.print_warnings)
         self.sectionLabeler = StructureLabeler(
             lyrics_sim_thres=self.lyrics_sim_thres,
             melody_sim_thres=self.melody_sim_thres,
-            save_structure_sim=self.save_structure_sim)
+            save_structure_sim=self.save_structure_sim,
+            validation_level=self.validation_level,
+            num_processes=self.num_processes)
+
+    def from_txt_score(self, score, symbtrname, score_index=None):
+        if score_index is None:
+            score_index = ScoreIndex(score)
 
-    def from_txt_score(self, score, symbtrname):
         all_labels, struct_lbl = self._get_structure_labels()
 
+        # exact measure positions of the notes in integer ticks
+        measure_index = score_index.measure_index
+
         measure_start_idx, is_measure_start_valid = \
-            self.offsetProcessor.find_measure_start_idx(score['offset'])
+            self.offsetProcessor.find_measure_start_idx(
+                score['offset'], offset_ticks=measure_index.offset_ticks,
+                resolution=measure_index.resolution)
 
         # Check lyrics information
         if all(ll == '' for ll in score['lyrics']):
@@ -64,13 +87,14 @@ class SectionExtractor(object):
         else:
             sections = self._get_sections(score, struct_lbl)
             sections = self._locate_section_boundaries(
-                sections, score, measure_start_idx)
+                sections, score, measure_index, score_index, symbtrname)
 
             # the refine section names according to the lyrics, pitch and durs
             sections = self.sectionLabeler.label_structures(sections, score)
 
         sections_valid = self._validate_sections(
-            sections, score, set(all_labels) - set(struct_lbl), symbtrname)
+            sections, score, all_labels - struct_lbl, symbtrname,
+            measure_index, score_index)
 
         # map the python indices in start_note and end_note to SymbTr index
         StructureLabeler.python_idx_to_symbtr_idx(sections, score)
@@ -78,9 +102,10 @@ class SectionExtractor(object):
         return sections, all([sections_valid, is_measure_start_valid])
 
     def _get_structure_labels(self):
-        all_labels = ScoreProcessor.get_all_symbtr_labels()
+        label_registry = SymbTrLabelRegistry.get()
+        all_labels = label_registry.all_labels
         struct_lbl = all_labels if self.extract_all_labels else \
-            ScoreProcessor.get_grouped_symbtr_labels()['structure']
+            label_registry.structure_labels
         return all_labels, struct_lbl
 
     def from_musicxml_score(self, score):
@@ -105,48 +130,64 @@ class SectionExtractor(object):
 
         return sections
 
-    def _locate_section_boundaries(self, sections, score, measure_start_idx):
+    def _locate_section_boundaries(self, sections, score, measure_index,
+                                   score_index, symbtrname=None):
         if not sections:  # no sections
             return sections
         else:
             sections = self._sort_sections(sections)
 
-        real_lyrics_idx = ScoreProcessor.get_true_lyrics_idx(
-            score['lyrics'], score['duration'])
+        real_lyrics_idx = score_index.real_lyrics_idx
 
-        for i, se in reversed(list(enumerate(sections))):
-            # update start_note_idx
-            start_note_idx = self._section_start_note_idx(score, sections)
+        # the sorted start and end indices of the sections, which are
+        # updated during the sweep. The unassigned indices (i.e. the start
+        # of the vocal sections and the end of the instrumental sections)
+        # are not included
+        start_bounds = self._sorted_bounds(
+            self._section_start_note_idx(score, sections))
+        end_bounds = self._sorted_bounds([-1] + [s['end_note']
+                                                 for s in sections])
 
-            # carry the 'end_note' to the next start
-            se['end_note'] = start_note_idx[i + 1] - 1
+        for i in reversed(range(len(sections))):
+            se = sections[i]
 
-            # update end_note_idx
-            end_note_idx = self._section_end_note_idx(sections)
+            # carry the 'end_note' to the next start
+            next_start_note = (sections[i + 1]['start_note']
+                               if i + 1 < len(sections)
+                               else len(score['lyrics']))
+            self._replace_bound(end_bounds, se['end_note'],
+                                next_start_note - 1)
+            se['end_note'] = next_start_note - 1
 
             # find the start index of the vocal section
             if se['slug'] == u'VOCAL_SECTION':
+                # find the previous boundary
+                prev_bound_idx = max(
+                    [self._find_prev_bound(end_bounds, se['end_note']),
+                     self._find_prev_bound(start_bounds, se['end_note'])])
+
                 # estimate the start of the lyrics sections
                 next_lyrics_start_ind = self._find_vocal_section_start_idx(
-                    se, score, start_note_idx, end_note_idx, measure_start_idx,
-                    real_lyrics_idx)
+                    score, prev_bound_idx, measure_index, real_lyrics_idx,
+                    score_index.first_note_idx, symbtrname)
+                self._replace_bound(start_bounds, se['start_note'],
+                                    next_lyrics_start_ind)
                 se['start_note'] = next_lyrics_start_ind
 
                 # update lyrics
-                se['lyrics'] = ScoreProcessor.get_lyrics_between(
-                    score, se['start_note'], se['end_note'])
+                se['lyrics'] = score_index.get_lyrics_between(
+                    se['start_note'], se['end_note'])
             else:  # instrumental
                 pass  # the start and end are already fixed
 
         # if the first rows are control rows and the first section starts next
-        self._fill_gap_in_start(score, sections)
+        self._fill_gap_in_start(sections, score_index.first_note_idx)
 
         return sections
 
     @staticmethod
-    def _fill_gap_in_start(score, sections):
+    def _fill_gap_in_start(sections, first_note_idx):
         # if there is a gap in the start, create a new section
-        first_note_idx = ScoreProcessor.get_first_note_index(score)
         if sections[0]['start_note'] > first_note_idx:
             end_note = sections[0]['start_note'] - 1
             sections.insert(0, {'name': u'INSTRUMENTAL_SECTION',
@@ -159,58 +200,56 @@ class SectionExtractor(object):
             '{0:s} -> {1:s}'.format(sections[0]['start_note'], first_note_idx)
 
     @staticmethod
-    def _section_end_note_idx(sections):
-        end_note_idx = [-1] + [s['end_note'] for s in sections]
-        return end_note_idx
+    def _sorted_bounds(bound_note_idx):
+        # the unassigned boundaries are marked by an empty list
+        return sorted(b for b in bound_note_idx if b != [])
 
-    def _find_vocal_section_start_idx(self, section, score, start_note_idx,
-                                      end_note_idx, measure_start_idx,
-                                      real_lyrics_idx):
-
-        # find the previous boundary
-        prev_closest_start_ind = self.find_prev_closest_bound(
-            start_note_idx, section['end_note'])
-        prev_closest_end_ind = self.find_prev_closest_bound(
-            end_note_idx, section['end_note'])
-        prev_bound_idx = max([prev_closest_end_ind, prev_closest_start_ind])
+    @staticmethod
+    def _replace_bound(sorted_bounds, old_bound, new_bound):
+        if old_bound != []:
+            del sorted_bounds[bisect_left(sorted_bounds, old_bound)]
+        insort(sorted_bounds, new_bound)
 
+    @staticmethod
+    def _find_prev_bound(sorted_bounds, end_note):
+        # the closest boundary before end_note; -1 if there is none, e.g.
+        # there are no vocal sections
+        pos = bisect_left(sorted_bounds, end_note)
+        return sorted_bounds[pos - 1] if pos > 0 else -1
+
+    def _find_vocal_section_start_idx(self, score, prev_bound_idx,
+                                      measure_index, real_lyrics_idx,
+                                      first_note_idx, symbtrname=None):
         # find where the lyrics of this section starts: it has to be after
         # the previous boundary found above
-        curr_lyrics_start_ind = min(x for x in real_lyrics_idx
-                                    if x > prev_bound_idx)
-        curr_lyrics_measure_offset = floor(
-            score['offset'][curr_lyrics_start_ind])
+        lyrics_pos = bisect_right(real_lyrics_idx, prev_bound_idx)
+        if lyrics_pos == len(real_lyrics_idx):
+            raise ValueError(u'No lyrics after the note {0:d}'.format(
+                prev_bound_idx))
+        curr_lyrics_start_ind = real_lyrics_idx[lyrics_pos]
+        curr_lyrics_measure = measure_index.get_measure(
+            curr_lyrics_start_ind)
 
         # check if next_lyrics_start_ind and prev_bound_idx are
         # in the same measure. Ideally they should be in different
         # measures
         # Note: don't check the previous end as it will be undefined if the
         # previous section is instrumental
-        if curr_lyrics_measure_offset == floor(
-                score['offset'][prev_bound_idx]):
-            if self.print_warnings:
-                # This is not a warning but a indication to the user as it can
-                # happen occasionally especially in the folk forms
-                print(u'{0!s}: {1!s} and {2!s} are in the same measure!'.
-                      format(str(curr_lyrics_measure_offset),
-                             score['lyrics'][prev_bound_idx],
-                             score['lyrics'][curr_lyrics_start_ind]))
+        if curr_lyrics_measure == measure_index.get_measure(prev_bound_idx):
+            # This is not a warning but a indication to the user as it can
+            # happen occasionally especially in the folk forms
+            Diagnostics.report(
+                symbtrname, 'lyrics_in_same_measure',
+                u'{measure!s}: {prev_lyrics!s} and {lyrics!s} are in the '
+                u'same measure!', row=curr_lyrics_start_ind, is_info=True,
+                display=self.print_warnings, measure=curr_lyrics_measure,
+                prev_lyrics=score['lyrics'][prev_bound_idx],
+                lyrics=score['lyrics'][curr_lyrics_start_ind])
             return curr_lyrics_start_ind
         else:  # The section starts on the first measure the lyrics
             # start
-            first_note_idx = ScoreProcessor.get_first_note_index(score)
-            return max([OffsetProcessor.get_measure_offset_id(
-                curr_lyrics_measure_offset, score['offset'],
-                measure_start_idx), first_note_idx])
-
-    @staticmethod
-    def find_prev_closest_bound(bound_note_idx, end_note):
-        try:  # find the previous closest end
-            prev_closest_ind = max(x for x in bound_note_idx if x < end_note)
-        except ValueError:  # no vocal sections
-            prev_closest_ind = -1
-
-        return prev_closest_ind
+            return max([measure_index.get_measure_start_idx(
+                curr_lyrics_measure), first_note_idx])
 
     @staticmethod
     def _section_start_note_idx(score, sections):
@@ -228,25 +267,31 @@ class SectionExtractor(object):
         # sort the sections
         return GraphOperations.sort_by_idx(sections, sec_bound_idx)
 
-    def _validate_sections(self, sections, score, ignore_labels, symbtrname):
+    def _validate_sections(self, sections, score, ignore_labels, symbtrname,
+                           measure_index, score_index):
         # treat some of these are warning; they'll be made stricter later
-        if not sections:  # check section presence
-            if self.print_warnings:
-                warnings.warn(u"{0!s}, Missing section info in lyrics.".format(
-                    symbtrname), stacklevel=2)
+        if self.validation_level == ValidationLevel.OFF:
+            valid_bool = True  # the validation is skipped
+        elif not sections:  # check section presence
+            Diagnostics.report(symbtrname, 'missing_sections',
+                               u'{score!s}, Missing section info in lyrics.',
+                               display=self.print_warnings)
             valid_bool = True  # nothing to validate
         else:  # check section continuity
+            is_fast = self.validation_level == ValidationLevel.FAST
             section_continuity_bool = self._validate_section_continuity(
-                score, sections, symbtrname)
+                score, sections, symbtrname, score_index.first_note_idx,
+                is_fast=is_fast)
 
             self._chk_measure_starts(ignore_labels, sections, score,
-                                     symbtrname)
+                                     symbtrname, measure_index)
 
             section_bound_bool = self._validate_section_start_end(
                 sections, score, symbtrname)
 
             # check if there are any structure labels with a space
-            no_space_bool = self._validate_section_labels(score, symbtrname)
+            no_space_bool = self._validate_section_labels(
+                score, symbtrname, is_fast=is_fast)
             valid_bool = all([section_continuity_bool, no_space_bool,
                               section_bound_bool])
 
@@ -258,56 +303,69 @@ class SectionExtractor(object):
         section_bound_bool = True
         for s in sections:
             if s['start_note'] > s['end_note']:
-                warnstr = u'{0!s}, {1!s} -> {2!s}, {3!s} ends before it ' \
-                          u'starts: {4!s}' \
-                          u''.format(symbtrname, str(s['start_note']),
-                                     str(s['end_note']), s['slug'],
-                                     str(score['offset'][s['start_note']]))
-                warnings.warn(warnstr, stacklevel=2)
+                Diagnostics.report(
+                    symbtrname, 'section_ends_before_start',
+                    u'{score!s}, {row!s} -> {end_note!s}, {slug!s} ends '
+                    u'before it starts: {offset!s}', row=s['start_note'],
+                    end_note=s['end_note'], slug=s['slug'],
+                    offset=score['offset'][s['start_note']])
                 section_bound_bool = False
 
         return section_bound_bool
 
-    def _chk_measure_starts(self, ignore_labels, sections, score, symbtrname):
+    def _chk_measure_starts(self, ignore_labels, sections, score, symbtrname,
+                            measure_index):
         # check whether section starts on the measure or not
         for s in sections:
-            starts_on_measure = not OffsetProcessor.is_integer_offset(
-                score['offset'][s['start_note']]) and (s['slug'] not in
-                                                       ignore_labels)
-            if starts_on_measure and self.print_warnings:
+            starts_on_measure = not measure_index.is_measure_start(
+                s['start_note']) and (s['slug'] not in ignore_labels)
+            if starts_on_measure:
                 # This is not a warning but a indication to the user as it can
                 # happen occasionally especially in the folk forms
-                print('{0:s}, {1:s}, {2:s} does not start on a measure: {3:s}'.
-                      format(symbtrname, str(s['start_note']), s['slug'],
-                             str(score['offset'][s['start_note']])))
+                Diagnostics.report(
+                    symbtrname, 'section_not_on_measure',
+                    u'{score!s}, {row!s}, {slug!s} does not start on a '
+                    u'measure: {offset!s}', row=s['start_note'],
+                    is_info=True, display=self.print_warnings,
+                    slug=s['slug'], offset=score['offset'][s['start_note']])
 
     @staticmethod
-    def _validate_section_labels(score, symbtrname):
-        all_labels = ScoreProcessor.get_all_symbtr_labels() + ['.']
-        no_space_bool = True
-        for i, ll in enumerate(score['lyrics']):
-            for label in all_labels:
-                # invalid lyrics end
-                if ll in [label + ' ', label + '  ']:
-                    warnings.warn(u'{0!s}, {1!d}: Extra space in {2!s}'.format(
-                        symbtrname, i, ll), stacklevel=2)
-                    no_space_bool = False
-
-        return no_space_bool
-
-    def _validate_section_continuity(self, score, sections, symbtrname):
-        first_note_idx = ScoreProcessor.get_first_note_index(score)
+    def _validate_section_labels(score, symbtrname, is_fast=False):
+        spaced_labels = SymbTrLabelRegistry.get().spaced_labels
+        if is_fast:  # the rows with invalid lyrics end
+            lyrics = np.asarray(score['lyrics'], dtype=object)
+            invalid_idx = np.flatnonzero(
+                np.in1d(lyrics, list(spaced_labels)))
+        else:
+            invalid_idx = [i for i, ll in enumerate(score['lyrics'])
+                           if ll in spaced_labels]
+
+        for i in invalid_idx:
+            Diagnostics.report(symbtrname, 'label_extra_space',
+                               u'{score!s}, {row:d}: Extra space in '
+                               u'{lyrics!s}', row=int(i),
+                               lyrics=score['lyrics'][i])
+
+        return len(invalid_idx) == 0
+
+    def _validate_section_continuity(self, score, sections, symbtrname,
+                                     first_note_idx, is_fast=False):
         ends = [first_note_idx - 1] + [s['end_note'] for s in sections]
         start_note_idx = self._section_start_note_idx(score, sections)
 
+        if is_fast:  # the gaps between the section boundaries
+            gap_idx = np.flatnonzero(np.diff(np.array(
+                [ends, start_note_idx]), axis=0)[0] != 1)
+            start_note_idx = [start_note_idx[i] for i in gap_idx]
+            ends = [ends[i] for i in gap_idx]
+
         section_continuity_bool = True
         for s, e in zip(start_note_idx, ends):
             if not s - e == 1:
-                if self.print_warnings:
-                    warnings.warn(u'{0!s}, {1!s} -> {2!s}, Gap between the '
-                                  u'sections'.format(symbtrname,
-                                                     str(e), str(s)),
-                                  stacklevel=2)
+                Diagnostics.report(symbtrname, 'section_gap',
+                                   u'{score!s}, {prev_end!s} -> {row!s}, Gap '
+                                   u'between the sections', row=s,
+                                   display=self.print_warnings, prev_end=e)
                 section_continuity_bool = False
 
         return section_continuity_bool
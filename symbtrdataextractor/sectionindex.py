@@ -0,0 +1,84 @@
+from bisect import bisect_right
+
+
+class SectionIndex(object):
+    """
+    Interval index over the boundaries of the sections in a SymbTr score,
+    which maps a note to the section it is in. The sections located by
+    SectionExtractor are sorted and do not overlap, hence the queries are
+    answered by bisecting the section starts in O(log S) time. If the
+    sections overlap or are not sorted, the index falls back to scanning
+    all the sections.
+    """
+
+    def __init__(self, sections):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        sections : list[dict]
+            The sections with the SymbTr indices (starting from 1) of their
+            first and last notes given in 'start_note' and 'end_note'
+        """
+        self.sections = sections
+
+        # the section indices are given as symbtr indexing (from 1)
+        # convert them to python indexing
+        self.start_idx = [sec['start_note'] - 1 for sec in sections]
+        self.end_idx = [sec['end_note'] - 1 for sec in sections]
+
+        self.is_disjoint = all(
+            self.start_idx[i] <= self.end_idx[i] < self.start_idx[i + 1]
+            for i in range(len(sections) - 1))
+
+    def get_section_idx(self, note_idx):
+        """
+        Returns the index of the section a note is in
+
+        Parameters
+        ----------
+        note_idx : int
+            The (python) index of the note
+
+        Returns
+        ----------
+        int
+            The index of the section
+        """
+        if self.is_disjoint:
+            i = bisect_right(self.start_idx, note_idx) - 1
+            section_idx = ([i] if i >= 0 and note_idx <= self.end_idx[i]
+                           else [])
+        else:
+            section_idx = [i for i, (s, e) in enumerate(
+                zip(self.start_idx, self.end_idx)) if s <= note_idx <= e]
+
+        assert len(section_idx) == 1, 'Unexpected indexing: the note should ' \
+                                      'have been in a single section'
+
+        return section_idx[0]
+
+    def get_sections_between(self, start_note, end_note):
+        """
+        Returns the sections overlapping with a range of notes
+
+        Parameters
+        ----------
+        start_note : int
+            The (python) index of the first note
+        end_note : int
+            The (python) index of the last note (inclusive)
+
+        Returns
+        ----------
+        list[(int, dict)]
+            The indices of the sections and the sections from the section
+            of the first note to the section of the last note
+        """
+        start_section_idx = self.get_section_idx(start_note)
+        end_section_idx = self.get_section_idx(end_note)
+
+        return list(zip(range(start_section_idx, end_section_idx + 1),
+                        self.sections[start_section_idx:
+                                      end_section_idx + 1]))
@@ -1,5 +1,7 @@
-from . scoreprocessor import ScoreProcessor
+from . scoreindex import ScoreIndex
+from . sectionindex import SectionIndex
 from . structurelabeler import StructureLabeler
+from . validation import ValidationLevel
 
 
 class SegmentExtractor(object):
@@ -7,7 +9,8 @@ class SegmentExtractor(object):
 
     """
     def __init__(self, lyrics_sim_thres=0.70, melody_sim_thres=0.70,
-                 save_structure_sim=True, crop_consecutive_bounds=True):
+                 save_structure_sim=True, crop_consecutive_bounds=True,
+                 validation_level=ValidationLevel.STRICT, num_processes=1):
         """
         Class constructor
 
@@ -25,44 +28,62 @@ class SegmentExtractor(object):
         crop_consecutive_bounds : bool, optional
             True to remove the first of the two consecutive boundaries,
             False otherwise. (the default is True)
+        validation_level : str, optional
+            "off" to skip the validation of the segment labels, "fast" to
+            run the checks in linear time or "strict" to run the
+            exhaustive checks (the default is "strict")
+        num_processes : int, optional
+            The number of processes to compute the distances between the
+            segments (the default is 1. None uses the number of the CPUs)
         """
         self.lyrics_sim_thres = lyrics_sim_thres
         self.melody_sim_thres = melody_sim_thres
         self.save_structure_sim = save_structure_sim
         self.crop_consecutive_bounds = crop_consecutive_bounds
+        self.validation_level = ValidationLevel.check(validation_level)
+        self.num_processes = num_processes
 
         self.segmentLabeler = StructureLabeler(
             save_structure_sim=self.save_structure_sim,
             lyrics_sim_thres=self.lyrics_sim_thres,
-            melody_sim_thres=self.melody_sim_thres)
+            melody_sim_thres=self.melody_sim_thres,
+            validation_level=self.validation_level,
+            num_processes=self.num_processes)
+
+    def extract_phrases(self, score, sections=None, score_index=None):
+        if score_index is None:
+            score_index = ScoreIndex(score)
 
-    def extract_phrases(self, score, sections=None):
         # code 51 is the usul change and it always marks a segment boundary
         bound_codes = [51, 53, 54, 55]
         anno_codes = [53, 54, 55]
 
         # get all boundaries starting with the first note
-        all_bounds = self._get_all_bounds_in_score(bound_codes, score)
+        all_bounds = self._get_all_bounds_in_score(bound_codes, score_index)
 
         # if there are only usul boundaries the score does not have annotations
-        anno_bounds = [i for i, code in enumerate(score['code'])
-                       if code in anno_codes]
+        anno_bounds = score_index.get_code_idx(anno_codes)
 
         if anno_bounds:
-            phrases = self._extract(all_bounds, score, sections=sections,
-                                    segment_str='PHRASE')
+            phrases = self._extract(all_bounds, score, score_index,
+                                    sections=sections, segment_str='PHRASE')
         else:
             phrases = []
 
         return phrases
 
-    def extract_segments(self, score, segment_note_bound_idx, sections=None):
+    def extract_segments(self, score, segment_note_bound_idx, sections=None,
+                         score_index=None):
+        if score_index is None:
+            score_index = ScoreIndex(score)
+
         try:
             if segment_note_bound_idx:
                 # convert from Symbtr index (starting from 1) to python index
                 bounds = [b - 1 for b in segment_note_bound_idx]
 
-                segments = self._extract(bounds, score, sections=sections,
+                segments = self._extract(bounds, score, score_index,
+                                         sections=sections,
                                          segment_str='SEGMENT')
             else:
                 segments = []
@@ -73,34 +94,31 @@ class SegmentExtractor(object):
 
         return segments
 
-    def _extract(self, bounds, score, sections=None, segment_str='SEGMENT'):
+    def _extract(self, bounds, score, score_index, sections=None,
+                 segment_str='SEGMENT'):
         # add the first and the last bound if they are not already given,
         # sort & tidy
-        bounds = self._parse_bounds(bounds, score)
+        bounds = self._parse_bounds(bounds, score_index)
+        section_index = SectionIndex(sections) if sections else None
         segments = []
         for pp in range(0, len(bounds) - 1):
             start_note_idx = bounds[pp]
             end_note_idx = bounds[pp + 1] - 1
 
             # cesni/flavor
-            flavor = self._get_segment_flavor_idx(score, start_note_idx,
+            flavor = self._get_segment_flavor_idx(score, score_index,
+                                                  start_note_idx,
                                                   end_note_idx)
 
             # lyrics
-            lyrics = ScoreProcessor.get_lyrics_between(score, start_note_idx,
-                                                       end_note_idx)
+            lyrics = score_index.get_lyrics_between(start_note_idx,
+                                                    end_note_idx)
 
             # sections the segment is in
             segment_sections = []
             if sections:
-                start_section_idx = self._get_section_idx(sections,
-                                                          start_note_idx)
-                end_section_idx = self._get_section_idx(sections, end_note_idx)
-
-                for idx, sec in zip(range(start_section_idx,
-                                          end_section_idx + 1),
-                                    sections[start_section_idx:
-                                             end_section_idx + 1]):
+                for idx, sec in section_index.get_sections_between(
+                        start_note_idx, end_note_idx):
                     segment_sections.append(
                         {'section_idx': idx,
                          'melodic_structure': sec['melodic_structure'],
@@ -133,52 +151,30 @@ class SegmentExtractor(object):
         return name, slug
 
     @staticmethod
-    def _get_all_bounds_in_score(bound_codes, score):
+    def _get_all_bounds_in_score(bound_codes, score_index):
         # start bounds with the first note
-        first_note_idx = ScoreProcessor.get_first_note_index(score)
+        first_note_idx = score_index.first_note_idx
 
         all_bounds = [first_note_idx]
-        for i, code in enumerate(score['code']):
-            if code in bound_codes and i > first_note_idx:
+        for i in score_index.get_code_idx(bound_codes):
+            if i > first_note_idx:
                 all_bounds.append(i)
 
         return all_bounds
 
     @staticmethod
-    def _get_segment_flavor_idx(score, start_note_idx, end_note_idx):
-        flavor = []
-        for i, code in enumerate(
-                score['code'][start_note_idx:end_note_idx + 1]):
-            if code == 54:
-                flavor.append(score['lyrics'][start_note_idx + i])
+    def _get_segment_flavor_idx(score, score_index, start_note_idx,
+                                end_note_idx):
+        return [score['lyrics'][i] for i in score_index.get_code_idx_between(
+            54, start_note_idx, end_note_idx)]
 
-        return flavor
-
-    @staticmethod
-    def _get_section_idx(sections, note_idx):
-        # there should be only one but we accumulate the resulting index in
-        # an array for the asserting later
-        section_idx = []
-        for i, sec in enumerate(sections):
-            # the section indices are given as symbtr indexing (from 1)
-            # convert them to python indexing
-            sec_start_idx = sec['start_note'] - 1
-            sec_end_idx = sec['end_note'] - 1
-            if sec_start_idx <= note_idx <= sec_end_idx:
-                section_idx.append(i)
-
-        assert len(section_idx) == 1, 'Unexpected indexing: the note should ' \
-                                      'have been in a single section'
-
-        return section_idx[0]
-
-    def _parse_bounds(self, bounds, score):
+    def _parse_bounds(self, bounds, score_index):
         # add start and end if they are not already in the list
-        first_bound_idx = ScoreProcessor.get_first_note_index(score)
+        first_bound_idx = score_index.first_note_idx
         bounds.insert(0, first_bound_idx)
 
         # create the boundary outside the score idx
-        last_bound_idx = len(score['code'])
+        last_bound_idx = score_index.num_rows
         bounds += [last_bound_idx]
 
         bounds = sorted(list(set(bounds)))  # sort and tidy
@@ -1,6 +1,8 @@
+from multiprocessing import Pool
 from .scoreprocessor import ScoreProcessor
 from .graph import GraphOperations
-from copy import deepcopy
+from .scorefragment import ScoreFragment
+from .validation import ValidationLevel
 
 
 class StructureLabeler(object):
@@ -9,24 +11,39 @@ class StructureLabeler(object):
     """
 
     def __init__(self, lyrics_sim_thres=0.7, melody_sim_thres=0.7,
-                 save_structure_sim=True):
+                 save_structure_sim=True,
+                 validation_level=ValidationLevel.STRICT, num_processes=1,
+                 pool=None):
         self.lyrics_sim_thres = lyrics_sim_thres
         self.melody_sim_thres = melody_sim_thres
         self.save_structure_sim = save_structure_sim
+        self.validation_level = ValidationLevel.check(validation_level)
+        self.num_processes = num_processes
+
+        # the pool is reused for all the distance matrices; if it is not
+        # given, it is created on first use and closed by close()
+        self.pool = pool
+        self._owns_pool = False
+
+    def close(self):
+        if self._owns_pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            self._owns_pool = False
+
+    def _get_pool(self):
+        if self.pool is None and self.num_processes != 1:
+            self.pool = Pool(processes=self.num_processes)
+            self._owns_pool = True
+        return self.pool
 
     def label_structures(self, structures, score):
-        # get the duration, pitch and lyrics related to the section
-        score_fragments = []
-        for s in structures:
-            durs = self._get_score_key_in_structure(s, score, 'duration')
-            nums = self._get_score_key_in_structure(s, score, 'numerator')
-            denums = self._get_score_key_in_structure(s, score, 'denumerator')
-            notes = self._get_score_key_in_structure(s, score, 'comma53')
-            lyrics = self._get_score_key_in_structure(s, score, 'lyrics')
-
-            score_fragments.append({'durs': durs, 'nums': nums,
-                                    'denums': denums, 'notes': notes,
-                                    'lyrics': lyrics})
+        # views of the duration, pitch and lyrics related to the section
+        sounding_idx = ScoreFragment.get_sounding_idx(score)
+        score_fragments = [ScoreFragment(score, s['start_note'],
+                                         s['end_note'], sounding_idx)
+                           for s in structures]
 
         if structures:
             # get the lyric organization
@@ -43,10 +60,6 @@ class StructureLabeler(object):
             st['start_note'] = score['index'][st['start_note']]
             st['end_note'] = score['index'][st['end_note']]
 
-    @staticmethod
-    def _get_score_key_in_structure(s, score, name):
-        return score[name][s['start_note']:s['end_note'] + 1]
-
     def get_lyrics_organization(self, structures, score_fragments):
         # Here we only check whether the lyrics are similar to others
         # We don't check whether they are sung on the same note / with
@@ -59,30 +72,35 @@ class StructureLabeler(object):
         # This part is done for future needs; e.g. audio-lyrics alignment
 
         # get the lyrics stripped of section information
-        lyrics = ScoreProcessor.get_true_lyrics(score_fragments)
-        for (sf, ly) in zip(score_fragments, lyrics):
-            sf['lyrics'] = ly  # assign lyrics to the relevant score_fragments
+        lyrics = [sf.get_true_lyrics() for sf in score_fragments]
 
-        # graph analysis
-        lyrics_strings = [a['lyrics'] for a in score_fragments]
-        dists = GraphOperations.get_dist_matrix(lyrics_strings,
-                                                metric='norm_levenshtein')
-        cliques = GraphOperations.get_cliques(dists, self.lyrics_sim_thres)
+        # graph analysis between the unique lyrics
+        unique_lyrics, inverse = GraphOperations.get_unique(lyrics)
+        dists = GraphOperations.get_dist_matrix(
+            unique_lyrics, metric='norm_levenshtein',
+            num_processes=self.num_processes, pool=self._get_pool(),
+            max_dist=self._get_max_dist(self.lyrics_sim_thres))
+        cliques = GraphOperations.get_cliques(
+            dists, self.lyrics_sim_thres, inverse=inverse)
 
         # semiotic labeling
         lyrics_labels = self._semiotize(cliques)
         self._apply_labels_to_lyrics_structure(
-            structures, lyrics_labels, score_fragments, dists)
+            structures, lyrics_labels, lyrics, dists, inverse)
 
         # sanity check
         self._assert_labels(lyrics, lyrics_labels, 'lyrics')
 
     def get_melodic_organization(self, structures, score_fragments):
-        melodies, melody_strings = self.get_melodies(score_fragments)
+        melodies = self.get_melodies(score_fragments)
 
-        dists = GraphOperations.get_dist_matrix(melody_strings,
-                                                metric='norm_levenshtein')
-        cliques = GraphOperations.get_cliques(dists, self.melody_sim_thres)
+        unique_melodies, inverse = GraphOperations.get_unique(melodies)
+        dists = GraphOperations.get_dist_matrix(
+            unique_melodies, metric='norm_levenshtein_rle',
+            num_processes=self.num_processes, pool=self._get_pool(),
+            max_dist=self._get_max_dist(self.melody_sim_thres))
+        cliques = GraphOperations.get_cliques(
+            dists, self.melody_sim_thres, inverse=inverse)
 
         melody_labels = self._semiotize(cliques)
 
@@ -91,7 +109,7 @@ class StructureLabeler(object):
             structures[i]['melodic_structure'] = melody_labels[i]
             if self.save_structure_sim:
                 structures[i]['melodic_similarities'] = \
-                    (1 - dists[i, :]).tolist()[0]
+                    (1 - dists[inverse[i], inverse]).tolist()
 
         # sanity check
         self._assert_labels(melodies, melody_labels, 'melody')
@@ -100,56 +118,54 @@ class StructureLabeler(object):
         score_fragments_copy = self._remove_zero_dur_events(score_fragments)
 
         # synthesize the score by taking the shortest note as the unit
-        # (i.e. the shortest note has the largest denumerator)
+        # (i.e. the shortest note has the largest denumerator). The
+        # melodies are run-length encoded instead of repeating each note
+        # by its number of samples. The distance is computed directly on
+        # the (comma53) pitches of the runs
         max_denum = max(max(sf['denums']) for sf in score_fragments_copy)
-        melodies = [ScoreProcessor.synth_melody(sf, max_denum)
-                    for sf in score_fragments_copy]
-
-        # convert the numbers in melodies to unique strings for Levenstein dist
-        melody_strings = self._melodies_to_strings(
-            melodies, score_fragments_copy)
-
-        return melodies, melody_strings
+        return [ScoreProcessor.get_melody_runs(sf, max_denum)
+                for sf in score_fragments_copy]
 
-    @staticmethod
-    def _melodies_to_strings(melodies, score_fragments_copy):
-        unique_notes = list(set(x for sf in score_fragments_copy
-                                for x in sf['notes']))
-        melody_strings = [ScoreProcessor.mel2str(m, unique_notes)
-                          for m in melodies]
-        return melody_strings
+    def _get_max_dist(self, sim_thres):
+        # the cliques only need the distances up to the similarity and the
+        # exact matching thresholds; the larger distances are skipped,
+        # unless the similarities are saved
+        if self.save_structure_sim:
+            return None
+        return max(1 - sim_thres, 0.001)
 
     @staticmethod
     def _remove_zero_dur_events(score_fragments):
-        copy_fragments = deepcopy(score_fragments)
-
-        # remove annotation/control row; i.e. entries w 0 duration
-        for sf in copy_fragments:
-            for i in reversed(range(0, len(sf['durs']))):
-                if sf['durs'][i] == 0:
-                    sf['notes'].pop(i)
-                    sf['nums'].pop(i)
-                    sf['denums'].pop(i)
-                    sf['durs'].pop(i)
-
-        return copy_fragments
+        # skip annotation/control row; i.e. entries w 0 duration
+        return [dict((key, sf.get_sounding(key))
+                     for key in ['notes', 'nums', 'denums', 'durs'])
+                for sf in score_fragments]
 
     def _apply_labels_to_lyrics_structure(
-            self, structures, lyrics_labels, score_fragments, dists):
+            self, structures, lyrics_labels, lyrics, dists, inverse):
 
         for i in range(0, len(lyrics_labels)):
             # if there's no lyrics, label instrumental
-            if not score_fragments[i]['lyrics']:
+            if not lyrics[i]:
                 structures[i]['lyrics_structure'] = 'INSTRUMENTAL'
             else:
                 structures[i]['lyrics_structure'] = lyrics_labels[i]
 
             if self.save_structure_sim:
                 structures[i]['lyrics_similarities'] = \
-                    (1 - dists[i, :]).tolist()[0]
+                    (1 - dists[inverse[i], inverse]).tolist()
+
+    def _assert_labels(self, stream, labels, name):
+        if self.validation_level == ValidationLevel.OFF:
+            return
+        elif self.validation_level == ValidationLevel.FAST:
+            # compare each stream to the first stream with the same label
+            label_streams = {}
+            for lbl, strm in zip(labels, stream):
+                assert label_streams.setdefault(lbl, strm) == strm, \
+                    'Mismatch in {0!s} label: {1!s}'.format(name, lbl)
+            return
 
-    @staticmethod
-    def _assert_labels(stream, labels, name):
         for lbl, strm in zip(labels, stream):
             chk_strm = ([stream[i] for i, x in enumerate(labels)
                          if x == lbl])
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+
+
+class SymbTrLabelRegistry(object):
+    """
+    The labels written in the lyrics column of the SymbTr scores, e.g. the
+    section names, the instrumentation and the timing annotations, which are
+    read from makam_data/symbTrLabels.json once and lazily. The labels are
+    stored in frozensets so the rows of the lyrics column are classified by
+    hash lookups. The classes of the distinct lyrics are cached, hence a
+    whole lyrics column is classified in a single pass.
+    """
+    STRUCTURE_LABEL = 0  # section names, e.g. "ARA SAZI"
+    CONTROL_LABEL = 1  # the other labels, e.g. "SAZ", "SERBEST"
+    SYLLABLE = 2  # the lyrics (true syllables if the row has a duration)
+    EMPTY = 3  # empty rows and the placeholder "."
+
+    empty_lyrics = frozenset([u'.', u'', u' '])
+
+    _registry = None
+    _lock = threading.Lock()
+
+    def __init__(self, label_file=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        label_file : str, optional
+            The path of the JSON file storing the labels in groups (the
+            default is None, which reads makam_data/symbTrLabels.json)
+        """
+        if label_file is None:
+            label_file = os.path.join(os.path.dirname(os.path.abspath(
+                __file__)), 'makam_data', 'symbTrLabels.json')
+
+        with open(label_file, 'r') as f:
+            grouped_labels = json.load(f)
+
+        self._grouped_labels = grouped_labels
+        self.groups = dict((group, frozenset(labels))
+                           for group, labels in grouped_labels.items())
+        self.all_labels = frozenset(l for labels in grouped_labels.values()
+                                    for l in labels)
+        self.structure_labels = self.groups['structure']
+
+        # labels (and the placeholder) followed by extra spaces, which are
+        # not allowed at the end of the lyrics
+        self.spaced_labels = frozenset(
+            l + tail for l in self.all_labels | frozenset([u'.'])
+            for tail in [u' ', u'  '])
+
+        self._classes = {}
+
+    @classmethod
+    def get(cls):
+        """
+        Returns the shared registry
+
+        Returns
+        ----------
+        SymbTrLabelRegistry
+            The registry
+        """
+        if cls._registry is None:
+            with cls._lock:
+                if cls._registry is None:
+                    cls._registry = cls()
+        return cls._registry
+
+    @classmethod
+    def reload(cls):
+        """
+        Drops the shared registry so that the labels are read again on the
+        next access, e.g. after symbTrLabels.json is updated
+        """
+        with cls._lock:
+            cls._registry = None
+
+    def get_grouped_labels(self):
+        """
+        Returns the labels in their groups as read from the JSON file
+
+        Returns
+        ----------
+        dict
+            The lists of the labels per group
+        """
+        return dict((group, list(labels))
+                    for group, labels in self._grouped_labels.items())
+
+    def classify(self, lyric):
+        """
+        Classifies the text in a row of the lyrics column
+
+        Parameters
+        ----------
+        lyric : str
+            The text in the lyrics column
+
+        Returns
+        ----------
+        int
+            STRUCTURE_LABEL, CONTROL_LABEL, SYLLABLE or EMPTY
+        """
+        try:
+            return self._classes[lyric]
+        except KeyError:
+            if lyric in self.structure_labels:
+                lyric_class = self.STRUCTURE_LABEL
+            elif lyric in self.all_labels:
+                lyric_class = self.CONTROL_LABEL
+            elif lyric in self.empty_lyrics:
+                lyric_class = self.EMPTY
+            else:
+                lyric_class = self.SYLLABLE
+
+            self._classes[lyric] = lyric_class
+            return lyric_class
+
+    def classify_lyrics(self, lyrics):
+        """
+        Classifies all the rows of a lyrics column
+
+        Parameters
+        ----------
+        lyrics : list[str]
+            The lyrics column
+
+        Returns
+        ----------
+        list[int]
+            The class of each row; STRUCTURE_LABEL, CONTROL_LABEL, SYLLABLE
+            or EMPTY
+        """
+        classify = self.classify
+        return [classify(l) for l in lyrics]
+
+    def get_real_lyrics_idx(self, lyrics, dur):
+        """
+        Returns the positions of the true syllables in a lyrics column, i.e.
+        the rows which are not labels, empty or embellishments (rows with
+        zero duration)
+
+        Parameters
+        ----------
+        lyrics : list[str]
+            The lyrics column
+        dur : list[int]
+            The durations of the rows
+
+        Returns
+        ----------
+        list[int]
+            The sorted (python) indices of the true syllables
+        """
+        syllable = self.SYLLABLE
+        return [i for i, (c, d) in enumerate(zip(self.classify_lyrics(lyrics),
+                                                 dur))
+                if c == syllable and d != 0]
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class TimeIndex(object):
+    """
+    Index of the absolute times of the rows in a SymbTr score, computed
+    from the note durations in milliseconds (the "Ms" column). The onset
+    and the offset of each row are stored in a cumulative array, so the
+    note -> time and time -> note queries take O(log n) time at most.
+    """
+
+    def __init__(self, score, duration_cumsum=None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        score : dict
+            A dictionary of the read SymbTr score, where each key is a column
+        duration_cumsum : numpy.ndarray, optional
+            The prefix sums of the durations of the rows in milliseconds,
+            starting from 0, e.g. ScoreIndex.duration_cumsum (the default
+            is None, which computes them from the score)
+        """
+        # onsets_ms[i] is the onset of the row i, onsets_ms[i + 1] is its
+        # offset (end) in milliseconds
+        if duration_cumsum is None:
+            duration_cumsum = np.concatenate(
+                ([0], np.cumsum(score['duration'], dtype=np.int64)))
+        self.onsets_ms = duration_cumsum
+
+        # map the SymbTr indices (starting from 1) to the python indices
+        self._symbtr_idx = dict((int(idx), i)
+                                for i, idx in enumerate(score['index']))
+
+    @property
+    def duration(self):
+        return self.onsets_ms[-1] * 0.001
+
+    def get_onset(self, note_idx):
+        """
+        Returns the onset of a row
+
+        Parameters
+        ----------
+        note_idx : int
+            The (python) index of the row
+
+        Returns
+        ----------
+        float
+            The onset in seconds
+        """
+        return self.onsets_ms[note_idx] * 0.001
+
+    def get_offset(self, note_idx):
+        """
+        Returns the offset (end) of a row
+
+        Parameters
+        ----------
+        note_idx : int
+            The (python) index of the row
+
+        Returns
+        ----------
+        float
+            The offset in seconds
+        """
+        return self.onsets_ms[note_idx + 1] * 0.001
+
+    def get_note_idx(self, time):
+        """
+        Returns the row sounding at the given time. The rows without
+        duration, e.g. the control rows and the grace notes, are skipped
+
+        Parameters
+        ----------
+        time : float
+            The time in seconds
+
+        Returns
+        ----------
+        int
+            The (python) index of the row
+
+        Raises
+        ------
+        ValueError
+            If the time is outside the score
+        """
+        if not 0 <= time < self.duration:
+            raise ValueError(u'{0!s} seconds is outside the score'.format(
+                time))
+
+        # the first row ending after the time. Round the time in ms to
+        # cancel the floating point errors, e.g. in the times returned by
+        # get_onset
+        return int(np.searchsorted(self.onsets_ms[1:],
+                                   round(time * 1000.0, 6), side='right'))
+
+    def add_times(self, structures, start_key='start_note',
+                  end_key='end_note', start_time_key='start_time',
+                  end_time_key='end_time'):
+        """
+        Adds the start and end times to the (section, segment, rhythmic
+        structure etc.) entries. The entries should store the SymbTr
+        indices (starting from 1) of their first and last notes
+
+        Parameters
+        ----------
+        structures : list[dict]
+            The entries
+        start_key : str, optional
+            The key of the first note index (the default is 'start_note')
+        end_key : str, optional
+            The key of the last note index (the default is 'end_note')
+        start_time_key : str, optional
+            The key to store the start time (the default is 'start_time')
+        end_time_key : str, optional
+            The key to store the end time (the default is 'end_time')
+        """
+        for st in structures:
+            st[start_time_key] = self.get_onset(
+                self._symbtr_idx[st[start_key]])
+            st[end_time_key] = self.get_offset(self._symbtr_idx[st[end_key]])
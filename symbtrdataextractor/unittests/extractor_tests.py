@@ -3,6 +3,7 @@ import os
 
 from symbtrdataextractor.dataextractor import DataExtractor
 from symbtrdataextractor.reader.mu2 import Mu2Reader
+from symbtrdataextractor.reader.txt import TxtReader
 
 _curr_folder = os.path.dirname(os.path.abspath(__file__))
 
@@ -65,6 +66,26 @@ def test_with_phrase_annotation():
     _basic_txt_extractor(scorename)
 
 
+def test_structure_labels_with_overlapping_cliques():
+    """
+    Tests the melodic labels of the phrases belonging to the similar
+    cliques starting with the same phrase
+    """
+    scorename = 'huzzam--sarki--curcuna--guzel_gun_gormedi--haci_arif_bey'
+    txt_filename = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    extractor = DataExtractor(
+        melody_sim_thres=0.5, lyrics_sim_thres=0.5, save_structure_sim=False,
+        get_recording_rels=False, print_warnings=False)
+    txt_data, is_data_valid = extractor.extract(txt_filename,
+                                                symbtr_name=scorename)
+
+    melodic_labels = [p['melodic_structure']
+                      for p in txt_data['phrase_annotations']]
+    assert melodic_labels[15] == u'H1'
+    assert melodic_labels[20] == u'G1'
+
+
 def test_with_vocal_section_starting_mid_measure():
     """
     Tests the result with the score of a vocal composition in which some of
@@ -117,3 +138,72 @@ def test_with_full_input():
     assert saved_data == data, u"{0:s}: the result is different".format(
         scorename)
     assert is_valid, "The data is not valid (or the validations failed.)"
+
+
+def test_from_bytes_and_parsed_score():
+    """
+    Tests the results of the extraction from the content of a score and
+    from an already parsed score against the extraction from the file
+    """
+    scorename = 'huzzam--sarki--curcuna--guzel_gun_gormedi--haci_arif_bey'
+    txt_filename = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    extractor = DataExtractor(print_warnings=False)
+    file_data, is_file_data_valid = extractor.extract(txt_filename)
+
+    with open(txt_filename, 'rb') as f:
+        bytes_data, is_bytes_data_valid = extractor.extract_from_bytes(
+            f.read(), 'txt', scorename)
+
+    score, is_score_valid = TxtReader.read(txt_filename, columnar=True)
+    score_data, is_score_data_valid = extractor.extract_from_score(
+        score, scorename, is_score_valid=is_score_valid)
+
+    assert file_data == bytes_data == score_data
+    assert is_file_data_valid == is_bytes_data_valid == is_score_data_valid
+
+
+def test_with_times():
+    """
+    Tests the start and end times added to the extracted structures
+    """
+    scorename = 'huzzam--sarki--curcuna--guzel_gun_gormedi--haci_arif_bey'
+    txt_filename = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    extractor = DataExtractor(print_warnings=False, add_times=True)
+    txt_data, is_data_valid = extractor.extract(txt_filename)
+
+    for key in ['sections', 'phrase_annotations']:
+        starts = [s['start_time'] for s in txt_data[key]]
+        ends = [s['end_time'] for s in txt_data[key]]
+        assert starts == sorted(starts) and ends[:-1] == starts[1:]
+        assert abs(ends[-1] - txt_data['duration']['value']) < 1e-9
+
+    assert txt_data['rhythmic_structure'][0]['startTime'] == 0
+
+
+def test_validation_levels():
+    """
+    Tests that the fast validation gives the same result as the strict
+    validation and that the validation can be turned off
+    """
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    txt_filename = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    results = {}
+    for level in ['strict', 'fast', 'off']:
+        extractor = DataExtractor(print_warnings=False,
+                                  validation_level=level)
+        results[level] = extractor.extract(txt_filename)
+
+    assert results['strict'] == results['fast'] == results['off']
+
+    # invalid scores
+    score, is_valid = TxtReader.read(txt_filename)
+    score['index'][5] += 1  # index jump
+    score['code'][score['note53'].index('Es')] = 1  # invalid rest
+
+    for level, expected in [('strict', False), ('fast', False),
+                            ('off', True)]:
+        assert TxtReader._validate(score, scorename,
+                                   validation_level=level) is expected
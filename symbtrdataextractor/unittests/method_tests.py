@@ -1,6 +1,34 @@
+from symbtrdataextractor.corpus.archive import ArchiveCorpus
+from symbtrdataextractor.corpus.mu2headerindex import Mu2HeaderIndex
+from symbtrdataextractor.diagnostics import Diagnostics
+from symbtrdataextractor.graph import GraphOperations
+from symbtrdataextractor.metadata.attributecatalog import AttributeCatalog
+from symbtrdataextractor.metadata.metadataextractor import MetadataExtractor
 from symbtrdataextractor.metadata.musicbrainz import MusicBrainzMetadata
+from symbtrdataextractor.offset import MeasureIndex
+from symbtrdataextractor.offset import OffsetProcessor
+from symbtrdataextractor.reader.mu2 import Mu2Reader
+from symbtrdataextractor.reader.musicxml import MusicXMLReader
+from symbtrdataextractor.reader.txt import TxtReader
+from symbtrdataextractor.reader.scorecache import ScoreCache
+from symbtrdataextractor.scorefragment import ScoreFragment
+from symbtrdataextractor.scoreindex import ScoreIndex
+from symbtrdataextractor.scoreprocessor import ScoreProcessor
+from symbtrdataextractor.sectionindex import SectionIndex
+from symbtrdataextractor.scorevocabulary import ScoreVocabulary
+from symbtrdataextractor.symbtrlabelregistry import SymbTrLabelRegistry
+from symbtrdataextractor.timeindex import TimeIndex
+from multiprocessing.pool import ThreadPool
+import glob
 import json
 import os
+import pickle
+import shutil
+import tarfile
+import tempfile
+import warnings
+import zipfile
+import numpy
 
 _curr_folder = os.path.dirname(os.path.abspath(__file__))
 
@@ -18,3 +46,508 @@ def test_musicbrainz_recording_request():
 
     assert r_data == save_data, u'Crawling {0:s} yields a different ' \
                                 u'result '.format(rec)
+
+
+def test_diagnostics():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+    score, is_valid = TxtReader.read(txt_file)
+    score['index'][5] += 1  # index jump
+    score['code'][0] = 53  # missing usul row
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        with Diagnostics() as diagnostics:
+            assert not TxtReader._validate(score, scorename)
+
+    assert not caught  # the issues are recorded instead of warned
+    assert Diagnostics.get_active() is None
+    assert diagnostics.count_by_category() == {'index_jump': 2,
+                                               'missing_usul_row': 1}
+    assert [i.row for i in diagnostics.filter(category='index_jump')] == [
+        score['index'][5], score['index'][6]]
+    assert diagnostics.format()[0] == \
+        u'{0:s} Missing the usul row in the start'.format(scorename)
+
+    # aggregate the issues, e.g. from the worker processes
+    batch = Diagnostics()
+    batch.extend(pickle.loads(pickle.dumps(diagnostics)))
+    assert batch.to_dicts() == diagnostics.to_dicts()
+
+
+def test_dist_matrix():
+    stream = [u'ABCA', u'ABCA', u'', u'ABDAB', u'BBBB', u'A']
+    expected = numpy.array([[GraphOperations.norm_levenshtein(a, b)
+                             for a in stream] for b in stream])
+
+    for num_processes, use_threads in [(1, False), (3, True), (2, False)]:
+        dists = GraphOperations.get_dist_matrix(
+            stream, num_processes=num_processes, use_threads=use_threads)
+        assert type(dists) is numpy.ndarray
+        assert numpy.array_equal(dists, expected)
+
+    # a pool supplied by the caller is reused and left open
+    pool = ThreadPool(processes=2)
+    for _ in range(2):
+        dists = GraphOperations.get_dist_matrix(stream, num_processes=2,
+                                                pool=pool)
+        assert numpy.array_equal(dists, expected)
+    pool.close()
+    pool.join()
+
+    # distances between two streams
+    dists = GraphOperations.get_dist_matrix(stream, stream2=stream[:2],
+                                            num_processes=2, use_threads=True)
+    assert numpy.array_equal(dists, expected[:2, :])
+
+    # bounded distances; exact up to max_dist and pruned to 1 otherwise
+    max_dist = 0.3
+    bounded = GraphOperations.get_dist_matrix(stream, max_dist=max_dist)
+    is_close = expected <= max_dist
+    assert numpy.array_equal(bounded[is_close], expected[is_close])
+    assert (bounded[~is_close] > max_dist).all()
+    assert (GraphOperations.get_cliques(bounded, 1 - max_dist) ==
+            GraphOperations.get_cliques(expected, 1 - max_dist))
+
+    lower_bounds = GraphOperations.get_dist_lower_bounds(
+        GraphOperations.get_char_histograms(stream, u'ABCD'),
+        GraphOperations.get_char_histograms([u'ABCA'], u'ABCD')[0])
+    assert (lower_bounds <= expected[:, 0]).all()
+
+    unique, inverse = GraphOperations.get_unique(stream)
+    assert unique == [u'ABCA', u'', u'ABDAB', u'BBBB', u'A']
+    assert [unique[i] for i in inverse] == stream
+
+    # the cliques of the unique elements expanded by the equality groups
+    unique_dists = GraphOperations.get_dist_matrix(unique)
+    assert (GraphOperations.get_cliques(unique_dists, 0.7, inverse=inverse) ==
+            GraphOperations.get_cliques(expected, 0.7))
+
+
+def test_melody_runs():
+    fragment = {'notes': ['A4', 'A4', 'B4', 'C5', 'A4'],
+                'nums': [1, 1, 3, 1, 1], 'denums': [8, 4, 16, 32, 2]}
+    runs = ScoreProcessor.get_melody_runs(fragment, 32)
+    assert runs == (('A4', 12), ('B4', 6), ('C5', 1), ('A4', 16))
+    assert ScoreProcessor.get_melody_runs(fragment, 16) == (
+        ('A4', 6), ('B4', 3), ('A4', 8))
+
+    # the distance between the runs is equal to the distance between the
+    # expanded strings
+    runs1 = (('A', 4), ('B', 2), ('A', 6))
+    runs2 = (('A', 2), ('C', 4), ('B', 8))
+    dist = GraphOperations.norm_levenshtein(
+        u''.join(c * l for c, l in runs1), u''.join(c * l for c, l in runs2))
+    assert GraphOperations.norm_levenshtein_rle(runs1, runs2) == dist
+    assert GraphOperations.norm_levenshtein_rle((), ()) == 0
+
+    dists = GraphOperations.get_dist_matrix(
+        [runs1, runs2, runs1], metric='norm_levenshtein_rle', max_dist=0.1)
+    assert dists[0, 2] == 0 and dists[0, 1] == 1
+
+
+def test_integer_pitch_distance():
+    # more (comma53) pitches than the ascii letters
+    pitches1 = range(0, 240, 3)
+    pitches2 = range(0, 240, 4)
+    runs1 = tuple((p, 2) for p in pitches1)
+    runs2 = tuple((p, 4) for p in pitches2)
+
+    unique_pitches = set(pitches1 + pitches2)
+    codes = dict((p, unichr(i)) for i, p in enumerate(unique_pitches))
+    dist = GraphOperations.norm_levenshtein(
+        u''.join(codes[p] * 2 for p in pitches1),
+        u''.join(codes[p] * 4 for p in pitches2))
+    assert GraphOperations.norm_levenshtein_rle(runs1, runs2) == dist
+
+
+def test_attribute_catalog():
+    usul_catalog = AttributeCatalog.get('usul')
+    assert AttributeCatalog.get('usul') is usul_catalog
+
+    usul_dict = MetadataExtractor.get_attribute_dict('usul')
+    assert usul_dict == usul_catalog.data
+    assert usul_dict is not usul_catalog.data
+
+    for usul in usul_dict.values():
+        # the slugs and the mu2 names are not unique, e.g. the empty ones
+        assert usul_catalog.get_attribute_by(usul['symbtr_slug'])[
+            'symbtr_slug'] == usul['symbtr_slug']
+        for var in usul['variants']:
+            assert var['mu2_name'] in [
+                v['mu2_name'] for v in usul_catalog.get_attribute_by(
+                    var['mu2_name'], field='mu2_name')['variants']]
+            assert usul_catalog.get_usul_variant(var['mu2_name'])[
+                'mu2_name'] == var['mu2_name']
+
+    assert usul_catalog.get_key(u'Heze\xe7', field='dunya_name') == 'hezec'
+    assert usul_catalog.get_key('not_an_usul') is None
+
+    AttributeCatalog.reload('usul')
+    assert AttributeCatalog.get('usul') is not usul_catalog
+
+
+def test_symbtr_label_registry():
+    registry = SymbTrLabelRegistry.get()
+    assert SymbTrLabelRegistry.get() is registry
+
+    lyrics = [u'SAZ', u'ARA SAZI', u'.', u'', u'gel', u'di', u'ya  ',
+              u'I. ']
+    durs = [0, 0, 0, 0, 500, 0, 250, 0]
+    assert registry.classify_lyrics(lyrics) == [
+        registry.CONTROL_LABEL, registry.STRUCTURE_LABEL, registry.EMPTY,
+        registry.EMPTY, registry.SYLLABLE, registry.SYLLABLE,
+        registry.SYLLABLE, registry.SYLLABLE]
+    assert registry.get_real_lyrics_idx(lyrics, durs) == [4, 6]
+    assert [l for l in lyrics if l in registry.spaced_labels] == [u'I. ']
+
+    assert set(ScoreProcessor.get_all_symbtr_labels()) == registry.all_labels
+
+
+def test_columnar_txt_read():
+    scorename = 'ussak--sazsemaisi--aksaksemai----neyzen_aziz_dede'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    score, is_valid = TxtReader.read(txt_file)
+    columnar_score, is_columnar_valid = TxtReader.read(txt_file,
+                                                       columnar=True)
+
+    assert columnar_score['offset'].dtype == numpy.float64
+    assert columnar_score['code'].dtype == numpy.int32
+    assert columnar_score.to_dict() == score, \
+        'The dict view of the columnar score is different'
+    assert is_valid == is_columnar_valid
+
+
+def test_columnar_txt_read_with_vocabulary():
+    scorenames = ['ussak--sazsemaisi--aksaksemai----neyzen_aziz_dede',
+                  'huzzam--sarki--curcuna--guzel_gun_gormedi--haci_arif_bey']
+    vocabulary = ScoreVocabulary()
+
+    num_strings = 0
+    for scorename in scorenames:
+        txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+        score, is_valid = TxtReader.read(txt_file)
+        encoded_score, is_encoded_valid = TxtReader.read(
+            txt_file, columnar=True, vocabulary=vocabulary)
+
+        assert encoded_score.to_dict() == score
+        assert encoded_score.get_codes('note53').dtype == numpy.int32
+        assert ([encoded_score.decode_at('lyrics', i)
+                 for i in range(encoded_score.num_rows)] == score['lyrics'])
+        num_strings += 3 * len(score['note53'])
+
+    assert len(vocabulary) < num_strings
+    assert vocabulary.decode(vocabulary.encode(['La4', u'SAZ'])) == [
+        'La4', u'SAZ']
+
+
+def test_txt_row_iterator():
+    scorename = 'huzzam--sarki--curcuna--guzel_gun_gormedi--haci_arif_bey'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    score, is_valid = TxtReader.read(txt_file)
+
+    rows = list(TxtReader.iter_rows(txt_file))
+    assert [r['offset'] for r in rows] == score['offset']
+    assert [r['lyrics'] for r in rows] == score['lyrics']
+
+    chunks = list(TxtReader.iter_rows(txt_file, chunk_size=100))
+    assert len(chunks) == 4
+    assert [o for c in chunks for o in c['offset']] == score['offset']
+
+    assert TxtReader.validate_file(txt_file) == is_valid
+
+
+def test_txt_read_from_score_cache():
+    scorename = 'saba--miraciye--serbest--pes_heman--nayi_osman_dede'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        score_cache = ScoreCache(cache_dir)
+        score, is_valid = TxtReader.read(txt_file)
+
+        # the first read parses and saves the score, the second one loads
+        for _ in range(2):
+            cached_score, is_cached_valid = TxtReader.read(
+                txt_file, score_cache=score_cache)
+            assert cached_score == score, 'The cached score is different'
+            assert is_cached_valid == is_valid
+        assert len(os.listdir(cache_dir)) == 1
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def test_mu2_read():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    mu2_file = os.path.join(_curr_folder, 'data', scorename + '.mu2')
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+
+    header, header_row, is_header_valid = Mu2Reader.read_header(mu2_file)
+    score, score_header, is_valid = Mu2Reader.read_with_header(mu2_file)
+    txt_score, is_txt_valid = TxtReader.read(txt_file)
+
+    assert score_header == header, 'The header is different'
+    assert is_valid and is_header_valid and is_txt_valid
+    assert score['code'][0] == 51 and score['lns'][0] == txt_score['lns'][0]
+
+    # the columns and the rows of the score
+    assert set(score.keys()) == set(txt_score.keys())
+    assert all(len(col) == 395 for col in score.values())
+    assert score['index'] == range(1, 396)
+    assert score['note53'][1:4] == ['Sol5', 'Mi5b5', 'Re5']
+    assert score['comma53'][1:4] == [349, 331, 327]
+    assert score['numerator'][1:4] == [1, 3, 1]
+    assert score['denumerator'][1:4] == [4, 32, 32]
+    assert score['duration'][1:4] == [833, 312, 104]
+    assert sum(score['duration']) == 134944
+
+    # the space after the structure labels is removed
+    assert score['lyrics'][1] == u'ARANA\u011eME'
+
+    # the repetitions are not expanded in mu2, compare the unique notes
+    mu2_notes = set(zip(score['note53'], score['noteAE'], score['comma53'],
+                        score['commaAE'], score['numerator'],
+                        score['denumerator'], score['duration']))
+    txt_notes = set(zip(txt_score['note53'], txt_score['noteAE'],
+                        txt_score['comma53'], txt_score['commaAE'],
+                        txt_score['numerator'], txt_score['denumerator'],
+                        txt_score['duration']))
+    assert mu2_notes <= txt_notes
+
+
+def test_musicxml_read():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--test--test'
+    xml_str = '''<?xml version="1.0" encoding="UTF-8"?>
+<score-partwise version="3.0">
+  <part id="P1">
+    <measure number="1">
+      <attributes>
+        <divisions>24</divisions>
+        <key><key-step>B</key-step><key-alter>-1</key-alter>
+          <key-accidental>slash-flat</key-accidental></key>
+        <time><beats>9</beats><beat-type>4</beat-type></time>
+      </attributes>
+      <direction><sound tempo="72"/></direction>
+      <note><pitch><step>G</step><octave>5</octave></pitch>
+        <duration>24</duration></note>
+      <note><grace/><pitch><step>D</step><octave>5</octave></pitch></note>
+      <note><pitch><step>B</step><alter>-1</alter><octave>4</octave></pitch>
+        <duration>48</duration></note>
+      <note><pitch><step>B</step><alter>-1</alter><octave>4</octave></pitch>
+        <duration>24</duration><accidental>flat</accidental></note>
+      <note><pitch><step>B</step><alter>-1</alter><octave>4</octave></pitch>
+        <duration>24</duration></note>
+      <note><rest/><duration>96</duration></note>
+    </measure>
+  </part>
+</score-partwise>'''
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        xml_file = os.path.join(tmp_dir, scorename + '.xml')
+        with open(xml_file, 'w') as f:
+            f.write(xml_str)
+
+        score, is_valid = MusicXMLReader.read(xml_file)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    assert is_valid
+    assert score['code'] == [51, 9, 8, 9, 9, 9, 9]
+    assert score['note53'] == ['', 'Sol5', 'Re5', 'Si4b4', 'Si4b5', 'Si4b5',
+                               'Es']
+    assert score['comma53'][1:] == [349, 327, 310, 309, 309, -1]
+    assert score['duration'][1:] == [833, 0, 1667, 833, 833, 3333]
+    assert score['offset'][3:] == [1. / 9, 1. / 3, 4. / 9, 5. / 9]
+
+
+def test_mu2_header_index():
+    data_folder = os.path.join(_curr_folder, 'data')
+    mu2_file = os.path.join(
+        data_folder, 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--'
+                     'tatyos_efendi.mu2')
+
+    index = Mu2HeaderIndex.from_files([mu2_file, mu2_file], num_processes=2)
+    folder_index = Mu2HeaderIndex.from_folder(data_folder)
+
+    assert len(index) == 2 and len(folder_index) == 1
+    assert not index.diagnostics.filter(category='unreadable_header')
+    assert index.entries[0] == index.entries[1] == folder_index.entries[0]
+    assert folder_index.get_column('usul') == ['agiraksak']
+    assert folder_index.filter(usul='agiraksak', form='sarki') == \
+        folder_index.entries
+    assert not folder_index.filter(usul='aksak')
+    assert folder_index.filter(
+        is_tempo_unit_valid=True, is_attribute_valid=True,
+        is_key_signature_valid=True, is_header_valid=True) == \
+        folder_index.entries
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        index_file = os.path.join(tmp_dir, 'index.json')
+        folder_index.save(index_file)
+        assert Mu2HeaderIndex.load(index_file).entries == \
+            folder_index.entries
+
+        # the issues found in the worker processes are aggregated
+        broken_file = os.path.join(tmp_dir, 'broken.mu2')
+        with open(broken_file, 'w') as f:
+            f.write('Kod\tNota53\nnot_a_code\tLa4\n')
+
+        with Diagnostics() as diagnostics:
+            index = Mu2HeaderIndex.from_files([mu2_file, broken_file],
+                                              num_processes=2)
+
+        assert len(index) == 1
+        assert [i.score for i in index.diagnostics.filter(
+            category='unreadable_header')] == [broken_file]
+        assert diagnostics.to_dicts() == index.diagnostics.to_dicts()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_archive_corpus():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    data_folder = os.path.join(_curr_folder, 'data')
+
+    txt_score, is_txt_valid = TxtReader.read(
+        os.path.join(data_folder, scorename + '.txt'))
+    header = Mu2Reader.read_header(
+        os.path.join(data_folder, scorename + '.mu2'))
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        zip_file = os.path.join(tmp_dir, 'SymbTr.zip')
+        with zipfile.ZipFile(zip_file, 'w') as z:
+            for ext in ['.txt', '.mu2', '.autoSeg']:
+                z.write(os.path.join(data_folder, scorename + ext),
+                        os.path.join('SymbTr', ext[1:], scorename + ext))
+
+        tar_file = os.path.join(tmp_dir, 'SymbTr.tar.gz')
+        with tarfile.open(tar_file, 'w:gz') as t:
+            t.add(data_folder, arcname='SymbTr')
+
+        for archive_file in [zip_file, tar_file]:
+            with ArchiveCorpus(archive_file) as corpus:
+                assert scorename in corpus
+                assert corpus.get_formats(scorename) == [
+                    '.autoSeg', '.mu2', '.txt']
+                assert corpus.read_score(scorename) == (txt_score,
+                                                        is_txt_valid)
+                assert corpus.read_mu2_header(scorename) == header
+                assert corpus.read_segment_bounds(scorename)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_offset_ticks():
+    for txt_file in glob.glob(os.path.join(_curr_folder, 'data', '*.txt')):
+        score, is_valid = TxtReader.read(txt_file)
+        offset_ticks, resolution = OffsetProcessor.get_offset_ticks(score)
+
+        # the ticks are exact, the offsets in the scores are rounded
+        assert numpy.allclose(offset_ticks / float(resolution),
+                              score['offset'], atol=0.001)
+
+
+def test_score_index():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+    score, is_valid = TxtReader.read(txt_file)
+
+    score_index = ScoreIndex(score)
+
+    assert score_index.first_note_idx == \
+        ScoreProcessor.get_first_note_index(score)
+    assert score_index.get_code_idx([51, 54]) == [
+        i for i, c in enumerate(score['code']) if c in [51, 54]]
+    assert score_index.get_code_idx(numpy.int64(51)) == \
+        score_index.get_code_idx(51)
+    for start, end in [(0, 10), (5, 50), (42, 42), (100, 400)]:
+        assert score_index.get_code_idx_between(54, start, end) == [
+            i for i in score_index.get_code_idx(54) if start <= i <= end]
+        assert score_index.get_lyrics_between(start, end) == \
+            ScoreProcessor.get_lyrics_between(score, start, end)
+    assert score_index.time_index.onsets_ms is score_index.duration_cumsum
+    assert numpy.array_equal(score_index.time_index.onsets_ms,
+                             TimeIndex(score).onsets_ms)
+
+
+def test_score_fragment():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+    score, is_valid = TxtReader.read(txt_file)
+
+    sounding_idx = ScoreFragment.get_sounding_idx(score)
+    for start, end in [(0, 10), (5, 50), (42, 42), (100, 400)]:
+        fragment = ScoreFragment(score, start, end, sounding_idx)
+        durs = score['duration'][start:end + 1]
+
+        assert len(fragment) == end - start + 1
+        assert fragment['notes'] == score['comma53'][start:end + 1]
+        assert fragment.get_sounding('notes') == [
+            n for n, d in zip(score['comma53'][start:end + 1], durs) if d]
+        assert [fragment.get_true_lyrics()] == \
+            ScoreProcessor.get_true_lyrics(
+                [{'lyrics': score['lyrics'][start:end + 1], 'durs': durs}])
+
+
+def test_section_index():
+    sections = [{'start_note': 1, 'end_note': 4},
+                {'start_note': 5, 'end_note': 5},
+                {'start_note': 6, 'end_note': 20}]
+    section_index = SectionIndex(sections)
+
+    assert section_index.is_disjoint
+    assert [section_index.get_section_idx(i) for i in range(20)] == \
+        [0] * 4 + [1] + [2] * 15
+    assert section_index.get_sections_between(2, 5) == [
+        (0, sections[0]), (1, sections[1]), (2, sections[2])]
+
+    # overlapping sections
+    overlap_index = SectionIndex([{'start_note': 1, 'end_note': 10},
+                                  {'start_note': 5, 'end_note': 20}])
+    assert not overlap_index.is_disjoint
+    assert overlap_index.get_section_idx(12) == 1
+    try:
+        overlap_index.get_section_idx(6)
+        assert False, 'the note is in two sections'
+    except AssertionError as err:
+        assert 'single section' in str(err)
+
+
+def test_measure_index():
+    offset_processor = OffsetProcessor(print_warnings=False)
+    for txt_file in glob.glob(os.path.join(_curr_folder, 'data', '*.txt')):
+        score, is_valid = TxtReader.read(txt_file)
+        measure_index = MeasureIndex(score)
+
+        measure_start_idx, is_measure_start_valid = \
+            offset_processor.find_measure_start_idx(score['offset'])
+        assert measure_index.measure_start_idx.tolist() == measure_start_idx
+
+        for i, offset in enumerate(score['offset']):
+            assert measure_index.get_measure(i) == int(offset + 0.001)
+            assert measure_index.is_measure_start(i) == \
+                OffsetProcessor.is_integer_offset(offset)
+
+        for m in range(measure_index.num_measures):
+            assert measure_index.get_beat_start_idx(m, 0) == \
+                measure_index.get_measure_start_idx(m)
+
+
+def test_time_index():
+    scorename = 'kurdilihicazkar--sarki--agiraksak--ehl-i_askin--tatyos_efendi'
+    txt_file = os.path.join(_curr_folder, 'data', scorename + '.txt')
+    score, is_valid = TxtReader.read(txt_file)
+
+    time_index = TimeIndex(score)
+
+    assert time_index.duration == sum(score['duration']) * 0.001
+    for i, dur in enumerate(score['duration']):
+        if dur > 0:  # the rows without duration are skipped
+            assert time_index.get_note_idx(time_index.get_onset(i)) == i
+            assert abs(time_index.get_offset(i) - time_index.get_onset(i) -
+                       dur * 0.001) < 1e-9
@@ -0,0 +1,43 @@
+class ValidationLevel(object):
+    """
+    The levels of the validation run on the scores and the extracted data:
+
+        * "off": no validation, the scores and the data are regarded as
+        valid, e.g. for the already validated corpus releases
+        * "fast": the checks on the score rows, the section boundaries and
+        the structure labels are computed as array operations. The results
+        and the warnings are the same as the strict validation, but the
+        warnings are grouped by the check
+        * "strict": the row-by-row validation
+    """
+    OFF = 'off'
+    FAST = 'fast'
+    STRICT = 'strict'
+
+    levels = [OFF, FAST, STRICT]
+
+    @classmethod
+    def check(cls, level):
+        """
+        Checks the validation level
+
+        Parameters
+        ----------
+        level : str
+            The validation level; "off", "fast" or "strict"
+
+        Returns
+        ----------
+        str
+            The validation level
+
+        Raises
+        ------
+        ValueError
+            If the validation level is unknown
+        """
+        if level not in cls.levels:
+            raise ValueError(u'The validation level should be one of {0!s}, '
+                             u'not {1!s}'.format(', '.join(cls.levels),
+                                                 level))
+        return level